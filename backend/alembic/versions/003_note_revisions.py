@@ -0,0 +1,42 @@
+"""Add note revisions
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Periodic full snapshots plus JSON Patch deltas between them
+    op.create_table('note_revisions',
+        sa.Column('note_id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('base_version', sa.Integer(), nullable=True),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.CheckConstraint("kind IN ('snapshot', 'delta')", name='ck_note_revisions_kind'),
+        sa.ForeignKeyConstraint(['note_id'], ['notes.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('note_id', 'version')
+    )
+    
+    # Finding the latest snapshot at or before a version
+    op.create_index('ix_note_revisions_snapshots', 'note_revisions', ['note_id', 'version'],
+                    unique=False, postgresql_where=sa.text("kind = 'snapshot'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_note_revisions_snapshots', table_name='note_revisions')
+    op.drop_table('note_revisions')
@@ -0,0 +1,39 @@
+"""Store note embeddings as pgvector with an HNSW index
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    
+    # The BYTEA column was never written, existing values are dropped
+    op.execute(
+        "ALTER TABLE notes ALTER COLUMN content_embedding TYPE vector(1536) USING NULL"
+    )
+    
+    # Approximate nearest neighbour index for cosine distance (<=>)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_notes_content_embedding_hnsw "
+        "ON notes USING hnsw (content_embedding vector_cosine_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_notes_content_embedding_hnsw")
+    op.execute(
+        "ALTER TABLE notes ALTER COLUMN content_embedding TYPE bytea USING NULL"
+    )
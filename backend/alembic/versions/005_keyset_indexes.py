@@ -0,0 +1,39 @@
+"""Add composite indexes backing keyset pagination
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Matches the ORDER BY of NoteRepository.get_notes_by_video_id
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_notes_video_keyset "
+        "ON notes (video_id, (COALESCE(timestamp, 2147483647)), created_at DESC, id DESC)"
+    )
+    op.create_index(
+        'ix_notes_updated_at_id', 'notes',
+        [sa.text('updated_at DESC'), sa.text('id DESC')],
+    )
+    op.create_index(
+        'ix_downloads_created_at_id', 'downloads',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_downloads_created_at_id', table_name='downloads')
+    op.drop_index('ix_notes_updated_at_id', table_name='notes')
+    op.execute("DROP INDEX IF EXISTS ix_notes_video_keyset")
@@ -0,0 +1,50 @@
+"""Add covering indexes for history joins and drop redundant video_id indexes
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The history and download joins only read title and thumbnail from videos,
+    # so the lookup is answered from the index. It replaces the duplicate unique
+    # index next to the video_id constraint, keeping upserts at one extra index.
+    op.create_index(
+        'ix_videos_video_id_covering', 'videos', ['video_id'],
+        unique=True, postgresql_include=['title', 'thumbnail'],
+    )
+    op.drop_index('ix_videos_video_id', table_name='videos')
+    
+    # Download history pages become index-only scans
+    op.create_index(
+        'ix_downloads_created_at_id_covering', 'downloads',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_include=['video_id', 'format', 'file_path', 'file_size'],
+    )
+    op.drop_index('ix_downloads_created_at_id', table_name='downloads')
+    
+    # Served by the leading column of ix_notes_video_keyset
+    op.drop_index('ix_notes_video_id', table_name='notes')
+
+
+def downgrade() -> None:
+    op.create_index('ix_notes_video_id', 'notes', ['video_id'], unique=False)
+    op.create_index(
+        'ix_downloads_created_at_id', 'downloads',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+    op.drop_index('ix_downloads_created_at_id_covering', table_name='downloads')
+    op.create_index('ix_videos_video_id', 'videos', ['video_id'], unique=True)
+    op.drop_index('ix_videos_video_id_covering', table_name='videos')
@@ -0,0 +1,82 @@
+"""Track the download lifecycle: status, resolution, byte counts and timing
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The history index includes file_size, so it is rebuilt after the type change
+    op.drop_index('ix_downloads_created_at_id_covering', table_name='downloads')
+
+    # Rows recorded before this revision only exist for finished downloads
+    op.add_column('downloads', sa.Column('status', sa.Text(), nullable=False, server_default='completed'))
+    op.add_column('downloads', sa.Column('resolution', sa.Text(), nullable=True))
+    op.add_column('downloads', sa.Column('bytes_downloaded', sa.BigInteger(), nullable=True))
+    op.add_column('downloads', sa.Column('total_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('downloads', sa.Column('started_at', sa.TIMESTAMP(), nullable=True))
+    op.add_column('downloads', sa.Column('finished_at', sa.TIMESTAMP(), nullable=True))
+    op.add_column('downloads', sa.Column('error', sa.Text(), nullable=True))
+    op.add_column('downloads', sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('NOW()'), nullable=True))
+    op.create_check_constraint(
+        'ck_downloads_status', 'downloads',
+        "status IN ('queued', 'in_progress', 'completed', 'failed')",
+    )
+
+    # Queued downloads have no file yet, and video files can exceed 2 GiB
+    op.alter_column('downloads', 'file_path', existing_type=sa.Text(), nullable=True)
+    op.alter_column('downloads', 'file_size', existing_type=sa.Integer(), type_=sa.BigInteger())
+
+    # Leave room on each page so progress updates stay heap-only (HOT)
+    op.execute("ALTER TABLE downloads SET (fillfactor = 90)")
+
+    op.create_index(
+        'ix_downloads_history', 'downloads',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_include=['video_id', 'format', 'resolution', 'status', 'file_path', 'file_size'],
+    )
+
+    # Small partial index for finding downloads left unfinished by a crash
+    op.create_index(
+        'ix_downloads_unfinished', 'downloads', ['updated_at'],
+        postgresql_where=sa.text("status IN ('queued', 'in_progress')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_downloads_unfinished', table_name='downloads')
+    op.drop_index('ix_downloads_history', table_name='downloads')
+
+    # Only finished downloads fit the old schema
+    op.execute("DELETE FROM downloads WHERE file_path IS NULL")
+    op.execute("ALTER TABLE downloads RESET (fillfactor)")
+    op.alter_column('downloads', 'file_size', existing_type=sa.BigInteger(), type_=sa.Integer())
+    op.alter_column('downloads', 'file_path', existing_type=sa.Text(), nullable=False)
+
+    op.drop_constraint('ck_downloads_status', 'downloads', type_='check')
+    op.drop_column('downloads', 'updated_at')
+    op.drop_column('downloads', 'error')
+    op.drop_column('downloads', 'finished_at')
+    op.drop_column('downloads', 'started_at')
+    op.drop_column('downloads', 'total_bytes')
+    op.drop_column('downloads', 'bytes_downloaded')
+    op.drop_column('downloads', 'resolution')
+    op.drop_column('downloads', 'status')
+
+    op.create_index(
+        'ix_downloads_created_at_id_covering', 'downloads',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_include=['video_id', 'format', 'file_path', 'file_size'],
+    )
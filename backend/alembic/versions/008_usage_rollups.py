@@ -0,0 +1,206 @@
+"""Add usage rollups maintained incrementally by triggers
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mirrored in src/infrastructure/db/migrations.py
+USAGE_ROLLUP_FUNCTIONS = """
+-- Adds events to the rollups of the given bucket sizes ('hour', 'day', 'total')
+CREATE OR REPLACE FUNCTION record_usage(
+    p_sizes TEXT[], p_metric TEXT[], p_dimension TEXT[], p_at TIMESTAMP[], p_count BIGINT[], p_bytes BIGINT[]
+) RETURNS void LANGUAGE sql AS $$
+    INSERT INTO usage_rollups (metric, bucket_size, bucket, dimension, count, bytes)
+    SELECT e.metric, s.size,
+           CASE WHEN s.size = 'total' THEN TIMESTAMP 'epoch' ELSE date_trunc(s.size, e.at) END,
+           e.dimension, sum(e.count), sum(e.bytes)
+    FROM unnest(p_metric, p_dimension, p_at, p_count, p_bytes) AS e(metric, dimension, at, count, bytes)
+    CROSS JOIN unnest(p_sizes) AS s(size)
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (metric, bucket_size, bucket, dimension) DO UPDATE
+    SET count = usage_rollups.count + EXCLUDED.count,
+        bytes = usage_rollups.bytes + EXCLUDED.bytes
+$$;
+
+-- Downloads are counted once they finish, per format
+CREATE OR REPLACE FUNCTION usage_downloads_finished() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('downloads.' || n.status), array_agg(n.format),
+            array_agg(COALESCE(n.finished_at, n.created_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(CASE WHEN n.status = 'completed' THEN COALESCE(n.file_size, 0) ELSE 0 END)
+        )
+        FROM new_rows n
+        WHERE n.status IN ('completed', 'failed')
+        HAVING count(*) > 0;
+    ELSE
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('downloads.' || n.status), array_agg(n.format),
+            array_agg(COALESCE(n.finished_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(CASE WHEN n.status = 'completed' THEN COALESCE(n.file_size, 0) ELSE 0 END)
+        )
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE n.status IN ('completed', 'failed')
+          AND o.status NOT IN ('completed', 'failed')
+        HAVING count(*) > 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Notes created per bucket, plus current totals overall and per video
+CREATE OR REPLACE FUNCTION usage_notes_changed() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('notes'::text), array_agg(''::text), array_agg(COALESCE(n.created_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM new_rows n
+        HAVING count(*) > 0;
+        PERFORM record_usage(
+            ARRAY['total'],
+            array_agg('notes.video'::text), array_agg(n.video_id), array_agg(NOW()::timestamp),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM new_rows n
+        HAVING count(*) > 0;
+    ELSE
+        PERFORM record_usage(
+            ARRAY['total'],
+            array_agg(m.metric), array_agg(m.dimension), array_agg(NOW()::timestamp),
+            array_agg(-1::bigint), array_agg(0::bigint)
+        )
+        FROM old_rows o
+        CROSS JOIN LATERAL (VALUES ('notes', ''), ('notes.video', o.video_id)) AS m(metric, dimension)
+        HAVING count(*) > 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Chat messages per bucket and language, plus totals per video
+CREATE OR REPLACE FUNCTION usage_chats_inserted() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM record_usage(
+        ARRAY['hour', 'day', 'total'],
+        array_agg('chats'::text), array_agg(COALESCE(n.language, '')),
+        array_agg(COALESCE(n.created_at, NOW()::timestamp)),
+        array_agg(1::bigint), array_agg(0::bigint)
+    )
+    FROM new_rows n
+    HAVING count(*) > 0;
+    PERFORM record_usage(
+        ARRAY['total'],
+        array_agg('chats.video'::text), array_agg(n.video_id), array_agg(NOW()::timestamp),
+        array_agg(1::bigint), array_agg(0::bigint)
+    )
+    FROM new_rows n
+    HAVING count(*) > 0;
+    RETURN NULL;
+END
+$$;
+"""
+
+# Statement-level triggers see every row of a bulk write at once through
+# transition tables, so a batch becomes one upsert per rollup row
+USAGE_ROLLUP_TRIGGERS = """
+CREATE TRIGGER usage_downloads_inserted AFTER INSERT ON downloads
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_downloads_finished();
+CREATE TRIGGER usage_downloads_updated AFTER UPDATE ON downloads
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_downloads_finished();
+CREATE TRIGGER usage_notes_inserted AFTER INSERT ON notes
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_notes_changed();
+CREATE TRIGGER usage_notes_deleted AFTER DELETE ON notes
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_notes_changed();
+CREATE TRIGGER usage_chats_inserted AFTER INSERT ON chats
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_chats_inserted();
+"""
+
+# One-off aggregation of the rows written before the triggers existed
+USAGE_ROLLUP_BACKFILL = """
+SELECT record_usage(
+    ARRAY['hour', 'day', 'total'],
+    array_agg('downloads.' || status), array_agg(format),
+    array_agg(COALESCE(finished_at, created_at, NOW()::timestamp)),
+    array_agg(1::bigint), array_agg(CASE WHEN status = 'completed' THEN COALESCE(file_size, 0) ELSE 0 END)
+)
+FROM downloads WHERE status IN ('completed', 'failed') HAVING count(*) > 0;
+SELECT record_usage(
+    ARRAY['hour', 'day', 'total'],
+    array_agg('notes'::text), array_agg(''::text), array_agg(COALESCE(created_at, NOW()::timestamp)),
+    array_agg(1::bigint), array_agg(0::bigint)
+)
+FROM notes HAVING count(*) > 0;
+SELECT record_usage(
+    ARRAY['total'],
+    array_agg('notes.video'::text), array_agg(video_id), array_agg(NOW()::timestamp),
+    array_agg(1::bigint), array_agg(0::bigint)
+)
+FROM notes HAVING count(*) > 0;
+SELECT record_usage(
+    ARRAY['hour', 'day', 'total'],
+    array_agg('chats'::text), array_agg(COALESCE(language, '')), array_agg(COALESCE(created_at, NOW()::timestamp)),
+    array_agg(1::bigint), array_agg(0::bigint)
+)
+FROM chats HAVING count(*) > 0;
+SELECT record_usage(
+    ARRAY['total'],
+    array_agg('chats.video'::text), array_agg(video_id), array_agg(NOW()::timestamp),
+    array_agg(1::bigint), array_agg(0::bigint)
+)
+FROM chats HAVING count(*) > 0;
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'usage_rollups',
+        sa.Column('metric', sa.Text(), nullable=False),
+        sa.Column('bucket_size', sa.Text(), nullable=False),
+        sa.Column('bucket', sa.TIMESTAMP(), nullable=False),
+        sa.Column('dimension', sa.Text(), nullable=False, server_default=''),
+        sa.Column('count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('metric', 'bucket_size', 'bucket', 'dimension'),
+        sa.CheckConstraint("bucket_size IN ('hour', 'day', 'total')", name='ck_usage_rollups_bucket_size'),
+    )
+    op.execute(USAGE_ROLLUP_FUNCTIONS)
+    op.execute(USAGE_ROLLUP_TRIGGERS)
+    op.execute(USAGE_ROLLUP_BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS usage_chats_inserted ON chats")
+    op.execute("DROP TRIGGER IF EXISTS usage_notes_deleted ON notes")
+    op.execute("DROP TRIGGER IF EXISTS usage_notes_inserted ON notes")
+    op.execute("DROP TRIGGER IF EXISTS usage_downloads_updated ON downloads")
+    op.execute("DROP TRIGGER IF EXISTS usage_downloads_inserted ON downloads")
+    op.execute("DROP FUNCTION IF EXISTS usage_chats_inserted()")
+    op.execute("DROP FUNCTION IF EXISTS usage_notes_changed()")
+    op.execute("DROP FUNCTION IF EXISTS usage_downloads_finished()")
+    op.execute("DROP FUNCTION IF EXISTS record_usage(TEXT[], TEXT[], TEXT[], TIMESTAMP[], BIGINT[], BIGINT[])")
+    op.drop_table('usage_rollups')
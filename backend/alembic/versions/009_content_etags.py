@@ -0,0 +1,65 @@
+"""Store content hashes for video metadata, formats and transcripts
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mirrored in src/infrastructure/db/migrations.py
+VIDEO_ETAG_TRIGGER = """
+CREATE OR REPLACE FUNCTION video_etag() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.etag := md5(jsonb_build_array(
+        NEW.platform, NEW.title, NEW.thumbnail, NEW.duration, NEW.upload_date, NEW.channel
+    )::text);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER videos_etag BEFORE INSERT OR UPDATE OF platform, title, thumbnail, duration, upload_date, channel
+    ON videos FOR EACH ROW EXECUTE FUNCTION video_etag();
+"""
+
+
+def upgrade() -> None:
+    # Hashes are computed by Postgres over the canonical jsonb text whenever
+    # the content is written, and served as strong ETags
+    op.add_column('videos', sa.Column('etag', sa.Text(), nullable=True))
+    op.add_column('videos', sa.Column('formats', postgresql.JSONB(), nullable=True))
+    op.add_column('videos', sa.Column('formats_etag', sa.Text(), nullable=True))
+    op.execute(VIDEO_ETAG_TRIGGER)
+    # Hash existing rows through the trigger
+    op.execute("UPDATE videos SET title = title")
+
+    # Transcripts are fetched from YouTube once per video and language
+    op.create_table(
+        'transcripts',
+        sa.Column('video_id', sa.Text(), nullable=False),
+        sa.Column('language', sa.Text(), nullable=False),
+        sa.Column('segments', postgresql.JSONB(), nullable=False),
+        sa.Column('etag', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('video_id', 'language'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('transcripts')
+    op.execute("DROP TRIGGER IF EXISTS videos_etag ON videos")
+    op.execute("DROP FUNCTION IF EXISTS video_etag()")
+    op.drop_column('videos', 'formats_etag')
+    op.drop_column('videos', 'formats')
+    op.drop_column('videos', 'etag')
@@ -0,0 +1,96 @@
+"""
+Measure how long a fresh interpreter takes to import the API and to collect the tests.
+
+Each measurement runs in a new process, as a cold-started worker or a test run
+would, and the median of the runs is reported together with the slowest
+imported modules and any heavy dependency that got imported eagerly.
+
+Usage, from the backend directory:
+
+    python scripts/benchmark_startup.py [--runs 10] [--collect]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP_MODULE = "src.presentation.main"
+
+# Loaded on first use, so importing the app must not import them
+LAZY_MODULES = ("yt_dlp", "youtube_transcript_api", "sqlalchemy", "groq", "openai")
+
+IMPORT_SCRIPT = f"""
+import sys, time
+start = time.perf_counter()
+import {APP_MODULE}
+print(time.perf_counter() - start)
+print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))
+"""
+
+
+def run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR}, check=True,
+    )
+
+
+def measure_import(runs: int) -> Tuple[List[float], str]:
+    """Seconds to import the app in each run, and the lazy modules it imported anyway."""
+    times, eager = [], ""
+    for _ in range(runs):
+        elapsed, eager = run(["-c", IMPORT_SCRIPT]).stdout.splitlines()[-2:]
+        times.append(float(elapsed))
+    return times, eager
+
+
+def slowest_imports(limit: int) -> List[Tuple[int, str]]:
+    """Modules imported directly by the app module, by cumulative import time in microseconds."""
+    stderr = run(["-X", "importtime", "-c", f"import {APP_MODULE}"]).stderr
+    totals: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two more spaces per level; the app
+        # module is at depth 0, after the modules it imports at depth 1
+        if (len(name) - len(name.lstrip())) // 2 == 1:
+            totals[name.strip()] = int(cumulative)
+    return sorted(((us, name) for name, us in totals.items()), reverse=True)[:limit]
+
+
+def measure_collect(runs: int) -> List[float]:
+    """Seconds pytest takes to collect the test suite in each run."""
+    times = []
+    for _ in range(runs):
+        script = "import sys, time, pytest; s = time.perf_counter(); pytest.main(['-q', '--collect-only', 'src/tests']); print(time.perf_counter() - s)"
+        times.append(float(run(["-c", script]).stdout.splitlines()[-1]))
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per measurement")
+    parser.add_argument("--collect", action="store_true", help="also time pytest collection")
+    args = parser.parse_args()
+
+    times, eager = measure_import(args.runs)
+    print(f"import {APP_MODULE}: median {statistics.median(times) * 1000:.0f} ms, "
+          f"min {min(times) * 1000:.0f} ms over {args.runs} runs")
+    print(f"heavy dependencies imported eagerly: {eager or 'none'}")
+
+    print("slowest imports of the app (cumulative):")
+    for us, name in slowest_imports(10):
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if args.collect:
+        collect = measure_collect(args.runs)
+        print(f"pytest collection: median {statistics.median(collect) * 1000:.0f} ms over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
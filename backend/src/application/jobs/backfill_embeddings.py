@@ -0,0 +1,36 @@
+
+import asyncio
+import logging
+from src.infrastructure.db.connection import db
+from src.infrastructure.repositories.note_repository import NoteRepository
+from src.infrastructure.services.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+async def backfill_embeddings():
+    """Compute embeddings for notes that do not have one, in ID-ordered batches."""
+    try:
+        await db.connect()
+        note_repository = NoteRepository()
+        
+        # The notes are read through one streaming cursor while the updates
+        # go through other pooled connections
+        total = 0
+        async for batch in note_repository.iter_notes_without_embedding(BATCH_SIZE):
+            embeddings = EmbeddingService.embed_batch([text for _, text in batch])
+            await note_repository.update_embeddings(
+                [(note_id, embedding) for (note_id, _), embedding in zip(batch, embeddings)]
+            )
+            total += len(batch)
+            logger.info(f"Embedded {total} notes")
+        
+        logger.info(f"Backfill completed, embedded {total} notes")
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill_embeddings())
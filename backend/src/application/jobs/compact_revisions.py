@@ -0,0 +1,37 @@
+
+import asyncio
+import logging
+from src.application.use_cases.note_history import NoteHistoryUseCase
+from src.infrastructure.db.connection import db
+from src.infrastructure.repositories.note_revision_repository import NoteRevisionRepository
+
+logger = logging.getLogger(__name__)
+
+# Revisions kept untouched per note; older deltas are merged
+KEEP_RECENT = 50
+MERGE_EVERY = 10
+
+
+async def compact_revisions():
+    """Merge old deltas for every note with more than KEEP_RECENT revisions."""
+    try:
+        await db.connect()
+        history = NoteHistoryUseCase(NoteRevisionRepository())
+        
+        note_ids = await history.revision_repository.get_note_ids_with_revisions(KEEP_RECENT + 2)
+        logger.info(f"Compacting revisions of {len(note_ids)} notes...")
+        
+        removed = 0
+        for note_id in note_ids:
+            try:
+                removed += await history.compact_revisions(note_id, KEEP_RECENT, MERGE_EVERY)
+            except Exception as e:
+                logger.error(f"Compaction failed for note {note_id}: {e}")
+        
+        logger.info(f"Compaction completed, removed {removed} revisions")
+    finally:
+        await db.disconnect()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(compact_revisions())
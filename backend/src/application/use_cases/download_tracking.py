@@ -0,0 +1,183 @@
+from typing import Dict, Optional, Set
+from datetime import datetime
+import asyncio
+import logging
+
+from src.domain.entities.download import DownloadStatus, DownloadUpdate
+from src.infrastructure.repositories.download_repository import DownloadRepository
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadTrackingUseCase:
+    """Use case for recording the download lifecycle with batched write-behind updates."""
+
+    # Seconds buffered progress may wait before it is written
+    FLUSH_SECONDS = 1.0
+
+    # Number of downloads with buffered changes that forces a write regardless of the timer
+    MAX_PENDING = 100
+
+    # Unfinished downloads without an update for this long are failed on startup
+    STALE_SECONDS = 600.0
+
+    # Seconds between writes marking running downloads as alive, well below STALE_SECONDS
+    # so that a download without progress events, e.g. during the ffmpeg merge, is not failed
+    HEARTBEAT_SECONDS = 60.0
+
+    def __init__(self, download_repository: DownloadRepository):
+        self.download_repository = download_repository
+        self.active: Dict[int, str] = {}
+        self.pending: Dict[int, DownloadUpdate] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.heartbeat_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        # Flushes started by the timer or a full buffer, referenced until they finish
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def start(self, video_id: str, format_type: str, resolution: Optional[str] = None) -> int:
+        """
+        Record a new queued download.
+
+        Args:
+            video_id: ID of the stored video being downloaded
+            format_type: Format to download (mp4 or mp3)
+            resolution: Requested resolution for video downloads
+
+        Returns:
+            ID of the download
+        """
+        download_id = await self.download_repository.create_download(video_id, format_type, resolution)
+        self.active[download_id] = DownloadStatus.QUEUED.value
+        self._schedule_heartbeat()
+        return download_id
+
+    def progress(self, download_id: int, bytes_downloaded: int, total_bytes: Optional[int] = None) -> None:
+        """
+        Buffer a progress update; the first one moves the download to in_progress.
+
+        Updates are only kept in memory here and written in batches, so this is
+        cheap enough to call for every progress event.
+        """
+        status = self.active.get(download_id)
+        if status is None:
+            return
+
+        update = DownloadUpdate(download_id, bytes_downloaded=bytes_downloaded, total_bytes=total_bytes)
+        if status == DownloadStatus.QUEUED.value:
+            update.status = self.active[download_id] = DownloadStatus.IN_PROGRESS.value
+            update.started_at = datetime.now()
+
+        self._buffer(update)
+
+    async def complete(self, download_id: int, file_path: str, file_size: Optional[int]) -> None:
+        """Record a finished download and write it right away."""
+        await self._finish(DownloadUpdate(
+            download_id,
+            status=DownloadStatus.COMPLETED.value,
+            file_path=file_path,
+            file_size=file_size,
+            finished_at=datetime.now(),
+        ))
+
+    async def fail(self, download_id: int, error: str) -> None:
+        """Record a failed download and write it right away."""
+        await self._finish(DownloadUpdate(
+            download_id,
+            status=DownloadStatus.FAILED.value,
+            error=error,
+            finished_at=datetime.now(),
+        ))
+
+    async def flush(self) -> None:
+        """Write every buffered update in a single batch."""
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+        async with self._flush_lock:
+            if not self.pending:
+                return
+
+            batch, self.pending = self.pending, {}
+            try:
+                await self.download_repository.apply_updates(list(batch.values()))
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} download updates: {e}")
+                # Keep the failed batch, with anything buffered meanwhile on top
+                for download_id, update in batch.items():
+                    newer = self.pending.get(download_id)
+                    if newer:
+                        update.merge(newer)
+                    self.pending[download_id] = update
+                self._schedule_flush()
+
+    async def recover(self) -> int:
+        """
+        Fail downloads left unfinished by a process that is gone.
+
+        Downloads running in any live worker are refreshed by its heartbeat,
+        so only those of stopped or killed workers go stale.
+        """
+        count = await self.download_repository.fail_stale_downloads(
+            self.STALE_SECONDS, "Interrupted before completion"
+        )
+        if count:
+            logger.warning(f"Marked {count} interrupted downloads as failed")
+        return count
+
+    async def close(self) -> None:
+        """Wait for flushes in flight, then write buffered updates before shutting down."""
+        if self.heartbeat_handle:
+            self.heartbeat_handle.cancel()
+            self.heartbeat_handle = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    async def _finish(self, update: DownloadUpdate) -> None:
+        """Buffer a final update and write it with everything else pending."""
+        if self.active.pop(update.download_id, None) is None:
+            return
+        self._buffer(update)
+        await self.flush()
+
+    def _buffer(self, update: DownloadUpdate) -> None:
+        """Coalesce an update with the pending changes of its download."""
+        pending = self.pending.get(update.download_id)
+        if pending:
+            pending.merge(update)
+        else:
+            self.pending[update.download_id] = update
+
+        if len(self.pending) >= self.MAX_PENDING:
+            self._start_flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Start the flush timer unless one is already running."""
+        if self.flush_handle:
+            return
+        loop = asyncio.get_running_loop()
+        self.flush_handle = loop.call_later(self.FLUSH_SECONDS, self._start_flush)
+
+    def _schedule_heartbeat(self) -> None:
+        """Start the heartbeat timer while downloads are running, unless it is already running."""
+        if self.heartbeat_handle or not self.active:
+            return
+        loop = asyncio.get_running_loop()
+        self.heartbeat_handle = loop.call_later(self.HEARTBEAT_SECONDS, self._heartbeat)
+
+    def _heartbeat(self) -> None:
+        """Buffer an empty update for each running download; writing it refreshes updated_at."""
+        self.heartbeat_handle = None
+        for download_id in self.active:
+            self._buffer(DownloadUpdate(download_id))
+        self._schedule_heartbeat()
+
+    def _start_flush(self) -> None:
+        """Run a flush in the background, keeping a reference until it finishes."""
+        task = asyncio.ensure_future(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
@@ -0,0 +1,293 @@
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Set
+import asyncio
+import logging
+
+from src.domain.entities.note import NoteVersionConflictError
+from src.infrastructure.agents.note_agent import NoteAgent
+from src.infrastructure.repositories.note_repository import NoteRepository
+from src.infrastructure.services.embedding_service import EmbeddingService
+from src.infrastructure.tools.json_patch_tool import JsonPatchTool
+from src.application.use_cases.note_history import NoteHistoryUseCase
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class AutosaveSession:
+    """In-memory state of a note that is being edited."""
+
+    def __init__(self, note_id: int, content: Dict[str, Any], version: int):
+        self.note_id = note_id
+        self.content = content
+        self.version = version
+        self.persisted_version = version
+        self.persisted_content = content
+        self.pending_edits = 0
+        self.subscribers: Dict[str, Subscriber] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.lock = asyncio.Lock()
+
+
+class NoteAutosaveUseCase:
+    """
+    Use case for coalescing streamed note edits into debounced database writes.
+
+    Sessions live in the memory of one worker. Editors of the same note
+    connected to different workers buffer edits against their own versions,
+    and the later write fails the version check: its clients get a
+    ``conflict`` with the stored version and their unsaved edits. Route the
+    autosave WebSocket with sticky sessions keyed on the note ID to avoid it.
+    """
+
+    # Seconds of inactivity before pending edits are written
+    DEBOUNCE_SECONDS = 2.0
+
+    # Number of pending edits that forces a write regardless of the timer
+    MAX_PENDING_EDITS = 50
+
+    def __init__(self, note_repository: NoteRepository,
+                 note_history: Optional[NoteHistoryUseCase] = None):
+        self.note_repository = note_repository
+        self.note_history = note_history
+        self.note_agent = NoteAgent
+        self.embedding_service = EmbeddingService
+        self.sessions: Dict[int, AutosaveSession] = {}
+        self._open_lock = asyncio.Lock()
+        # Flushes started by debounce timers, referenced until they finish
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def join(self, note_id: int, client_id: str, send: Subscriber) -> Optional[Dict[str, Any]]:
+        """
+        Register a client editing a note.
+
+        Args:
+            note_id: ID of the note
+            client_id: Unique identifier of the client connection
+            send: Coroutine used to push messages to the client
+
+        Returns:
+            Current version and content, or None if the note does not exist
+        """
+        async with self._open_lock:
+            session = self.sessions.get(note_id)
+            if not session:
+                note = await self.note_repository.get_note_by_id(note_id)
+                if not note:
+                    return None
+                session = AutosaveSession(note_id, note.content, note.version)
+                self.sessions[note_id] = session
+
+            session.subscribers[client_id] = send
+
+        return {"version": session.version, "content": session.content}
+
+    async def leave(self, note_id: int, client_id: str) -> None:
+        """
+        Unregister a client, writing pending edits once the last one leaves.
+
+        If that write fails the session is kept, with its retry timer, until
+        a later flush succeeds.
+        """
+        session = self.sessions.get(note_id)
+        if not session:
+            return
+
+        session.subscribers.pop(client_id, None)
+        if session.subscribers:
+            return
+
+        await self.flush(note_id)
+        self._discard_if_idle(session)
+
+    async def apply_edit(self, note_id: int, client_id: str, operations: List[Dict[str, Any]],
+                         base_version: int) -> int:
+        """
+        Merge an edit into the in-memory document.
+
+        Args:
+            note_id: ID of the note
+            client_id: Client that sent the edit
+            operations: JSON Patch or Lexical-level operations
+            base_version: Version the client made the edit against
+
+        Returns:
+            New in-memory version of the note
+
+        Raises:
+            JsonPatchError: If the operations are malformed or do not apply
+            NoteVersionConflictError: If the client is behind the current version,
+                or is no longer part of the session and has to join again
+        """
+        session = self.sessions.get(note_id)
+        if not session or client_id not in session.subscribers:
+            raise NoteVersionConflictError(note_id, base_version)
+
+        patch = JsonPatchTool.normalize(operations)
+
+        async with session.lock:
+            if base_version != session.version:
+                raise NoteVersionConflictError(note_id, base_version)
+
+            session.content = JsonPatchTool.apply(session.content, patch)
+            session.version += 1
+            session.pending_edits += 1
+            version = session.version
+
+        # Keep other editors of the note in sync
+        await self._publish(session, {
+            "type": "edit",
+            "data": {"version": version, "operations": patch},
+        }, exclude=client_id)
+
+        if session.pending_edits >= self.MAX_PENDING_EDITS:
+            await self.flush(note_id)
+        else:
+            self._schedule_flush(session)
+
+        return version
+
+    def snapshot(self, note_id: int) -> Optional[Dict[str, Any]]:
+        """Get the current in-memory version and content of a note."""
+        session = self.sessions.get(note_id)
+        if not session:
+            return None
+        return {"version": session.version, "content": session.content}
+
+    async def flush(self, note_id: int) -> Optional[int]:
+        """
+        Write pending edits of a note to the database.
+
+        Args:
+            note_id: ID of the note
+
+        Returns:
+            Persisted version, or None if there is no active session
+        """
+        session = self.sessions.get(note_id)
+        if not session:
+            return None
+
+        if session.flush_handle:
+            session.flush_handle.cancel()
+            session.flush_handle = None
+
+        message = None
+        async with session.lock:
+            if session.version == session.persisted_version:
+                return session.persisted_version
+
+            content, version = session.content, session.version
+            content_text = self.note_agent.extract_plain_text(content, note_id=note_id)
+            embedding = self.embedding_service.embed(content_text)
+
+            try:
+                await self.note_repository.save_content(
+                    note_id, content, content_text, session.persisted_version, version, embedding
+                )
+            except NoteVersionConflictError:
+                # The note was changed outside this session, e.g. by an editor on another worker
+                logger.warning(f"Autosave conflict for note {note_id}, returning unsaved edits to clients")
+                message = await self._reload(session)
+            except Exception as e:
+                logger.error(f"Error flushing autosave for note {note_id}: {e}")
+                self._schedule_flush(session)
+                return session.persisted_version
+            else:
+                if self.note_history:
+                    await self.note_history.record_revision(
+                        note_id, version, content,
+                        base_version=session.persisted_version,
+                        base_content=session.persisted_content,
+                    )
+
+                session.persisted_version = version
+                session.persisted_content = content
+                session.pending_edits = 0
+                message = {"type": "saved", "data": {"version": version}}
+
+        # Published outside the lock: evicting a client may flush again
+        if message:
+            await self._publish(session, message)
+
+        # A retried write of a session whose clients have all left
+        self._discard_if_idle(session)
+        return session.persisted_version
+
+    async def flush_all(self) -> None:
+        """Write pending edits of every active session."""
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        for note_id in list(self.sessions):
+            await self.flush(note_id)
+
+    def _schedule_flush(self, session: AutosaveSession) -> None:
+        """(Re)start the debounce timer of a session."""
+        if session.flush_handle:
+            session.flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        session.flush_handle = loop.call_later(self.DEBOUNCE_SECONDS, self._start_flush, session.note_id)
+
+    def _start_flush(self, note_id: int) -> None:
+        """Run a debounced flush, keeping a reference until it finishes."""
+        task = asyncio.ensure_future(self.flush(note_id))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _discard_if_idle(self, session: AutosaveSession) -> None:
+        """Drop a session that has no clients left and nothing left to write."""
+        if session.subscribers or session.version != session.persisted_version:
+            return
+        # A client may have joined while the final write was running
+        if self.sessions.get(session.note_id) is session:
+            self.sessions.pop(session.note_id, None)
+        if session.flush_handle:
+            session.flush_handle.cancel()
+            session.flush_handle = None
+
+    async def _reload(self, session: AutosaveSession) -> Optional[Dict[str, Any]]:
+        """
+        Replace the in-memory document with the stored one.
+
+        The edits that could not be written are not applied to the stored
+        document, whose blocks may have moved, but sent back to the clients
+        as JSON Patch operations against the version they were made on, so
+        the editor can reapply or show them.
+
+        Returns:
+            Conflict message for the clients, or None if the note was deleted
+        """
+        note = await self.note_repository.get_note_by_id(session.note_id)
+        if not note:
+            self.sessions.pop(session.note_id, None)
+            return None
+
+        unsaved = {
+            "base_version": session.persisted_version,
+            "operations": JsonPatchTool.diff(session.persisted_content, session.content),
+        }
+
+        session.content = session.persisted_content = note.content
+        session.version = session.persisted_version = note.version
+        session.pending_edits = 0
+
+        return {
+            "type": "conflict",
+            "data": {"version": note.version, "content": note.content, "unsaved": unsaved},
+        }
+
+    async def _publish(self, session: AutosaveSession, message: Dict[str, Any],
+                       exclude: Optional[str] = None) -> None:
+        """Send a message to every client of a session, letting clients that fail leave."""
+        failed = []
+        for client_id, send in list(session.subscribers.items()):
+            if client_id == exclude:
+                continue
+            try:
+                await send(message)
+            except Exception as e:
+                logger.error(f"Error sending autosave message to {client_id}: {e}")
+                failed.append(client_id)
+
+        for client_id in failed:
+            await self.leave(session.note_id, client_id)
@@ -0,0 +1,187 @@
+from typing import Dict, Any, Optional, List
+import logging
+
+from src.domain.entities.note import NoteRevision
+from src.infrastructure.repositories.note_revision_repository import NoteRevisionRepository
+from src.infrastructure.tools.json_patch_tool import JsonPatchTool
+
+logger = logging.getLogger(__name__)
+
+
+class NoteHistoryUseCase:
+    """Use case for note revision history."""
+
+    # Deltas stored after a snapshot before the next full snapshot is taken
+    SNAPSHOT_INTERVAL = 20
+
+    def __init__(self, revision_repository: NoteRevisionRepository):
+        self.revision_repository = revision_repository
+
+    async def record_revision(self, note_id: int, version: int, content: Dict[str, Any],
+                              base_version: Optional[int] = None,
+                              base_content: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record a new version of a note.
+
+        A delta against the previous version is stored when the previous
+        version is the latest recorded revision; otherwise, or every
+        SNAPSHOT_INTERVAL deltas, a full snapshot is stored.
+
+        Args:
+            note_id: ID of the note
+            version: Version the note was saved as
+            content: Saved Lexical JSON content
+            base_version: Version the save was made against
+            base_content: Content of the note at base_version
+        """
+        try:
+            latest = await self.revision_repository.get_latest_revision_info(note_id)
+
+            can_delta = (
+                latest is not None
+                and base_content is not None
+                and latest[0] == base_version
+                and latest[1] < self.SNAPSHOT_INTERVAL
+            )
+
+            if can_delta:
+                revision = NoteRevision(
+                    note_id=note_id,
+                    version=version,
+                    kind="delta",
+                    base_version=base_version,
+                    payload=JsonPatchTool.diff(base_content, content),
+                )
+            else:
+                revision = NoteRevision(
+                    note_id=note_id,
+                    version=version,
+                    kind="snapshot",
+                    payload=content,
+                )
+
+            await self.revision_repository.add_revision(revision)
+
+        except Exception as e:
+            # History is best effort, a failure must not fail the save itself
+            logger.error(f"Error recording revision {version} of note {note_id}: {e}")
+
+    async def get_note_at_version(self, note_id: int, version: int) -> Optional[Dict[str, Any]]:
+        """
+        Reconstruct a note's content at a recorded version.
+
+        Args:
+            note_id: ID of the note
+            version: Recorded version to reconstruct
+
+        Returns:
+            Lexical JSON content or None if the version was not recorded
+        """
+        try:
+            chain = await self.revision_repository.get_revision_chain(note_id, version)
+            if not chain or chain[-1].version != version:
+                return None
+
+            content = chain[0].payload
+            for revision in chain[1:]:
+                content = JsonPatchTool.apply(content, revision.payload)
+
+            return content
+
+        except Exception as e:
+            logger.error(f"Error reconstructing note {note_id} at version {version}: {e}")
+            return None
+
+    async def list_revisions(self, note_id: int) -> List[Dict[str, Any]]:
+        """
+        List the recorded versions of a note.
+
+        Args:
+            note_id: ID of the note
+
+        Returns:
+            List of versions, oldest first
+        """
+        try:
+            revisions = await self.revision_repository.get_revisions(note_id)
+
+            return [
+                {
+                    "version": revision.version,
+                    "kind": revision.kind,
+                    "created_at": revision.created_at,
+                }
+                for revision in revisions
+            ]
+
+        except Exception as e:
+            logger.error(f"Error listing revisions for note {note_id}: {e}")
+            return []
+
+    async def compact_revisions(self, note_id: int, keep_recent: int = 50,
+                                merge_every: int = 10) -> int:
+        """
+        Merge old deltas so history older than the recent window costs less.
+
+        Runs of up to ``merge_every`` consecutive deltas older than the
+        ``keep_recent`` newest revisions are folded into one delta. Edits
+        that overwrite each other collapse, and only the last version of each
+        run stays reconstructable. Snapshots are kept as they are.
+
+        Args:
+            note_id: ID of the note
+            keep_recent: Number of newest revisions left untouched
+            merge_every: Maximum number of deltas folded into one
+
+        Returns:
+            Number of revisions removed
+        """
+        revisions = await self.revision_repository.get_revisions(note_id, include_payload=True)
+        if len(revisions) <= keep_recent:
+            return 0
+
+        cutoff = revisions[-keep_recent].version if keep_recent else revisions[-1].version + 1
+        removed = 0
+        content: Any = None
+        run: List[NoteRevision] = []
+        run_base: Any = None
+
+        async def merge_run() -> int:
+            if len(run) < 2:
+                return 0
+            merged = NoteRevision(
+                note_id=note_id,
+                version=run[-1].version,
+                kind="delta",
+                base_version=run[0].base_version,
+                payload=JsonPatchTool.diff(run_base, content),
+                created_at=run[-1].created_at,
+            )
+            await self.revision_repository.replace_deltas(
+                note_id, [revision.version for revision in run], merged
+            )
+            return len(run) - 1
+
+        for revision in revisions:
+            if revision.version >= cutoff:
+                break
+
+            if revision.kind == "snapshot":
+                removed += await merge_run()
+                run = []
+                content = revision.payload
+                continue
+
+            if not run:
+                run_base = content
+            content = JsonPatchTool.apply(content, revision.payload)
+            run.append(revision)
+
+            if len(run) >= merge_every:
+                removed += await merge_run()
+                run = []
+
+        removed += await merge_run()
+
+        logger.info(f"Compacted note {note_id}: removed {removed} revisions")
+        return removed
@@ -1,12 +1,16 @@
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 from datetime import datetime
 
-from src.domain.entities.note import Note
+from src.domain.entities.note import Note, NoteVersionConflictError, ScoredNote
 from src.infrastructure.agents.note_agent import NoteAgent
 from src.infrastructure.agents.video_agent import VideoAgent
 from src.infrastructure.repositories.note_repository import NoteRepository
+from src.infrastructure.repositories.pagination import InvalidCursorError
+from src.infrastructure.services.embedding_service import EmbeddingService
+from src.application.use_cases.note_history import NoteHistoryUseCase
+from src.infrastructure.tools.json_patch_tool import JsonPatchTool, JsonPatchError
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +18,17 @@ logger = logging.getLogger(__name__)
 class NoteManagementUseCase:
     """Use case for note management."""
     
-    def __init__(self, note_repository: NoteRepository):
+    def __init__(self, note_repository: NoteRepository,
+                 note_history: Optional[NoteHistoryUseCase] = None):
         self.note_repository = note_repository
+        self.note_history = note_history
         self.note_agent = NoteAgent
         self.video_agent = VideoAgent
+        self.embedding_service = EmbeddingService
     
     async def save_note(self, video_url: str, content: Dict[str, Any], 
                        timestamp: Optional[int] = None, 
-                       tags: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+                       tags: Optional[List[str]] = None) -> Optional[Note]:
         """
         Save a note for a video.
         
@@ -58,64 +65,61 @@ class NoteManagementUseCase:
             )
             
             # Save to database
-            saved_note = await self.note_repository.save_note(note)
-            
-            return {
-                "id": saved_note.id,
-                "video_url": f"https://youtube.com/watch?v={saved_note.video_id}",
-                "video_id": saved_note.video_id,
-                "content": saved_note.content,
-                "timestamp": saved_note.timestamp,
-                "tags": saved_note.tags,
-                "created_at": saved_note.created_at,
-                "updated_at": saved_note.updated_at,
-            }
+            embedding = self.embedding_service.embed(content_text)
+            saved_note = await self.note_repository.save_note(note, embedding)
+            
+            # The first revision of a note is always a full snapshot
+            if self.note_history:
+                await self.note_history.record_revision(
+                    saved_note.id, saved_note.version, saved_note.content
+                )
+            
+            return saved_note
             
         except Exception as e:
             logger.error(f"Error in save_note use case: {e}")
             return None
     
-    async def get_notes_for_video(self, video_url: str) -> List[Dict[str, Any]]:
+    async def get_notes_for_video(self, video_url: str, limit: int = 100,
+                                  cursor: Optional[str] = None
+                                  ) -> Tuple[List[Note], Optional[str]]:
         """
-        Get all notes for a video.
+        Get a page of notes for a video.
         
         Args:
             video_url: YouTube video URL
+            limit: Maximum number of notes in the page
+            cursor: Cursor returned with the previous page
             
         Returns:
-            List of notes
+            List of notes and the cursor of the next page, if any
+            
+        Raises:
+            InvalidCursorError: If the cursor cannot be decoded
         """
         try:
             # Extract video ID
             video_id = self.video_agent.extract_video_id(video_url)
             if not video_id:
                 logger.error(f"Invalid YouTube URL: {video_url}")
-                return []
+                return [], None
             
             # Get notes from database
-            notes = await self.note_repository.get_notes_by_video_id(video_id)
-            
-            return [
-                {
-                    "id": note.id,
-                    "video_url": f"https://youtube.com/watch?v={note.video_id}",
-                    "video_id": note.video_id,
-                    "content": note.content,
-                    "timestamp": note.timestamp,
-                    "tags": note.tags,
-                    "created_at": note.created_at,
-                    "updated_at": note.updated_at,
-                }
-                for note in notes
-            ]
+            notes, next_cursor = await self.note_repository.get_notes_by_video_id(
+                video_id, limit, cursor
+            )
+            
+            return notes, next_cursor
             
+        except InvalidCursorError:
+            raise
         except Exception as e:
             logger.error(f"Error in get_notes_for_video use case: {e}")
-            return []
+            return [], None
     
     async def update_note(self, note_id: int, content: Dict[str, Any],
                          timestamp: Optional[int] = None,
-                         tags: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+                         tags: Optional[List[str]] = None) -> Optional[Note]:
         """
         Update a note.
         
@@ -129,29 +133,117 @@ class NoteManagementUseCase:
             Updated note or None if an error occurs
         """
         try:
-            # Extract plain text from content
-            content_text = self.note_agent.extract_plain_text(content)
+            # Extract plain text, re-walking only the blocks that changed
+            content_text = self.note_agent.extract_plain_text(content, note_id=note_id)
             
             # Update note in database
-            updated_note = await self.note_repository.update_note(
-                note_id, content, content_text, timestamp, tags
+            embedding = self.embedding_service.embed(content_text)
+            result = await self.note_repository.update_note(
+                note_id, content, content_text, timestamp, tags, embedding
             )
             
-            if not updated_note:
+            if not result:
                 logger.error(f"Note not found: {note_id}")
                 return None
             
-            return {
-                "id": updated_note.id,
-                "video_url": f"https://youtube.com/watch?v={updated_note.video_id}",
-                "video_id": updated_note.video_id,
-                "content": updated_note.content,
-                "timestamp": updated_note.timestamp,
-                "tags": updated_note.tags,
-                "created_at": updated_note.created_at,
-                "updated_at": updated_note.updated_at,
-            }
+            updated_note, previous_version, previous_content = result
+            
+            if self.note_history:
+                await self.note_history.record_revision(
+                    note_id, updated_note.version, updated_note.content,
+                    base_version=previous_version, base_content=previous_content,
+                )
+            
+            return updated_note
             
         except Exception as e:
             logger.error(f"Error in update_note use case: {e}")
             return None
+    
+    async def patch_note(self, note_id: int, operations: List[Dict[str, Any]],
+                        version: int) -> Optional[Note]:
+        """
+        Apply a partial update to a note's content.
+        
+        Args:
+            note_id: ID of the note to update
+            operations: RFC 6902 JSON Patch or Lexical-level operations
+            version: Version of the note the operations were made against
+            
+        Returns:
+            Updated note or None if the note does not exist
+            
+        Raises:
+            JsonPatchError: If the operations are malformed or do not apply
+            NoteVersionConflictError: If the note changed since ``version``
+        """
+        try:
+            patch = JsonPatchTool.normalize(operations)
+            
+            current = await self.note_repository.get_note_by_id(note_id)
+            if not current:
+                logger.error(f"Note not found: {note_id}")
+                return None
+            if current.version != version:
+                raise NoteVersionConflictError(note_id, version)
+            
+            # Applied locally for the plain text, the history and the response;
+            # the database applies the same operations, only they are sent
+            content = JsonPatchTool.apply(current.content, patch)
+            content_text = self.note_agent.extract_plain_text(content, note_id=note_id)
+            text_changed = content_text != current.content_text
+            
+            patched_note = await self.note_repository.patch_note(
+                note_id, patch, version, content,
+                content_text if text_changed else None,
+                self.embedding_service.embed(content_text) if text_changed else None,
+            )
+            
+            if not patched_note:
+                logger.error(f"Note not found: {note_id}")
+                return None
+            
+            if self.note_history:
+                await self.note_history.record_revision(
+                    note_id, patched_note.version, patched_note.content,
+                    base_version=version, base_content=current.content,
+                )
+            
+            return patched_note
+            
+        except (JsonPatchError, NoteVersionConflictError):
+            raise
+        except Exception as e:
+            logger.error(f"Error in patch_note use case: {e}")
+            return None
+    
+    async def search_notes(self, query: str, limit: int = 20,
+                          video_url: Optional[str] = None) -> List[ScoredNote]:
+        """
+        Find notes semantically similar to a query.
+        
+        Args:
+            query: Free-text search query
+            limit: Maximum number of results
+            video_url: Optional YouTube video URL to restrict the search to
+            
+        Returns:
+            Matching notes with their similarity score, best first
+        """
+        try:
+            video_id = None
+            if video_url:
+                video_id = self.video_agent.extract_video_id(video_url)
+                if not video_id:
+                    logger.error(f"Invalid YouTube URL: {video_url}")
+                    return []
+            
+            embedding = self.embedding_service.embed(query)
+            if not any(embedding):
+                return []
+            
+            return await self.note_repository.search_notes(embedding, limit, video_id)
+            
+        except Exception as e:
+            logger.error(f"Error in search_notes use case: {e}")
+            return []
@@ -1,10 +1,15 @@
 
 from typing import Dict, Any, Optional, List
+import asyncio
 import logging
 import uuid
+from functools import partial
 
-from src.domain.entities.video import Video
+from src.application.use_cases.download_tracking import DownloadTrackingUseCase
+from src.domain.entities.transcript import Transcript
+from src.domain.entities.video import Video, VideoFormats
 from src.infrastructure.agents.video_agent import VideoAgent
+from src.infrastructure.repositories.transcript_repository import TranscriptRepository
 from src.infrastructure.repositories.video_repository import VideoRepository
 from src.presentation.websocket import WebSocketManager
 
@@ -14,11 +19,15 @@ logger = logging.getLogger(__name__)
 class YoutubeAnalysisUseCase:
     """Use case for YouTube video analysis."""
     
-    def __init__(self, video_repository: VideoRepository):
+    def __init__(self, video_repository: VideoRepository,
+                 download_tracking: Optional[DownloadTrackingUseCase] = None,
+                 transcript_repository: Optional[TranscriptRepository] = None):
         self.video_repository = video_repository
+        self.download_tracking = download_tracking
+        self.transcript_repository = transcript_repository or TranscriptRepository()
         self.video_agent = VideoAgent
     
-    async def get_video_metadata(self, url: str) -> Optional[Dict[str, Any]]:
+    async def get_video_metadata(self, url: str) -> Optional[Video]:
         """
         Get metadata for a YouTube video.
         
@@ -26,7 +35,7 @@ class YoutubeAnalysisUseCase:
             url: YouTube video URL
             
         Returns:
-            Video metadata or None if an error occurs
+            Stored video or None if an error occurs
         """
         try:
             # Extract video ID
@@ -38,15 +47,7 @@ class YoutubeAnalysisUseCase:
             # Check if we already have this video in the database
             existing_video = await self.video_repository.get_video_by_id(video_id)
             if existing_video:
-                return {
-                    "platform": existing_video.platform,
-                    "video_id": existing_video.video_id,
-                    "title": existing_video.title,
-                    "thumbnail": existing_video.thumbnail,
-                    "duration": existing_video.duration,
-                    "upload_date": existing_video.upload_date,
-                    "channel": existing_video.channel,
-                }
+                return existing_video
             
             # Fetch metadata from YouTube
             metadata = await self.video_agent.get_video_metadata(url)
@@ -65,17 +66,7 @@ class YoutubeAnalysisUseCase:
                 channel=metadata["channel"],
             )
             
-            saved_video = await self.video_repository.save_video(video)
-            
-            return {
-                "platform": saved_video.platform,
-                "video_id": saved_video.video_id,
-                "title": saved_video.title,
-                "thumbnail": saved_video.thumbnail,
-                "duration": saved_video.duration,
-                "upload_date": saved_video.upload_date,
-                "channel": saved_video.channel,
-            }
+            return await self.video_repository.save_video(video)
             
         except Exception as e:
             logger.error(f"Error in get_video_metadata use case for {url}: {e}")
@@ -158,15 +149,49 @@ class YoutubeAnalysisUseCase:
             logger.error(f"Error in get_video_transcript use case for {url}: {e}")
             return None
     
-    async def get_video_formats(self, url: str) -> Optional[Dict[str, Any]]:
+    async def get_transcript(self, video_id: str, language: str = "en") -> Optional[Transcript]:
+        """
+        Get transcript for a YouTube video by its ID.
+        
+        Transcripts are fetched from YouTube once and then served from the
+        database.
+        
+        Args:
+            video_id: YouTube video ID
+            language: Language code
+            
+        Returns:
+            Stored transcript or None if not available
+        """
+        try:
+            transcript = await self.transcript_repository.get_transcript(video_id, language)
+            if transcript:
+                return transcript
+            
+            segments = await self.video_agent.get_transcript_segments(video_id, language)
+            if not segments:
+                return None
+            
+            return await self.transcript_repository.save_transcript(
+                Transcript(video_id=video_id, language=language, segments=segments)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in get_transcript use case for {video_id}: {e}")
+            return None
+    
+    async def get_video_formats(self, url: str) -> Optional[VideoFormats]:
         """
         Get available formats for a YouTube video.
         
+        Formats are fetched from YouTube once and then served from the
+        video's row.
+        
         Args:
             url: YouTube video URL
             
         Returns:
-            Dictionary with available formats or None if an error occurs
+            Stored formats or None if an error occurs
         """
         try:
             # Extract video ID
@@ -175,14 +200,35 @@ class YoutubeAnalysisUseCase:
                 logger.error(f"Invalid YouTube URL: {url}")
                 return None
             
-            # Get available formats
+            stored_formats = await self.video_repository.get_formats(video_id)
+            if stored_formats:
+                return stored_formats
+            
+            # Get available formats, stored on the video's row
             formats_info = await self.video_agent.get_available_formats(url)
-            return formats_info
+            if not formats_info or not await self.get_video_metadata(url):
+                return None
+            
+            return await self.video_repository.save_formats(video_id, formats_info["formats"])
             
         except Exception as e:
             logger.error(f"Error getting video formats for {url}: {e}")
             return None
     
+    async def get_video_etag(self, url: str) -> Optional[str]:
+        """Get the hash of a stored video's metadata, without contacting YouTube."""
+        video_id = self.video_agent.extract_video_id(url)
+        return await self.video_repository.get_etag(video_id) if video_id else None
+    
+    async def get_formats_etag(self, url: str) -> Optional[str]:
+        """Get the hash of a video's stored formats, without contacting YouTube."""
+        video_id = self.video_agent.extract_video_id(url)
+        return await self.video_repository.get_formats_etag(video_id) if video_id else None
+    
+    async def get_transcript_etag(self, video_id: str, language: str = "en") -> Optional[str]:
+        """Get the hash of a stored transcript, without reading or fetching it."""
+        return await self.transcript_repository.get_etag(video_id, language)
+    
     async def download_video(
         self, 
         url: str, 
@@ -212,21 +258,51 @@ class YoutubeAnalysisUseCase:
                 logger.error(f"Invalid YouTube URL: {url}")
                 return None
             
-            # Download video
-            download_info = await self.video_agent.download_video(
-                url, 
-                format_type, 
-                resolution if format_type == "mp4" else None
-            )
+            resolution = resolution if format_type == "mp4" else None
+            
+            # Record the download; its row references the stored video
+            download_id = None
+            on_progress = None
+            if self.download_tracking:
+                if not await self.get_video_metadata(url):
+                    return None
+                download_id = await self.download_tracking.start(video_id, format_type, resolution)
+                on_progress = partial(self.download_tracking.progress, download_id)
+            
+            try:
+                # Download video
+                download_info = await self.video_agent.download_video(
+                    url, 
+                    format_type, 
+                    resolution,
+                    on_progress=on_progress,
+                )
+            except asyncio.CancelledError:
+                # Shutdown deadline; the tool has removed the partial files
+                if download_id:
+                    await self.download_tracking.fail(download_id, "Interrupted by server shutdown")
+                raise
+            except Exception as e:
+                if download_id:
+                    await self.download_tracking.fail(download_id, str(e))
+                raise
             
             if not download_info:
                 logger.error(f"Failed to download video {url}")
+                if download_id:
+                    await self.download_tracking.fail(download_id, "Download failed")
                 return None
             
+            if download_id:
+                await self.download_tracking.complete(
+                    download_id, download_info["file_path"], download_info["file_size"]
+                )
+            
             # Generate file URL (in a real app, this would be a proper URL)
             file_url = f"/downloads/{download_info['video_id']}.{format_type}"
             
             return {
+                "download_id": download_id,
                 "file_url": file_url,
                 "title": download_info["title"],
                 "size": download_info["file_size"],
@@ -254,13 +330,13 @@ class YoutubeAnalysisUseCase:
             format_type: Format to download (mp4 or mp3)
             resolution: Video resolution for mp4 (240, 360, 480, 720, 1080)
             task_id: Task ID for tracking progress
-            websocket_manager: WebSocket manager for progress updates
+            websocket_manager: WebSocket manager publishing progress to the task's topic
         """
         try:
             # Get playlist metadata
             playlist_data = await self.get_playlist_metadata(url)
             if not playlist_data:
-                await websocket_manager.broadcast({
+                await websocket_manager.publish(f"task:{task_id}", {
                     "type": "download_error",
                     "data": {
                         "task_id": task_id,
@@ -275,7 +351,7 @@ class YoutubeAnalysisUseCase:
             failed = 0
             
             # Send initial progress update
-            await websocket_manager.broadcast({
+            await websocket_manager.publish(f"task:{task_id}", {
                 "type": "download_progress",
                 "data": {
                     "task_id": task_id,
@@ -302,7 +378,7 @@ class YoutubeAnalysisUseCase:
                         failed += 1
                     
                     # Send progress update
-                    await websocket_manager.broadcast({
+                    await websocket_manager.publish(f"task:{task_id}", {
                         "type": "download_progress",
                         "data": {
                             "task_id": task_id,
@@ -319,7 +395,7 @@ class YoutubeAnalysisUseCase:
                     failed += 1
             
             # Send completion update
-            await websocket_manager.broadcast({
+            await websocket_manager.publish(f"task:{task_id}", {
                 "type": "download_complete",
                 "data": {
                     "task_id": task_id,
@@ -331,7 +407,7 @@ class YoutubeAnalysisUseCase:
             
         except Exception as e:
             logger.error(f"Error in download_playlist use case for {url}: {e}")
-            await websocket_manager.broadcast({
+            await websocket_manager.publish(f"task:{task_id}", {
                 "type": "download_error",
                 "data": {
                     "task_id": task_id,
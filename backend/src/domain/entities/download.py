@@ -2,13 +2,36 @@
 from pydantic import BaseModel, HttpUrl, Field
 from typing import Optional, List
 from datetime import datetime
+from dataclasses import dataclass, fields
 from enum import Enum
 
 class DownloadStatus(str, Enum):
+    QUEUED = "queued"
     COMPLETED = "completed"
     FAILED = "failed"
     IN_PROGRESS = "in_progress"
 
+@dataclass
+class DownloadUpdate:
+    """Pending changes to a stored download. Fields left as None keep their stored value."""
+    
+    download_id: int
+    status: Optional[str] = None
+    bytes_downloaded: Optional[int] = None
+    total_bytes: Optional[int] = None
+    file_path: Optional[str] = None
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    def merge(self, newer: "DownloadUpdate") -> None:
+        """Apply the fields set on a newer update on top of this one."""
+        for field in fields(self):
+            value = getattr(newer, field.name)
+            if value is not None:
+                setattr(self, field.name, value)
+
 class DownloadHistory(BaseModel):
     id: str = Field(..., description="Unique identifier for the download")
     video_id: Optional[str] = Field(None, description="YouTube video ID, if applicable")
@@ -1,10 +1,10 @@
 
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Mapping
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Note:
     """Note entity representing a user note for a video."""
     
@@ -13,6 +13,64 @@ class Note:
     content_text: str  # Plain text extracted from content
     timestamp: Optional[int] = None
     tags: Optional[List[str]] = None
+    version: int = 1
     id: Optional[int] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    
+    @property
+    def video_url(self) -> str:
+        """YouTube URL of the note's video."""
+        return f"https://youtube.com/watch?v={self.video_id}"
+    
+    @classmethod
+    def from_record(cls, row: Mapping[str, Any]) -> "Note":
+        """Build a note from a database row with the columns of the notes table."""
+        return cls(
+            row["video_id"], row["content"], row["content_text"], row["timestamp"], row["tags"],
+            row["version"], row["id"], row["created_at"], row["updated_at"],
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ScoredNote(Note):
+    """Note returned by a search, with its similarity to the query."""
+    
+    score: float = 0.0
+    
+    @classmethod
+    def from_record(cls, row: Mapping[str, Any]) -> "ScoredNote":
+        """Build a search hit from a notes row with an extra score column."""
+        return cls(
+            row["video_id"], row["content"], row["content_text"], row["timestamp"], row["tags"],
+            row["version"], row["id"], row["created_at"], row["updated_at"], row["score"],
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class NoteRevision:
+    """Stored revision of a note, either a full snapshot or a delta."""
+    
+    note_id: int
+    version: int
+    kind: str  # "snapshot" (payload is the content) or "delta" (payload is a JSON Patch)
+    payload: Any
+    base_version: Optional[int] = None  # Version a delta applies to
+    created_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_record(cls, row: Mapping[str, Any]) -> "NoteRevision":
+        """Build a revision from a note_revisions row."""
+        return cls(
+            row["note_id"], row["version"], row["kind"], row["payload"],
+            row["base_version"], row["created_at"],
+        )
+
+
+class NoteVersionConflictError(Exception):
+    """Raised when a note was modified since the version a client edited."""
+    
+    def __init__(self, note_id: int, expected_version: int):
+        super().__init__(f"Note {note_id} is no longer at version {expected_version}")
+        self.note_id = note_id
+        self.expected_version = expected_version
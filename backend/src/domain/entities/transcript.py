@@ -0,0 +1,20 @@
+
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Transcript:
+    """Transcript of a video in one language."""
+    
+    video_id: str
+    language: str
+    segments: List[Dict[str, Any]]  # {"text", "start", "duration"} per caption
+    etag: Optional[str] = None  # Hash of the segments, set by the database
+    created_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_record(cls, row: Mapping[str, Any]) -> "Transcript":
+        """Build a transcript from a database row with the columns of the transcripts table."""
+        return cls(row["video_id"], row["language"], row["segments"], row["etag"], row["created_at"])
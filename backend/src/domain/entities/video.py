@@ -1,10 +1,10 @@
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Mapping, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Video:
     """Video entity representing core video information."""
     
@@ -16,3 +16,27 @@ class Video:
     upload_date: Optional[datetime] = None
     channel: Optional[str] = None
     created_at: Optional[datetime] = None
+    etag: Optional[str] = None  # Hash of the metadata, set by the database
+    
+    @classmethod
+    def from_record(cls, row: Mapping[str, Any]) -> "Video":
+        """Build a video from a database row with the columns of the videos table."""
+        return cls(
+            row["video_id"], row["platform"], row["title"], row["thumbnail"], row["duration"],
+            row["upload_date"], row["channel"], row["created_at"], row["etag"],
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class VideoFormats:
+    """Downloadable formats of a video."""
+    
+    video_id: str
+    title: str
+    formats: List[Dict[str, Any]]
+    etag: str  # Hash of the formats, set by the database
+    
+    @classmethod
+    def from_record(cls, row: Mapping[str, Any]) -> "VideoFormats":
+        """Build formats from a videos row with its title, formats and formats_etag."""
+        return cls(row["video_id"], row["title"], row["formats"], row["formats_etag"])
@@ -1,7 +1,8 @@
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, ForeignKey, ARRAY, CheckConstraint
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.dialects.postgresql import JSONB, BYTEA
+from sqlalchemy.dialects.postgresql import JSONB
+from pgvector.sqlalchemy import Vector
 from sqlalchemy.sql import func
 from typing import List, Optional
 import datetime
@@ -21,6 +22,19 @@ class Video(Base):
     upload_date = Column(DateTime, nullable=True)
     channel = Column(String, nullable=True)
     created_at = Column(DateTime, default=func.now())
+    etag = Column(Text, nullable=True)
+    formats = Column(JSONB, nullable=True)
+    formats_etag = Column(Text, nullable=True)
+
+class Transcript(Base):
+    """Transcript fetched from YouTube, per video and language."""
+    __tablename__ = "transcripts"
+    
+    video_id = Column(String, primary_key=True)
+    language = Column(String, primary_key=True)
+    segments = Column(JSONB, nullable=False)
+    etag = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=func.now())
 
 class Chat(Base):
     """Chat history model."""
@@ -41,19 +55,61 @@ class Note(Base):
     video_id = Column(String, ForeignKey("videos.video_id"), nullable=False)
     content = Column(JSONB, nullable=False)
     content_text = Column(Text, nullable=False)
-    content_embedding = Column(BYTEA, nullable=True)  # For vector search
+    content_embedding = Column(Vector(1536), nullable=True)  # For vector search
     timestamp = Column(Integer, nullable=True)
     tags = Column(ARRAY(String), nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+class NoteRevision(Base):
+    """Note revision model: full snapshots plus JSON Patch deltas."""
+    __tablename__ = "note_revisions"
+    __table_args__ = (
+        CheckConstraint("kind IN ('snapshot', 'delta')", name="ck_note_revisions_kind"),
+    )
+    
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    base_version = Column(Integer, nullable=True)
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
 class Download(Base):
-    """Download history model."""
+    """Download history model, from queued through completed or failed."""
     __tablename__ = "downloads"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'in_progress', 'completed', 'failed')", name="ck_downloads_status"
+        ),
+    )
     
     id = Column(Integer, primary_key=True)
     video_id = Column(String, ForeignKey("videos.video_id"), nullable=False)
     format = Column(String, nullable=False)
-    file_path = Column(String, nullable=False)
-    file_size = Column(Integer, nullable=True)
+    resolution = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="completed", server_default="completed")
+    file_path = Column(String, nullable=True)
+    file_size = Column(BigInteger, nullable=True)
+    bytes_downloaded = Column(BigInteger, nullable=True)
+    total_bytes = Column(BigInteger, nullable=True)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+class UsageRollup(Base):
+    """Usage counters per metric, hourly/daily/all-time bucket and dimension, maintained by triggers."""
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        CheckConstraint("bucket_size IN ('hour', 'day', 'total')", name="ck_usage_rollups_bucket_size"),
+    )
+    
+    metric = Column(String, primary_key=True)
+    bucket_size = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    dimension = Column(String, primary_key=True, default="", server_default="")
+    count = Column(BigInteger, nullable=False, default=0, server_default="0")
+    bytes = Column(BigInteger, nullable=False, default=0, server_default="0")
@@ -4,6 +4,7 @@ import logging
 from typing import Dict, Any, Optional, List
 
 from src.infrastructure.services.groq_service import GroqService
+from src.infrastructure.tools.lexical_tool import LexicalTool
 
 logger = logging.getLogger(__name__)
 
@@ -12,38 +13,22 @@ class NoteAgent:
     """Agent for handling note-related operations."""
     
     @staticmethod
-    def extract_plain_text(content: Dict[str, Any]) -> str:
+    def extract_plain_text(content: Dict[str, Any], note_id: Optional[int] = None) -> str:
         """
         Extract plain text from Lexical JSON content.
         
         Args:
             content: Lexical JSON content
+            note_id: ID of an existing note; when given, only blocks that
+                changed since the note was last extracted are re-walked
             
         Returns:
             Plain text extracted from the content
         """
         try:
-            # Basic extraction of text from Lexical JSON
-            # This is a simplified version and may need to be enhanced
-            # based on the actual structure of Lexical JSON
-            
-            text = ""
-            
-            if not content or not isinstance(content, dict):
-                return text
-                
-            # Process root
-            root = content.get("root", {})
-            
-            # Process children recursively
-            if "children" in root:
-                for child in root["children"]:
-                    if child.get("type") == "paragraph":
-                        for text_node in child.get("children", []):
-                            if text_node.get("type") == "text":
-                                text += text_node.get("text", "") + " "
-            
-            return text.strip()
+            if note_id is not None:
+                return LexicalTool.extract_text_incremental(note_id, content)
+            return LexicalTool.extract_text(content)
             
         except Exception as e:
             logger.error(f"Error extracting plain text from Lexical JSON: {e}")
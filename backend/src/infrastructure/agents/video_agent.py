@@ -3,7 +3,7 @@ import logging
 from typing import Dict, Any, Optional, List
 from urllib.parse import urlparse, parse_qs
 
-from src.infrastructure.tools.download_tool import DownloadTool
+from src.infrastructure.tools.download_tool import DownloadTool, ProgressCallback
 from src.infrastructure.tools.transcript_tool import TranscriptTool
 
 logger = logging.getLogger(__name__)
@@ -201,7 +201,8 @@ class VideoAgent:
         cls, 
         url: str, 
         format_type: str = "mp4", 
-        resolution: Optional[str] = None
+        resolution: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Download a YouTube video.
@@ -210,6 +211,7 @@ class VideoAgent:
             url: YouTube video URL
             format_type: Format to download (mp4 or mp3)
             resolution: Video resolution for mp4 (240, 360, 480, 720, 1080)
+            on_progress: Called with the bytes downloaded so far and the expected total
             
         Returns:
             Download information or None if an error occurs
@@ -220,7 +222,7 @@ class VideoAgent:
                 logger.error(f"Invalid YouTube URL: {url}")
                 return None
                 
-            download_info = await DownloadTool.download_video(url, format_type, resolution)
+            download_info = await DownloadTool.download_video(url, format_type, resolution, on_progress)
             return download_info
             
         except Exception as e:
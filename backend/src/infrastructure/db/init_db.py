@@ -2,7 +2,7 @@
 import asyncio
 import logging
 from sqlalchemy_utils import database_exists, create_database
-from src.infrastructure.db.connection import get_db_url, engine
+from src.infrastructure.db.connection import get_db_url, get_engine
 from src.domain.models import Base
 
 logger = logging.getLogger(__name__)
@@ -20,7 +20,7 @@ def init_database():
             logger.info("Database already exists")
         
         # Create tables
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=get_engine())
         logger.info("Database tables created")
         
         return True
@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 # SQL to create tables
 CREATE_TABLES = """
+-- pgvector provides the vector type for note embeddings
+CREATE EXTENSION IF NOT EXISTS vector;
+
 -- Create videos table
 CREATE TABLE IF NOT EXISTS videos (
     id SERIAL PRIMARY KEY,
@@ -20,6 +23,47 @@ CREATE TABLE IF NOT EXISTS videos (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Content hashes served as ETags, added after the table was created
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS etag TEXT;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS formats JSONB;
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS formats_etag TEXT;
+
+-- Rehash the metadata on every write, so the ETag changes with the content
+CREATE OR REPLACE FUNCTION video_etag() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.etag := md5(jsonb_build_array(
+        NEW.platform, NEW.title, NEW.thumbnail, NEW.duration, NEW.upload_date, NEW.channel
+    )::text);
+    RETURN NEW;
+END
+$$;
+CREATE OR REPLACE TRIGGER videos_etag BEFORE INSERT OR UPDATE OF platform, title, thumbnail, duration, upload_date, channel
+    ON videos FOR EACH ROW EXECUTE FUNCTION video_etag();
+UPDATE videos SET title = title WHERE etag IS NULL;
+
+-- Lets the history and download joins read title and thumbnail from the index
+CREATE UNIQUE INDEX IF NOT EXISTS ix_videos_video_id_covering
+    ON videos (video_id) INCLUDE (title, thumbnail);
+
+-- Transcripts fetched from YouTube, once per video and language
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    segments JSONB NOT NULL,
+    etag TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (video_id, language)
+);
+
+-- Token buckets of the rate limiter when shared by the workers; unlogged since
+-- losing them only resets the limits
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_updated_at ON rate_limit_buckets (updated_at);
+
 -- Create chats table
 CREATE TABLE IF NOT EXISTS chats (
     id SERIAL PRIMARY KEY,
@@ -40,21 +84,254 @@ CREATE TABLE IF NOT EXISTS notes (
     content_embedding vector(1536),
     timestamp INTEGER,
     tags TEXT[],
+    version INTEGER NOT NULL DEFAULT 1,
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW(),
     CONSTRAINT fk_video_id FOREIGN KEY(video_id) REFERENCES videos(video_id)
 );
 
+-- Add version column to notes created before optimistic concurrency
+ALTER TABLE notes ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+-- Approximate nearest neighbour index for semantic note search
+CREATE INDEX IF NOT EXISTS ix_notes_content_embedding_hnsw
+    ON notes USING hnsw (content_embedding vector_cosine_ops);
+
+-- Create note revisions table
+CREATE TABLE IF NOT EXISTS note_revisions (
+    note_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('snapshot', 'delta')),
+    base_version INTEGER,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (note_id, version),
+    CONSTRAINT fk_note_id FOREIGN KEY(note_id) REFERENCES notes(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_note_revisions_snapshots
+    ON note_revisions (note_id, version) WHERE kind = 'snapshot';
+
+-- Composite indexes backing keyset pagination of note lists and history
+CREATE INDEX IF NOT EXISTS ix_notes_video_keyset
+    ON notes (video_id, (COALESCE(timestamp, 2147483647)), created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS ix_notes_updated_at_id
+    ON notes (updated_at DESC, id DESC);
+
 -- Create downloads table
 CREATE TABLE IF NOT EXISTS downloads (
     id SERIAL PRIMARY KEY,
     video_id TEXT NOT NULL,
     format TEXT NOT NULL,
-    file_path TEXT NOT NULL,
-    file_size INTEGER,
+    resolution TEXT,
+    status TEXT NOT NULL DEFAULT 'completed'
+        CONSTRAINT ck_downloads_status CHECK (status IN ('queued', 'in_progress', 'completed', 'failed')),
+    file_path TEXT,
+    file_size BIGINT,
+    bytes_downloaded BIGINT,
+    total_bytes BIGINT,
+    error TEXT,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
     CONSTRAINT fk_video_id FOREIGN KEY(video_id) REFERENCES videos(video_id)
 );
+
+-- Add lifecycle columns to downloads created before they were tracked
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS resolution TEXT;
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'completed'
+    CONSTRAINT ck_downloads_status CHECK (status IN ('queued', 'in_progress', 'completed', 'failed'));
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS bytes_downloaded BIGINT;
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS total_bytes BIGINT;
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS error TEXT;
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS started_at TIMESTAMP;
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS finished_at TIMESTAMP;
+ALTER TABLE downloads ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW();
+DROP INDEX IF EXISTS ix_downloads_created_at_id;
+DROP INDEX IF EXISTS ix_downloads_created_at_id_covering;
+ALTER TABLE downloads ALTER COLUMN file_path DROP NOT NULL;
+ALTER TABLE downloads ALTER COLUMN file_size TYPE BIGINT;
+
+-- Leave room on each page so progress updates stay heap-only (HOT)
+ALTER TABLE downloads SET (fillfactor = 90);
+
+-- Download history pages are index-only scans
+CREATE INDEX IF NOT EXISTS ix_downloads_history
+    ON downloads (created_at DESC, id DESC)
+    INCLUDE (video_id, format, resolution, status, file_path, file_size);
+
+-- Downloads left unfinished by a crash
+CREATE INDEX IF NOT EXISTS ix_downloads_unfinished
+    ON downloads (updated_at) WHERE status IN ('queued', 'in_progress');
+
+-- Usage rollups per metric, bucket (hour, day or all-time total) and dimension
+CREATE TABLE IF NOT EXISTS usage_rollups (
+    metric TEXT NOT NULL,
+    bucket_size TEXT NOT NULL CONSTRAINT ck_usage_rollups_bucket_size CHECK (bucket_size IN ('hour', 'day', 'total')),
+    bucket TIMESTAMP NOT NULL,
+    dimension TEXT NOT NULL DEFAULT '',
+    count BIGINT NOT NULL DEFAULT 0,
+    bytes BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, bucket_size, bucket, dimension)
+);
+
+-- Adds events to the rollups of the given bucket sizes ('hour', 'day', 'total')
+CREATE OR REPLACE FUNCTION record_usage(
+    p_sizes TEXT[], p_metric TEXT[], p_dimension TEXT[], p_at TIMESTAMP[], p_count BIGINT[], p_bytes BIGINT[]
+) RETURNS void LANGUAGE sql AS $$
+    INSERT INTO usage_rollups (metric, bucket_size, bucket, dimension, count, bytes)
+    SELECT e.metric, s.size,
+           CASE WHEN s.size = 'total' THEN TIMESTAMP 'epoch' ELSE date_trunc(s.size, e.at) END,
+           e.dimension, sum(e.count), sum(e.bytes)
+    FROM unnest(p_metric, p_dimension, p_at, p_count, p_bytes) AS e(metric, dimension, at, count, bytes)
+    CROSS JOIN unnest(p_sizes) AS s(size)
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (metric, bucket_size, bucket, dimension) DO UPDATE
+    SET count = usage_rollups.count + EXCLUDED.count,
+        bytes = usage_rollups.bytes + EXCLUDED.bytes
+$$;
+
+-- Downloads are counted once they finish, per format
+CREATE OR REPLACE FUNCTION usage_downloads_finished() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('downloads.' || n.status), array_agg(n.format),
+            array_agg(COALESCE(n.finished_at, n.created_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(CASE WHEN n.status = 'completed' THEN COALESCE(n.file_size, 0) ELSE 0 END)
+        )
+        FROM new_rows n
+        WHERE n.status IN ('completed', 'failed')
+        HAVING count(*) > 0;
+    ELSE
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('downloads.' || n.status), array_agg(n.format),
+            array_agg(COALESCE(n.finished_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(CASE WHEN n.status = 'completed' THEN COALESCE(n.file_size, 0) ELSE 0 END)
+        )
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE n.status IN ('completed', 'failed')
+          AND o.status NOT IN ('completed', 'failed')
+        HAVING count(*) > 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Notes created per bucket, plus current totals overall and per video
+CREATE OR REPLACE FUNCTION usage_notes_changed() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('notes'::text), array_agg(''::text), array_agg(COALESCE(n.created_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM new_rows n
+        HAVING count(*) > 0;
+        PERFORM record_usage(
+            ARRAY['total'],
+            array_agg('notes.video'::text), array_agg(n.video_id), array_agg(NOW()::timestamp),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM new_rows n
+        HAVING count(*) > 0;
+    ELSE
+        PERFORM record_usage(
+            ARRAY['total'],
+            array_agg(m.metric), array_agg(m.dimension), array_agg(NOW()::timestamp),
+            array_agg(-1::bigint), array_agg(0::bigint)
+        )
+        FROM old_rows o
+        CROSS JOIN LATERAL (VALUES ('notes', ''), ('notes.video', o.video_id)) AS m(metric, dimension)
+        HAVING count(*) > 0;
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Chat messages per bucket and language, plus totals per video
+CREATE OR REPLACE FUNCTION usage_chats_inserted() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM record_usage(
+        ARRAY['hour', 'day', 'total'],
+        array_agg('chats'::text), array_agg(COALESCE(n.language, '')),
+        array_agg(COALESCE(n.created_at, NOW()::timestamp)),
+        array_agg(1::bigint), array_agg(0::bigint)
+    )
+    FROM new_rows n
+    HAVING count(*) > 0;
+    PERFORM record_usage(
+        ARRAY['total'],
+        array_agg('chats.video'::text), array_agg(n.video_id), array_agg(NOW()::timestamp),
+        array_agg(1::bigint), array_agg(0::bigint)
+    )
+    FROM new_rows n
+    HAVING count(*) > 0;
+    RETURN NULL;
+END
+$$;
+
+-- Statement-level triggers see every row of a bulk write at once through
+-- transition tables, so a batch becomes one upsert per rollup row
+CREATE OR REPLACE TRIGGER usage_downloads_inserted AFTER INSERT ON downloads
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_downloads_finished();
+CREATE OR REPLACE TRIGGER usage_downloads_updated AFTER UPDATE ON downloads
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_downloads_finished();
+CREATE OR REPLACE TRIGGER usage_notes_inserted AFTER INSERT ON notes
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_notes_changed();
+CREATE OR REPLACE TRIGGER usage_notes_deleted AFTER DELETE ON notes
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_notes_changed();
+CREATE OR REPLACE TRIGGER usage_chats_inserted AFTER INSERT ON chats
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION usage_chats_inserted();
+
+-- Aggregate rows written before the triggers existed
+DO $backfill$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM usage_rollups) THEN
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('downloads.' || status), array_agg(format),
+            array_agg(COALESCE(finished_at, created_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(CASE WHEN status = 'completed' THEN COALESCE(file_size, 0) ELSE 0 END)
+        )
+        FROM downloads WHERE status IN ('completed', 'failed') HAVING count(*) > 0;
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('notes'::text), array_agg(''::text), array_agg(COALESCE(created_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM notes HAVING count(*) > 0;
+        PERFORM record_usage(
+            ARRAY['total'],
+            array_agg('notes.video'::text), array_agg(video_id), array_agg(NOW()::timestamp),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM notes HAVING count(*) > 0;
+        PERFORM record_usage(
+            ARRAY['hour', 'day', 'total'],
+            array_agg('chats'::text), array_agg(COALESCE(language, '')), array_agg(COALESCE(created_at, NOW()::timestamp)),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM chats HAVING count(*) > 0;
+        PERFORM record_usage(
+            ARRAY['total'],
+            array_agg('chats.video'::text), array_agg(video_id), array_agg(NOW()::timestamp),
+            array_agg(1::bigint), array_agg(0::bigint)
+        )
+        FROM chats HAVING count(*) > 0;
+    END IF;
+END
+$backfill$;
 """
 
 async def run_migrations():
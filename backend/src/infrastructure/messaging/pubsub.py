@@ -0,0 +1,214 @@
+
+import asyncio
+import base64
+import itertools
+import logging
+import os
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional
+
+import asyncpg
+import orjson
+
+from ..db.connection import db
+
+logger = logging.getLogger(__name__)
+
+# Delivers a message from another worker: topic, coalesce key and serialized message
+MessageHandler = Callable[[str, Optional[str], str], None]
+
+# NOTIFY channel shared by every worker
+NOTIFY_CHANNEL = "websocket_messages"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more; leave room for the envelope
+MAX_PAYLOAD_BYTES = 7900
+
+
+class PubSub(ABC):
+    """
+    Broker forwarding WebSocket messages between workers.
+
+    Each worker delivers a message to its own subscribers itself and hands it
+    to the broker, which delivers it to the handler of every other worker.
+    """
+
+    @abstractmethod
+    async def start(self, handler: MessageHandler) -> None:
+        """Start receiving messages published by other workers."""
+
+    @abstractmethod
+    async def publish(self, topic: str, key: Optional[str], text: str) -> None:
+        """Forward a message to the other workers."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Send what is still pending and stop receiving."""
+
+
+class LocalPubSub(PubSub):
+    """Broker of a single worker, which has nobody to forward to."""
+
+    async def start(self, handler: MessageHandler) -> None:
+        pass
+
+    async def publish(self, topic: str, key: Optional[str], text: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class PostgresPubSub(PubSub):
+    """
+    Broker over Postgres LISTEN/NOTIFY on the application database.
+
+    Messages published within flush_interval are sent together, packed into
+    as few NOTIFY payloads as fit in MAX_PAYLOAD_BYTES, in one round trip
+    through the pool. Each worker listens on a dedicated connection and skips
+    its own batches, having delivered those messages locally already.
+    """
+
+    def __init__(self, channel: str = NOTIFY_CHANNEL, flush_interval: float = 0.01,
+                 reconnect_delay: float = 1.0):
+        self.channel = channel
+        self.flush_interval = flush_interval
+        self.reconnect_delay = reconnect_delay
+        self.worker_id = uuid.uuid4().hex
+        self.handler: Optional[MessageHandler] = None
+        self.pending: List[bytes] = []
+        self.sent = 0
+        self.received = 0
+        self._sequence = itertools.count()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self._listening = asyncio.Event()
+
+    async def start(self, handler: MessageHandler) -> None:
+        """Listen on a dedicated connection, reconnecting whenever it is lost."""
+        self.handler = handler
+        self._listen_task = asyncio.create_task(self._listen())
+        await self._listening.wait()
+
+    async def publish(self, topic: str, key: Optional[str], text: str) -> None:
+        """Queue a message for the next batch."""
+        if self._listen_task is None:
+            return  # Not started, e.g. the routes are served without the app's lifespan
+        entry = orjson.dumps([topic, key, text])
+        if len(entry) > MAX_PAYLOAD_BYTES:
+            # Large messages such as whole notes are sent compressed
+            entry = orjson.dumps([topic, key, {"z": base64.b64encode(zlib.compress(text.encode())).decode()}])
+            if len(entry) > MAX_PAYLOAD_BYTES:
+                logger.warning(f"Message for {topic} is too large to forward to other workers ({len(entry)} bytes)")
+                return
+
+        self.pending.append(entry)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def close(self) -> None:
+        """Send the pending batch and close the listening connection."""
+        if self._flush_task is not None:
+            await self._flush_task
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            await asyncio.gather(self._listen_task, return_exceptions=True)
+            self._listen_task = None
+
+    async def _flush_later(self) -> None:
+        """Wait for more messages to batch with, then send them."""
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Send the pending messages in one round trip."""
+        entries, self.pending = self.pending, []
+        if not entries:
+            return
+        payloads = self._pack(entries)
+        try:
+            await db.execute("SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload", self.channel, payloads)
+            self.sent += len(entries)
+        except Exception as e:
+            logger.error(f"Failed to forward {len(entries)} WebSocket messages to other workers: {e}")
+
+    def _pack(self, entries: List[bytes]) -> List[str]:
+        """Split entries into payloads below the NOTIFY size limit."""
+        payloads: List[str] = []
+        batch: List[bytes] = []
+        size = 0
+        for entry in entries:
+            if batch and size + len(entry) + 1 > MAX_PAYLOAD_BYTES:
+                payloads.append(self._envelope(batch))
+                batch, size = [], 0
+            batch.append(entry)
+            size += len(entry) + 1
+        payloads.append(self._envelope(batch))
+        return payloads
+
+    def _envelope(self, batch: List[bytes]) -> str:
+        """
+        Wrap a batch with the sending worker and a sequence number.
+
+        The sequence number keeps identical batches apart, which Postgres
+        would otherwise deliver once per transaction.
+        """
+        head = f'{{"w":"{self.worker_id}","s":{next(self._sequence)},"m":['
+        return head + b",".join(batch).decode() + "]}"
+
+    async def _listen(self) -> None:
+        """Keep a connection listening on the channel until closed."""
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            lost = asyncio.Event()
+            try:
+                connection = await db.connect_dedicated()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                logger.info(f"Listening for WebSocket messages of other workers on {self.channel}")
+                self._listening.set()
+                await lost.wait()
+                logger.warning("Lost the connection listening for WebSocket messages, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cannot listen for WebSocket messages of other workers: {e}")
+                # Serve local subscribers meanwhile rather than hold up startup
+                self._listening.set()
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        """Deliver the messages of another worker's batch."""
+        try:
+            batch = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            logger.warning(f"Ignoring malformed notification on {channel}")
+            return
+        if batch.get("w") == self.worker_id:
+            return
+
+        for topic, key, text in batch.get("m", ()):
+            if isinstance(text, dict):
+                text = zlib.decompress(base64.b64decode(text["z"])).decode()
+            self.received += 1
+            self.handler(topic, key, text)
+
+
+def create_pubsub() -> PubSub:
+    """
+    Create the broker selected by WS_PUBSUB_BACKEND.
+
+    "postgres" (the default) lets clients of any worker follow topics
+    published on another one; "local" is enough for a single worker.
+    """
+    backend = os.getenv("WS_PUBSUB_BACKEND", "postgres").lower()
+    if backend == "local":
+        return LocalPubSub()
+    if backend == "postgres":
+        return PostgresPubSub()
+    raise ValueError(f"Unknown WS_PUBSUB_BACKEND {backend!r}, expected 'postgres' or 'local'")
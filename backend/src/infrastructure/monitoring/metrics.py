@@ -0,0 +1,127 @@
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+    multiprocess,
+)
+
+# A *_created series per counter and histogram only adds to the scrape
+disable_created_metrics()
+
+# Label values are fixed in code (services, operations, statement names), never
+# taken from requests, so the number of series stays small
+
+# Calls to yt_dlp, YouTube and Groq take from a fraction of a second to minutes
+EXTERNAL_CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+# Queries and pool waits take from a fraction of a millisecond to seconds
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+EXTERNAL_CALL_SECONDS = Histogram(
+    "yougen_external_call_seconds",
+    "Duration of calls to yt_dlp, the transcript API and Groq",
+    ["service", "operation", "outcome"],
+    buckets=EXTERNAL_CALL_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "yougen_llm_tokens",
+    "Tokens used by LLM completions",
+    ["model", "kind"],
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "yougen_db_query_seconds",
+    "Duration of database queries, by registered statement name",
+    ["statement", "operation"],
+    buckets=DB_BUCKETS,
+)
+
+DB_ACQUIRE_SECONDS = Histogram(
+    "yougen_db_pool_acquire_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool"],
+    buckets=DB_BUCKETS,
+)
+
+WEBSOCKET_CONNECTIONS = Gauge(
+    "yougen_websocket_connections",
+    "Open WebSocket connections",
+    multiprocess_mode="livesum",
+)
+
+WEBSOCKET_QUEUED_MESSAGES = Gauge(
+    "yougen_websocket_queued_messages",
+    "Messages waiting in WebSocket send queues",
+    multiprocess_mode="livesum",
+)
+
+WEBSOCKET_MESSAGES_SENT = Counter(
+    "yougen_websocket_messages_sent",
+    "Messages sent to WebSocket clients",
+)
+
+WEBSOCKET_MESSAGES_DROPPED = Counter(
+    "yougen_websocket_messages_dropped",
+    "Queued progress messages dropped for a newer one because a client fell behind",
+)
+
+WEBSOCKET_EVICTIONS = Counter(
+    "yougen_websocket_evictions",
+    "WebSocket clients disconnected for not keeping up",
+)
+
+
+@contextmanager
+def track_call(service: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to an external service.
+
+    The outcome label is "ok" unless the block raises ("error") or is
+    cancelled ("cancelled"); exceptions are re-raised.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        EXTERNAL_CALL_SECONDS.labels(service, operation, outcome).observe(time.perf_counter() - started)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render the metrics in the Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set, the metrics of every worker sharing
+    that directory are aggregated, so any worker can answer the scrape.
+
+    Returns:
+        Body and content type of the response
+    """
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the aggregated metrics when it exits."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
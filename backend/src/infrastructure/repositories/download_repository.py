@@ -0,0 +1,70 @@
+from typing import List, Optional
+from src.domain.entities.download import DownloadStatus, DownloadUpdate
+from src.infrastructure.db.connection import db
+
+# Applies a batch of buffered updates in one round trip. Finished downloads are
+# never moved back by a late progress update.
+APPLY_DOWNLOAD_UPDATES = db.statement("downloads.apply_updates", """
+    UPDATE downloads AS d SET
+        status = COALESCE(u.status, d.status),
+        bytes_downloaded = COALESCE(u.bytes_downloaded, d.bytes_downloaded),
+        total_bytes = COALESCE(u.total_bytes, d.total_bytes),
+        file_path = COALESCE(u.file_path, d.file_path),
+        file_size = COALESCE(u.file_size, d.file_size),
+        error = COALESCE(u.error, d.error),
+        started_at = COALESCE(d.started_at, u.started_at),
+        finished_at = COALESCE(u.finished_at, d.finished_at),
+        updated_at = NOW()
+    FROM unnest($1::int[], $2::text[], $3::bigint[], $4::bigint[], $5::text[],
+                $6::bigint[], $7::text[], $8::timestamp[], $9::timestamp[])
+        AS u(id, status, bytes_downloaded, total_bytes, file_path,
+             file_size, error, started_at, finished_at)
+    WHERE d.id = u.id
+      AND d.status NOT IN ('completed', 'failed')
+""")
+
+
+class DownloadRepository:
+    """Repository for download data."""
+
+    async def create_download(self, video_id: str, format_type: str,
+                              resolution: Optional[str] = None) -> int:
+        """Record a queued download and return its ID."""
+        query = """
+        INSERT INTO downloads (video_id, format, resolution, status)
+        VALUES ($1, $2, $3, $4)
+        RETURNING id
+        """
+
+        row = await db.fetchone(query, video_id, format_type, resolution, DownloadStatus.QUEUED.value)
+        return row["id"]
+
+    async def apply_updates(self, updates: List[DownloadUpdate]) -> None:
+        """Write several download updates with a single statement."""
+        if not updates:
+            return
+
+        await db.execute(
+            APPLY_DOWNLOAD_UPDATES,
+            [u.download_id for u in updates],
+            [u.status for u in updates],
+            [u.bytes_downloaded for u in updates],
+            [u.total_bytes for u in updates],
+            [u.file_path for u in updates],
+            [u.file_size for u in updates],
+            [u.error for u in updates],
+            [u.started_at for u in updates],
+            [u.finished_at for u in updates],
+        )
+
+    async def fail_stale_downloads(self, stale_seconds: float, error: str) -> int:
+        """Mark queued or running downloads without updates for a while as failed."""
+        query = """
+        UPDATE downloads
+        SET status = 'failed', error = $2, finished_at = NOW(), updated_at = NOW()
+        WHERE status IN ('queued', 'in_progress')
+          AND updated_at < NOW() - make_interval(secs => $1)
+        """
+
+        result = await db.execute(query, stale_seconds, error)
+        return int(result.split()[-1])
@@ -1,169 +1,180 @@
 
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
 
-from ...domain.models import Note, Video, Download
-from ...domain.entities.note import Note as NoteEntity
-from ..db.connection import db_session
+from ..db.connection import db
+from .pagination import decode_cursor, next_cursor
+
+# Hot queries, prepared once per pooled connection. First and following pages
+# are separate statements so generic plans keep the keyset as an index condition.
+NOTE_HISTORY_COLUMNS = """
+    SELECT n.id, n.content_text, n.created_at, n.updated_at, v.video_id, v.title
+    FROM notes n
+    JOIN videos v ON n.video_id = v.video_id
+"""
+
+LIST_NOTE_HISTORY = db.statement("history.list_notes", NOTE_HISTORY_COLUMNS + """
+    ORDER BY n.updated_at DESC, n.id DESC
+    LIMIT $1
+""")
+
+LIST_NOTE_HISTORY_AFTER = db.statement("history.list_notes_after", NOTE_HISTORY_COLUMNS + """
+    WHERE (n.updated_at, n.id) < ($1, $2)
+    ORDER BY n.updated_at DESC, n.id DESC
+    LIMIT $3
+""")
+
+# Only reads columns of ix_downloads_history and ix_videos_video_id_covering
+DOWNLOAD_HISTORY_COLUMNS = """
+    SELECT d.id, d.format, d.resolution, d.status, d.file_path, d.file_size, d.created_at,
+           v.video_id, v.title, v.thumbnail
+    FROM downloads d
+    JOIN videos v ON d.video_id = v.video_id
+"""
+
+LIST_DOWNLOAD_HISTORY = db.statement("history.list_downloads", DOWNLOAD_HISTORY_COLUMNS + """
+    ORDER BY d.created_at DESC, d.id DESC
+    LIMIT $1
+""")
+
+LIST_DOWNLOAD_HISTORY_AFTER = db.statement("history.list_downloads_after", DOWNLOAD_HISTORY_COLUMNS + """
+    WHERE (d.created_at, d.id) < ($1, $2)
+    ORDER BY d.created_at DESC, d.id DESC
+    LIMIT $3
+""")
 
 
 class HistoryRepository:
     """Repository for history operations."""
-    
+
     @staticmethod
-    def get_user_history(limit: int = 50) -> List[Dict[str, Any]]:
-        """Get user's history of note activities."""
-        session = db_session()
-        try:
-            # Get notes with related video info
-            history = (
-                session.query(
-                    Note.id,
-                    Note.content_text,
-                    Note.created_at,
-                    Note.updated_at,
-                    Video.video_id,
-                    Video.title
-                )
-                .join(Video, Note.video_id == Video.video_id)
-                .order_by(desc(Note.updated_at))
-                .limit(limit)
-                .all()
+    async def get_user_history(limit: int = 50,
+                               cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get a page of the user's history of note activities and the next page's cursor."""
+        # Get notes with related video info, fetching one extra row to know
+        # whether another page exists
+        if cursor:
+            updated_at, note_id = decode_cursor(cursor, (datetime, int))
+            history = await db.fetch(
+                LIST_NOTE_HISTORY_AFTER, updated_at, note_id, limit + 1, raw=True, read_only=True
             )
-            
-            # Convert to list of dicts
-            result = []
-            for h in history:
-                result.append({
-                    "id": h.id,
-                    "content_text": h.content_text,
-                    "video_id": h.video_id,
-                    "title": h.title,
-                    "created_at": h.created_at.isoformat() if h.created_at else None,
-                    "updated_at": h.updated_at.isoformat() if h.updated_at else None,
-                })
-            
-            return result
-        finally:
-            session.close()
-    
+        else:
+            history = await db.fetch(LIST_NOTE_HISTORY, limit + 1, raw=True, read_only=True)
+        page_cursor = next_cursor(history, limit, "updated_at", "id")
+
+        # Convert to list of dicts
+        result = []
+        for h in history[:limit]:
+            result.append({
+                "id": h["id"],
+                "content_text": h["content_text"],
+                "video_id": h["video_id"],
+                "title": h["title"],
+                "created_at": h["created_at"].isoformat() if h["created_at"] else None,
+                "updated_at": h["updated_at"].isoformat() if h["updated_at"] else None,
+            })
+
+        return result, page_cursor
+
     @staticmethod
-    def get_history_detail(history_id: int) -> Optional[Dict[str, Any]]:
+    async def get_history_detail(history_id: int) -> Optional[Dict[str, Any]]:
         """Get details for a specific history item."""
-        session = db_session()
-        try:
-            # Get note with related video info
-            history = (
-                session.query(
-                    Note.id,
-                    Note.content,
-                    Note.content_text,
-                    Note.created_at,
-                    Note.updated_at,
-                    Video.video_id,
-                    Video.title
-                )
-                .join(Video, Note.video_id == Video.video_id)
-                .filter(Note.id == history_id)
-                .first()
-            )
-            
-            if not history:
-                return None
-            
-            # Convert to dict
-            return {
-                "id": history.id,
-                "content": history.content,
-                "content_text": history.content_text,
-                "video_id": history.video_id,
-                "title": history.title,
-                "created_at": history.created_at.isoformat() if history.created_at else None,
-                "updated_at": history.updated_at.isoformat() if history.updated_at else None,
-            }
-        finally:
-            session.close()
-            
+        # Get note with related video info
+        query = """
+        SELECT n.id, n.content, n.content_text, n.created_at, n.updated_at, v.video_id, v.title
+        FROM notes n
+        JOIN videos v ON n.video_id = v.video_id
+        WHERE n.id = $1
+        """
+
+        history = await db.fetchone(query, history_id, read_only=True)
+
+        if not history:
+            return None
+
+        # Convert to dict
+        return {
+            "id": history["id"],
+            "content": history["content"],
+            "content_text": history["content_text"],
+            "video_id": history["video_id"],
+            "title": history["title"],
+            "created_at": history["created_at"].isoformat() if history["created_at"] else None,
+            "updated_at": history["updated_at"].isoformat() if history["updated_at"] else None,
+        }
+
     @staticmethod
-    def get_download_history(limit: int = 50) -> List[Dict[str, Any]]:
-        """Get user's download history."""
-        session = db_session()
-        try:
-            # Get downloads with related video info
-            history = (
-                session.query(
-                    Download.id,
-                    Download.format,
-                    Download.file_path,
-                    Download.file_size,
-                    Download.created_at,
-                    Video.video_id,
-                    Video.title,
-                    Video.thumbnail
-                )
-                .join(Video, Download.video_id == Video.video_id)
-                .order_by(desc(Download.created_at))
-                .limit(limit)
-                .all()
+    async def get_download_history(limit: int = 50,
+                                   cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get a page of the user's download history and the next page's cursor."""
+        # Get downloads with related video info, fetching one extra row to
+        # know whether another page exists
+        if cursor:
+            created_at, download_id = decode_cursor(cursor, (datetime, int))
+            history = await db.fetch(
+                LIST_DOWNLOAD_HISTORY_AFTER, created_at, download_id, limit + 1,
+                raw=True, read_only=True,
             )
-            
-            # Convert to list of dicts
-            result = []
-            for h in history:
-                result.append({
-                    "id": h.id,
-                    "video_id": h.video_id,
-                    "title": h.title,
-                    "thumbnail": h.thumbnail,
-                    "format": h.format,
-                    "file_size": h.file_size,
-                    "file_path": h.file_path,
-                    "status": "completed",  # All entries in the downloads table are completed
-                    "download_date": h.created_at.isoformat() if h.created_at else None,
-                })
-            
-            return result
-        finally:
-            session.close()
-            
+        else:
+            history = await db.fetch(LIST_DOWNLOAD_HISTORY, limit + 1, raw=True, read_only=True)
+        page_cursor = next_cursor(history, limit, "created_at", "id")
+
+        # Convert to list of dicts
+        result = []
+        for h in history[:limit]:
+            result.append({
+                "id": str(h["id"]),  # Convert to string for API consistency
+                "video_id": h["video_id"],
+                "title": h["title"],
+                "thumbnail": h["thumbnail"],
+                "format": h["format"],
+                "resolution": h["resolution"],
+                "file_size": h["file_size"],
+                "file_path": h["file_path"],
+                "status": h["status"],
+                "download_date": h["created_at"].isoformat() if h["created_at"] else None,
+            })
+
+        return result, page_cursor
+
     @staticmethod
-    def get_download_detail(download_id: int) -> Optional[Dict[str, Any]]:
+    async def get_download_detail(download_id: int) -> Optional[Dict[str, Any]]:
         """Get details for a specific download."""
-        session = db_session()
-        try:
-            # Get download with related video info
-            download = (
-                session.query(
-                    Download.id,
-                    Download.format,
-                    Download.file_path,
-                    Download.file_size,
-                    Download.created_at,
-                    Video.video_id,
-                    Video.title,
-                    Video.thumbnail
-                )
-                .join(Video, Download.video_id == Video.video_id)
-                .filter(Download.id == download_id)
-                .first()
-            )
-            
-            if not download:
-                return None
-            
-            # Convert to dict
-            return {
-                "id": str(download.id),  # Convert to string for API consistency
-                "video_id": download.video_id,
-                "title": download.title,
-                "thumbnail": download.thumbnail,
-                "format": download.format,
-                "file_size": download.file_size,
-                "file_path": download.file_path,
-                "status": "completed",  # All entries in the downloads table are completed
-                "download_date": download.created_at.isoformat() if download.created_at else None,
-            }
-        finally:
-            session.close()
+        # Get download with related video info
+        query = """
+        SELECT d.id, d.format, d.resolution, d.status, d.file_path, d.file_size,
+               d.bytes_downloaded, d.total_bytes, d.error,
+               d.created_at, d.started_at, d.finished_at,
+               v.video_id, v.title, v.thumbnail
+        FROM downloads d
+        JOIN videos v ON d.video_id = v.video_id
+        WHERE d.id = $1
+        """
+
+        download = await db.fetchone(query, download_id, read_only=True)
+
+        if not download:
+            return None
+
+        # Convert to dict
+        return {
+            "id": str(download["id"]),  # Convert to string for API consistency
+            "video_id": download["video_id"],
+            "title": download["title"],
+            "thumbnail": download["thumbnail"],
+            "format": download["format"],
+            "resolution": download["resolution"],
+            "file_size": download["file_size"],
+            "file_path": download["file_path"],
+            "status": download["status"],
+            "bytes_downloaded": download["bytes_downloaded"],
+            "total_bytes": download["total_bytes"],
+            "error": download["error"],
+            "download_date": download["created_at"].isoformat() if download["created_at"] else None,
+            "started_at": download["started_at"].isoformat() if download["started_at"] else None,
+            "finished_at": download["finished_at"].isoformat() if download["finished_at"] else None,
+            "duration_seconds": (
+                (download["finished_at"] - download["started_at"]).total_seconds()
+                if download["started_at"] and download["finished_at"] else None
+            ),
+        }
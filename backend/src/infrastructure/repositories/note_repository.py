@@ -1,18 +1,88 @@
-
-from typing import Optional, List, Dict, Any
-from src.domain.entities.note import Note
+import json
+import re
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator
+from datetime import datetime
+from src.domain.entities.note import Note, NoteVersionConflictError, ScoredNote
 from src.infrastructure.db.connection import db
+from src.infrastructure.repositories.pagination import decode_cursor, next_cursor
+from src.infrastructure.tools.json_patch_tool import JsonPatchError, JsonPatchTool
+
+# Sort key standing in for NULL timestamps so untimed notes sort last
+UNTIMED_SORT_KEY = 2147483647
+
+# JSON Pointer tokens Postgres reads as array indexes, and the ones RFC 6901 allows
+INTEGER_TOKEN = re.compile(r"\s*[+-]?[0-9]+\s*")
+ARRAY_INDEX = re.compile(r"0|[1-9][0-9]*")
+
+# Hot queries, prepared once per pooled connection
+GET_NOTE_BY_ID = db.statement("notes.get_by_id", """
+    SELECT id, video_id, content, content_text, timestamp, tags, version, created_at, updated_at
+    FROM notes
+    WHERE id = $1
+""")
+
+# First and following pages are separate statements: a single statement with
+# "$2 IS NULL OR <keyset>" degrades to a filter over every earlier row once
+# Postgres switches the prepared statement to a generic plan
+LIST_NOTES_BY_VIDEO = db.statement("notes.list_by_video", f"""
+    SELECT id, video_id, content, content_text, timestamp, tags, version, created_at, updated_at,
+        COALESCE(timestamp, {UNTIMED_SORT_KEY}) AS sort_ts
+    FROM notes
+    WHERE video_id = $1
+    ORDER BY COALESCE(timestamp, {UNTIMED_SORT_KEY}) ASC, created_at DESC, id DESC
+    LIMIT $2
+""")
+
+LIST_NOTES_BY_VIDEO_AFTER = db.statement("notes.list_by_video_after", f"""
+    SELECT id, video_id, content, content_text, timestamp, tags, version, created_at, updated_at,
+        COALESCE(timestamp, {UNTIMED_SORT_KEY}) AS sort_ts
+    FROM notes
+    WHERE video_id = $1
+      AND COALESCE(timestamp, {UNTIMED_SORT_KEY}) >= $2
+      AND (COALESCE(timestamp, {UNTIMED_SORT_KEY}) > $2 OR (created_at, id) < ($3, $4))
+    ORDER BY COALESCE(timestamp, {UNTIMED_SORT_KEY}) ASC, created_at DESC, id DESC
+    LIMIT $5
+""")
+
+SAVE_CONTENT = db.statement("notes.save_content", """
+    UPDATE notes
+    SET content = $2, content_text = $3, version = $5, content_embedding = $6::vector,
+        updated_at = NOW()
+    WHERE id = $1 AND version = $4
+""")
+
+SEARCH_NOTES = db.statement("notes.search", """
+    SELECT id, video_id, content, content_text, timestamp, tags, version, created_at, updated_at,
+        1 - (content_embedding <=> $1::vector) AS score
+    FROM notes
+    WHERE content_embedding IS NOT NULL
+    ORDER BY content_embedding <=> $1::vector
+    LIMIT $2
+""")
+
+# The HNSW index filters after its ef_search nearest candidates, which can
+# leave fewer than LIMIT rows of one video. A video's notes are found with
+# the btree on video_id instead and ranked exactly: ordering by similarity
+# rather than by distance keeps the planner off the HNSW index
+SEARCH_NOTES_BY_VIDEO = db.statement("notes.search_by_video", """
+    SELECT id, video_id, content, content_text, timestamp, tags, version, created_at, updated_at,
+        1 - (content_embedding <=> $1::vector) AS score
+    FROM notes
+    WHERE video_id = $3 AND content_embedding IS NOT NULL
+    ORDER BY score DESC
+    LIMIT $2
+""")
 
 
 class NoteRepository:
     """Repository for note data."""
     
-    async def save_note(self, note: Note) -> Note:
+    async def save_note(self, note: Note, embedding: Optional[List[float]] = None) -> Note:
         """Save a note to the database."""
         query = """
-        INSERT INTO notes (video_id, content, content_text, timestamp, tags)
-        VALUES ($1, $2, $3, $4, $5)
-        RETURNING id, video_id, content, content_text, timestamp, tags, created_at, updated_at
+        INSERT INTO notes (video_id, content, content_text, timestamp, tags, content_embedding)
+        VALUES ($1, $2, $3, $4, $5, $6::vector)
+        RETURNING id, video_id, content, content_text, timestamp, tags, version, created_at, updated_at
         """
         
         row = await db.fetchone(
@@ -22,71 +92,309 @@ class NoteRepository:
             note.content_text,
             note.timestamp,
             note.tags,
+            self._vector_literal(embedding),
+            raw=True,
         )
         
-        return Note(
-            id=row["id"],
-            video_id=row["video_id"],
-            content=row["content"],
-            content_text=row["content_text"],
-            timestamp=row["timestamp"],
-            tags=row["tags"],
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
-        )
+        return Note.from_record(row)
     
-    async def get_notes_by_video_id(self, video_id: str) -> List[Note]:
-        """Get all notes for a video."""
-        query = """
-        SELECT id, video_id, content, content_text, timestamp, tags, created_at, updated_at
-        FROM notes
-        WHERE video_id = $1
-        ORDER BY timestamp ASC NULLS LAST, created_at DESC
-        """
-        
-        rows = await db.fetch(query, video_id)
-        
-        return [
-            Note(
-                id=row["id"],
-                video_id=row["video_id"],
-                content=row["content"],
-                content_text=row["content_text"],
-                timestamp=row["timestamp"],
-                tags=row["tags"],
-                created_at=row["created_at"],
-                updated_at=row["updated_at"],
+    async def get_notes_by_video_id(self, video_id: str, limit: int = 100,
+                                    cursor: Optional[str] = None) -> Tuple[List[Note], Optional[str]]:
+        """
+        Get a page of notes for a video.
+        
+        Notes are ordered by timestamp (untimed notes last), newest first within
+        a timestamp. Pages are addressed by keyset cursor so every page is an
+        index range scan on ix_notes_video_keyset.
+        
+        Returns:
+            Notes of the page and the cursor of the next page, if any
+        """
+        if cursor:
+            sort_ts, sort_created, sort_id = decode_cursor(cursor, (int, datetime, int))
+            rows = await db.fetch(
+                LIST_NOTES_BY_VIDEO_AFTER, video_id, sort_ts, sort_created, sort_id, limit + 1,
+                raw=True, read_only=True,
             )
-            for row in rows
-        ]
+        else:
+            rows = await db.fetch(LIST_NOTES_BY_VIDEO, video_id, limit + 1, raw=True, read_only=True)
+        
+        notes = [Note.from_record(row) for row in rows[:limit]]
+        
+        return notes, next_cursor(rows, limit, "sort_ts", "created_at", "id")
+    
+    async def get_note_by_id(self, note_id: int) -> Optional[Note]:
+        """Get a note by ID."""
+        row = await db.fetchone(GET_NOTE_BY_ID, note_id, raw=True)
+        
+        if not row:
+            return None
+            
+        return Note.from_record(row)
     
     async def update_note(self, note_id: int, content: Dict[str, Any], content_text: str, 
-                         timestamp: Optional[int], tags: Optional[List[str]]) -> Optional[Note]:
-        """Update a note."""
+                         timestamp: Optional[int], tags: Optional[List[str]],
+                         embedding: Optional[List[float]] = None
+                         ) -> Optional[Tuple[Note, int, Dict[str, Any]]]:
+        """
+        Update a note.
+        
+        Returns:
+            The updated note with the version and content it replaced
+        """
+        # The replaced row is locked and read first, so version and content
+        # describe exactly the row this statement overwrote
         query = """
+        WITH previous AS (
+            SELECT version, content FROM notes WHERE id = $1 FOR UPDATE
+        )
         UPDATE notes
-        SET content = $2, content_text = $3, timestamp = $4, tags = $5, updated_at = NOW()
+        SET content = $2, content_text = $3, timestamp = $4, tags = $5,
+            content_embedding = $6::vector, version = previous.version + 1, updated_at = NOW()
+        FROM previous
         WHERE id = $1
-        RETURNING id, video_id, content, content_text, timestamp, tags, created_at, updated_at
+        RETURNING id, video_id, notes.content, content_text, timestamp, tags, notes.version,
+            created_at, updated_at,
+            previous.version AS previous_version,
+            previous.content AS previous_content
         """
         
         row = await db.fetchone(
-            query, note_id, content, content_text, timestamp, tags
+            query, note_id, content, content_text, timestamp, tags,
+            self._vector_literal(embedding), raw=True,
         )
         
         if not row:
             return None
             
-        return Note(
-            id=row["id"],
-            video_id=row["video_id"],
-            content=row["content"],
-            content_text=row["content_text"],
-            timestamp=row["timestamp"],
-            tags=row["tags"],
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
+        note = Note.from_record(row)
+        
+        return note, row["previous_version"], row["previous_content"]
+    
+    async def patch_note(self, note_id: int, operations: List[Dict[str, Any]], expected_version: int,
+                         patched_content: Dict[str, Any], content_text: Optional[str] = None,
+                         embedding: Optional[List[float]] = None) -> Optional[Note]:
+        """
+        Apply JSON Patch operations to a note's content inside Postgres.
+        
+        Only the operations travel to the database; the document is rewritten
+        server-side with jsonb_set/jsonb_insert, one materialized CTE per
+        operation so each intermediate document is computed once. Every step
+        checks that its target exists and that ``test`` operations hold, so a
+        patch that does not apply leaves the note and its version untouched.
+        Plain text and embedding are written by the same UPDATE, and the
+        document is not sent back.
+        
+        Args:
+            note_id: ID of the note
+            operations: Normalized JSON Patch operations
+            expected_version: Version the operations were made against
+            patched_content: The operations applied locally with
+                JsonPatchTool.apply, returned in the note instead of reading
+                the stored document back
+            content_text: New plain text, or None to keep the stored text
+                and embedding
+            embedding: Embedding of content_text
+        
+        Returns:
+            The patched note, or None if it does not exist
+        
+        Raises:
+            JsonPatchError: If the database rejected an operation
+            NoteVersionConflictError: If the note is not at expected_version
+        """
+        params: List[Any] = [note_id, expected_version]
+        steps = self._compile_patch(operations, params)
+        ctes = ",\n".join(
+            f"patch_{index} AS MATERIALIZED ({step})"
+            for index, step in enumerate(
+                ["SELECT content AS doc FROM notes WHERE id = $1 AND version = $2", *steps]
+            )
+        )
+        
+        assignments = ["content = patched.doc", "version = version + 1", "updated_at = NOW()"]
+        if content_text is not None:
+            params.extend([content_text, self._vector_literal(embedding)])
+            assignments.append(f"content_text = ${len(params) - 1}")
+            assignments.append(f"content_embedding = ${len(params)}::vector")
+        
+        query = f"""
+        WITH {ctes}
+        UPDATE notes
+        SET {", ".join(assignments)}
+        FROM patch_{len(steps)} AS patched
+        WHERE id = $1 AND version = $2
+        RETURNING id, video_id, content_text, timestamp, tags, version, created_at, updated_at
+        """
+        
+        row = await db.fetchone(query, *params, raw=True)
+        
+        if not row:
+            current = await db.fetchone("SELECT version FROM notes WHERE id = $1", note_id)
+            if not current:
+                return None
+            if current["version"] != expected_version:
+                raise NoteVersionConflictError(note_id, expected_version)
+            raise JsonPatchError("Patch does not apply to the note")
+        
+        return Note.from_record({**row, "content": patched_content})
+    
+    async def save_content(self, note_id: int, content: Dict[str, Any], content_text: str,
+                           expected_version: int, new_version: int,
+                           embedding: Optional[List[float]] = None) -> None:
+        """
+        Write coalesced content, moving the note from expected_version to new_version.
+        
+        Raises:
+            NoteVersionConflictError: If the note is not at expected_version
+        """
+        result = await db.execute(
+            SAVE_CONTENT, note_id, content, content_text, expected_version, new_version,
+            self._vector_literal(embedding),
         )
+        if result != "UPDATE 1":
+            raise NoteVersionConflictError(note_id, expected_version)
+    
+    @staticmethod
+    def _compile_patch(operations: List[Dict[str, Any]], params: List[Any]) -> List[str]:
+        """
+        Translate JSON Patch operations into one SELECT per operation.
+        
+        Step N reads the document as ``doc`` from ``patch_{N-1}`` and returns
+        no row unless the operation applies. Paths and values are appended to
+        params and referenced as placeholders, so no user input is
+        interpolated into the SQL.
+        
+        Returns:
+            The SELECT of every step, in order
+        """
+        def param(value: Any, cast: str) -> str:
+            params.append(value)
+            return f"${len(params)}::{cast}"
+        
+        def value(operation: Dict[str, Any]) -> str:
+            # Bound as JSON text: asyncpg sends None as SQL NULL, not JSON null
+            return f"{param(json.dumps(operation['value']), 'text')}::jsonb"
+        
+        def exists(tokens: List[str]) -> str:
+            return f"(doc #> {param(tokens, 'text[]')}) IS NOT NULL"
+        
+        def canonical_indexes(doc: str, tokens: List[str], conditions: List[str]) -> None:
+            # Postgres also reads "01" or "-1" as array indexes; like
+            # JsonPatchTool they may only name object members
+            for position, token in enumerate(tokens):
+                if INTEGER_TOKEN.fullmatch(token) and not ARRAY_INDEX.fullmatch(token):
+                    conditions.append(f"jsonb_typeof({doc} #> {param(tokens[:position], 'text[]')}) = 'object'")
+        
+        def add(doc: str, tokens: List[str], value_expr: str, conditions: List[str]) -> str:
+            if not tokens:
+                return value_expr
+            # Checked against the document the value is added to, after a move's removal
+            parent = f"({doc} #> {param(tokens[:-1], 'text[]')})"
+            last = tokens[-1]
+            # Numeric tokens address arrays: insert before the index like RFC 6902 add
+            if last == "-":
+                conditions.append(f"jsonb_typeof({parent}) = 'array'")
+                return f"jsonb_insert({doc}, {param(tokens[:-1] + ['-1'], 'text[]')}, {value_expr}, true)"
+            if ARRAY_INDEX.fullmatch(last):
+                conditions.append(
+                    f"CASE jsonb_typeof({parent}) "
+                    f"WHEN 'array' THEN jsonb_array_length({parent}) >= {param(int(last), 'int')} "
+                    f"WHEN 'object' THEN NOT {parent} ? {param(last, 'text')} ELSE false END"
+                )
+                return f"jsonb_insert({doc}, {param(tokens, 'text[]')}, {value_expr})"
+            conditions.append(f"jsonb_typeof({parent}) = 'object'")
+            return f"jsonb_set({doc}, {param(tokens, 'text[]')}, {value_expr}, true)"
+        
+        steps: List[str] = []
+        
+        for index, operation in enumerate(operations):
+            op = operation["op"]
+            tokens = JsonPatchTool.parse_pointer(operation["path"])
+            conditions: List[str] = []
+            canonical_indexes("doc", tokens, conditions)
+            
+            if op == "add":
+                expr = add("doc", tokens, value(operation), conditions)
+            elif op == "replace":
+                if not tokens:
+                    expr = value(operation)
+                else:
+                    conditions.append(exists(tokens))
+                    expr = f"jsonb_set(doc, {param(tokens, 'text[]')}, {value(operation)}, false)"
+            elif op == "remove":
+                if not tokens:
+                    raise JsonPatchError("Cannot remove the document root")
+                conditions.append(exists(tokens))
+                expr = f"(doc #- {param(tokens, 'text[]')})"
+            elif op == "copy":
+                from_tokens = JsonPatchTool.parse_pointer(operation["from"])
+                canonical_indexes("doc", from_tokens, conditions)
+                conditions.append(exists(from_tokens))
+                expr = add("doc", tokens, f"(doc #> {param(from_tokens, 'text[]')})", conditions)
+            elif op == "move":
+                from_tokens = JsonPatchTool.parse_pointer(operation["from"])
+                if tokens[:len(from_tokens)] == from_tokens and tokens != from_tokens:
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                canonical_indexes("doc", from_tokens, conditions)
+                from_path = param(from_tokens, "text[]")
+                conditions.append(f"(doc #> {from_path}) IS NOT NULL")
+                expr = add(f"(doc #- {from_path})", tokens, f"(doc #> {from_path})", conditions)
+            else:
+                expr = "doc"
+                conditions.append(f"(doc #> {param(tokens, 'text[]')}) = {value(operation)}")
+            
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            steps.append(f"SELECT {expr} AS doc FROM patch_{index}{where}")
+        
+        return steps
+    
+    async def search_notes(self, embedding: List[float], limit: int = 20,
+                           video_id: Optional[str] = None) -> List[ScoredNote]:
+        """
+        Find the notes closest to an embedding by cosine distance.
+        
+        Served by the HNSW index on content_embedding, so the cost does not
+        grow with the number of notes. Searches within a video rank that
+        video's notes exactly, so they are not cut short by the index.
+        
+        Returns:
+            Notes with their cosine similarity as score, most similar first
+        """
+        vector = self._vector_literal(embedding)
+        if video_id is None:
+            rows = await db.fetch(SEARCH_NOTES, vector, limit, raw=True, read_only=True)
+        else:
+            rows = await db.fetch(SEARCH_NOTES_BY_VIDEO, vector, limit, video_id, raw=True, read_only=True)
+        
+        return [ScoredNote.from_record(row) for row in rows]
+    
+    async def iter_notes_without_embedding(self, batch_size: int) -> AsyncIterator[List[Tuple[int, str]]]:
+        """Stream (id, content_text) of notes missing an embedding in batches, in ID order."""
+        query = """
+        SELECT id, content_text
+        FROM notes
+        WHERE content_embedding IS NULL
+        ORDER BY id ASC
+        """
+        
+        async for rows in db.cursor(query, batch_size=batch_size, raw=True, read_only=True):
+            yield [(row["id"], row["content_text"]) for row in rows]
+    
+    async def update_embeddings(self, embeddings: List[Tuple[int, List[float]]]) -> None:
+        """Store embeddings for several notes in one batch."""
+        async with db.transaction() as conn:
+            await conn.executemany(
+                "UPDATE notes SET content_embedding = $2::vector WHERE id = $1",
+                [(note_id, self._vector_literal(embedding)) for note_id, embedding in embeddings],
+            )
+    
+    @staticmethod
+    def _vector_literal(embedding: Optional[List[float]]) -> Optional[str]:
+        """Format an embedding as a pgvector text literal; empty embeddings are stored as NULL."""
+        if embedding is None or not any(embedding):
+            return None
+        return "[" + ",".join(format(value, ".6g") for value in embedding) + "]"
     
     async def delete_note(self, note_id: int) -> bool:
         """Delete a note."""
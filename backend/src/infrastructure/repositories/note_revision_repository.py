@@ -0,0 +1,109 @@
+from typing import Optional, List, Tuple
+from src.domain.entities.note import NoteRevision
+from src.infrastructure.db.connection import db
+
+
+class NoteRevisionRepository:
+    """Repository for note revision data."""
+
+    async def add_revision(self, revision: NoteRevision) -> None:
+        """Store a revision, ignoring versions that were already recorded."""
+        query = """
+        INSERT INTO note_revisions (note_id, version, kind, base_version, payload)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (note_id, version) DO NOTHING
+        """
+
+        await db.execute(
+            query,
+            revision.note_id,
+            revision.version,
+            revision.kind,
+            revision.base_version,
+            revision.payload,
+        )
+
+    async def get_latest_revision_info(self, note_id: int) -> Optional[Tuple[int, int]]:
+        """Get the latest recorded version and the number of deltas since the last snapshot."""
+        query = """
+        SELECT max(version) AS latest_version,
+               count(*) FILTER (WHERE version > coalesce((
+                   SELECT max(version) FROM note_revisions
+                   WHERE note_id = $1 AND kind = 'snapshot'
+               ), 0)) AS deltas_since_snapshot
+        FROM note_revisions
+        WHERE note_id = $1
+        """
+
+        row = await db.fetchone(query, note_id)
+
+        if not row or row["latest_version"] is None:
+            return None
+
+        return row["latest_version"], row["deltas_since_snapshot"]
+
+    async def get_revision_chain(self, note_id: int, version: int) -> List[NoteRevision]:
+        """Get the latest snapshot at or before a version and the deltas leading up to it."""
+        query = """
+        SELECT note_id, version, kind, base_version, payload, created_at
+        FROM note_revisions
+        WHERE note_id = $1
+          AND version <= $2
+          AND version >= (
+              SELECT max(version) FROM note_revisions
+              WHERE note_id = $1 AND kind = 'snapshot' AND version <= $2
+          )
+        ORDER BY version ASC
+        """
+
+        rows = await db.fetch(query, note_id, version, raw=True, read_only=True)
+
+        return [NoteRevision.from_record(row) for row in rows]
+
+    async def get_revisions(self, note_id: int, include_payload: bool = False) -> List[NoteRevision]:
+        """Get all revisions of a note, oldest first."""
+        payload = "payload" if include_payload else "NULL AS payload"
+        query = f"""
+        SELECT note_id, version, kind, base_version, {payload}, created_at
+        FROM note_revisions
+        WHERE note_id = $1
+        ORDER BY version ASC
+        """
+
+        # Payloads are only read by compaction, which rewrites them, so it reads the primary
+        rows = await db.fetch(query, note_id, raw=True, read_only=not include_payload)
+
+        return [NoteRevision.from_record(row) for row in rows]
+
+    async def replace_deltas(self, note_id: int, versions: List[int], merged: NoteRevision) -> None:
+        """Atomically replace a run of deltas with a single merged delta."""
+        async with db.transaction() as conn:
+            await conn.execute(
+                "DELETE FROM note_revisions WHERE note_id = $1 AND version = ANY($2::int[])",
+                note_id,
+                versions,
+            )
+            await conn.execute(
+                """
+                INSERT INTO note_revisions (note_id, version, kind, base_version, payload, created_at)
+                VALUES ($1, $2, $3, $4, $5, COALESCE($6, NOW()))
+                """,
+                merged.note_id,
+                merged.version,
+                merged.kind,
+                merged.base_version,
+                merged.payload,
+                merged.created_at,
+            )
+
+    async def get_note_ids_with_revisions(self, min_revisions: int) -> List[int]:
+        """Get IDs of notes that have at least the given number of revisions."""
+        query = """
+        SELECT note_id
+        FROM note_revisions
+        GROUP BY note_id
+        HAVING count(*) >= $1
+        """
+
+        rows = await db.fetch(query, min_revisions)
+        return [row["note_id"] for row in rows]
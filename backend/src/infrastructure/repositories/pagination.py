@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque cursor.
+
+    Args:
+        values: Sort key values, e.g. (updated_at, id)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page
+        types: Expected type of each sort key value (datetime, int or str)
+
+    Returns:
+        Sort key values converted to the expected types
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("unexpected cursor shape")
+
+        values = []
+        for value, expected in zip(payload, types):
+            if expected is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif expected is int:
+                if isinstance(value, bool) or not isinstance(value, int):
+                    raise ValueError("expected an integer")
+                values.append(value)
+            else:
+                values.append(expected(value))
+        return values
+
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+def next_cursor(rows: List[Any], limit: int, *key: str) -> Optional[str]:
+    """
+    Build the cursor for the page after rows, fetched with limit + 1.
+
+    Args:
+        rows: Rows of the current page including the extra look-ahead row
+        limit: Page size
+        key: Names of the sort key fields of a row
+
+    Returns:
+        Cursor for the next page or None if this is the last page
+    """
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(*(last[name] for name in key))
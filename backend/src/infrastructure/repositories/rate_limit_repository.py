@@ -0,0 +1,33 @@
+
+from src.infrastructure.db.connection import db
+
+# Refills a bucket for the time since its last token was taken and takes one
+# if a whole token is left. The refill is computed on the locked row, so
+# concurrent workers cannot spend the same token; an empty bucket is left
+# untouched and no row is returned.
+TAKE_TOKEN = db.statement("rate_limit.take_token", """
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES ($1, $3::float8 - 1, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = LEAST($3::float8, b.tokens + extract(epoch FROM clock_timestamp() - b.updated_at)::float8 * $2::float8) - 1,
+        updated_at = clock_timestamp()
+    WHERE LEAST($3::float8, b.tokens + extract(epoch FROM clock_timestamp() - b.updated_at)::float8 * $2::float8) >= 1
+    RETURNING b.tokens
+""")
+
+# Buckets idle long enough to be full again are the same as missing ones
+PRUNE_BUCKETS = db.statement("rate_limit.prune", """
+    DELETE FROM rate_limit_buckets WHERE updated_at < clock_timestamp() - make_interval(secs => $1)
+""")
+
+
+class RateLimitRepository:
+    """Repository for token buckets shared by the API workers."""
+
+    async def take_token(self, key: str, rate: float, burst: float) -> bool:
+        """Take a token from a bucket refilled at rate tokens per second up to burst; False if it is empty."""
+        return await db.fetchone(TAKE_TOKEN, key, rate, burst, raw=True) is not None
+
+    async def prune(self, idle_seconds: float) -> None:
+        """Delete buckets not used for idle_seconds."""
+        await db.execute(PRUNE_BUCKETS, idle_seconds)
@@ -0,0 +1,111 @@
+
+from typing import List, Dict, Any
+from datetime import datetime
+
+from ..db.connection import db
+
+# usage_rollups is kept up to date by triggers on downloads, notes and chats,
+# so every statistic is a primary key lookup or a short range scan
+ALL_TIME = datetime(1970, 1, 1)
+
+SUMMARY_METRICS = ["downloads.completed", "downloads.failed", "notes", "chats"]
+
+# Metrics with hourly and daily buckets, by the dimension they are split on
+SERIES_METRICS = {
+    "downloads.completed": "format",
+    "downloads.failed": "format",
+    "notes": None,
+    "chats": "language",
+}
+
+GET_TOTALS = db.statement("stats.totals", """
+    SELECT metric, dimension, count, bytes
+    FROM usage_rollups
+    WHERE metric = ANY($1::text[]) AND bucket_size = 'total' AND bucket = $2
+""")
+
+# The last $3 buckets, one row each when empty so charts get an evenly spaced series.
+# They are taken from the database clock, which the triggers bucket events by too.
+GET_SERIES = db.statement("stats.series", """
+    WITH buckets AS (
+        SELECT generate_series(
+            date_trunc($2, NOW()::timestamp) - ($3::int - 1) * ('1 ' || $2)::interval,
+            date_trunc($2, NOW()::timestamp),
+            ('1 ' || $2)::interval
+        ) AS bucket
+    )
+    SELECT b.bucket, r.dimension, r.count, r.bytes
+    FROM buckets AS b
+    LEFT JOIN usage_rollups AS r
+        ON r.metric = $1 AND r.bucket_size = $2 AND r.bucket = b.bucket
+    ORDER BY b.bucket, r.dimension
+""")
+
+
+class StatsRepository:
+    """Repository for pre-aggregated usage statistics."""
+
+    @staticmethod
+    async def get_summary() -> Dict[str, Any]:
+        """Get all-time totals of downloads per format, notes and chats per language."""
+        rows = await db.fetch(GET_TOTALS, SUMMARY_METRICS, ALL_TIME, raw=True, read_only=True)
+
+        downloads: Dict[str, Any] = {"completed": 0, "failed": 0, "bytes": 0, "by_format": {}}
+        notes = {"total": 0}
+        chats: Dict[str, Any] = {"total": 0, "by_language": {}}
+
+        for row in rows:
+            metric, dimension, count = row["metric"], row["dimension"], row["count"]
+            if metric.startswith("downloads."):
+                status = metric.split(".", 1)[1]
+                by_format = downloads["by_format"].setdefault(
+                    dimension, {"completed": 0, "failed": 0, "bytes": 0}
+                )
+                by_format[status] = count
+                by_format["bytes"] += row["bytes"]
+                downloads[status] += count
+                downloads["bytes"] += row["bytes"]
+            elif metric == "notes":
+                notes["total"] += count
+            elif metric == "chats":
+                chats["by_language"][dimension or "unknown"] = count
+                chats["total"] += count
+
+        return {"downloads": downloads, "notes": notes, "chats": chats}
+
+    @staticmethod
+    async def get_series(metric: str, bucket_size: str, buckets: int) -> List[Dict[str, Any]]:
+        """Get the hourly or daily values of a metric for the last buckets buckets, oldest first."""
+        rows = await db.fetch(GET_SERIES, metric, bucket_size, buckets, raw=True, read_only=True)
+
+        series: Dict[datetime, Dict[str, Any]] = {}
+        split = SERIES_METRICS.get(metric)
+        for row in rows:
+            point = series.get(row["bucket"])
+            if point is None:
+                point = series[row["bucket"]] = {"bucket": row["bucket"].isoformat(), "count": 0, "bytes": 0}
+            if row["count"] is None:
+                continue
+            point["count"] += row["count"]
+            point["bytes"] += row["bytes"]
+            if split:
+                point.setdefault(f"by_{split}", {})[row["dimension"] or "unknown"] = row["count"]
+
+        return list(series.values())
+
+    @staticmethod
+    async def get_video_stats(video_id: str) -> Dict[str, Any]:
+        """Get the current number of notes and chat messages of a video."""
+        rows = await db.fetch("""
+            SELECT metric, count
+            FROM usage_rollups
+            WHERE metric IN ('notes.video', 'chats.video')
+              AND bucket_size = 'total' AND bucket = $1 AND dimension = $2
+        """, ALL_TIME, video_id, read_only=True)
+
+        counts = {row["metric"]: row["count"] for row in rows}
+        return {
+            "video_id": video_id,
+            "notes": counts.get("notes.video", 0),
+            "chats": counts.get("chats.video", 0),
+        }
@@ -0,0 +1,48 @@
+
+from typing import Optional
+from src.domain.entities.transcript import Transcript
+from src.infrastructure.db.connection import db
+
+
+class TranscriptRepository:
+    """Repository for transcripts fetched from YouTube."""
+    
+    async def save_transcript(self, transcript: Transcript) -> Transcript:
+        """Save a transcript, hashing its segments."""
+        query = """
+        INSERT INTO transcripts (video_id, language, segments, etag)
+        VALUES ($1, $2, $3::jsonb, md5($3::jsonb::text))
+        ON CONFLICT (video_id, language) DO UPDATE SET
+            segments = EXCLUDED.segments,
+            etag = EXCLUDED.etag
+        RETURNING video_id, language, segments, etag, created_at
+        """
+        
+        row = await db.fetchone(
+            query, transcript.video_id, transcript.language, transcript.segments, raw=True
+        )
+        
+        return Transcript.from_record(row)
+    
+    async def get_transcript(self, video_id: str, language: str) -> Optional[Transcript]:
+        """Get a stored transcript."""
+        query = """
+        SELECT video_id, language, segments, etag, created_at
+        FROM transcripts
+        WHERE video_id = $1 AND language = $2
+        """
+        
+        row = await db.fetchone(query, video_id, language, raw=True, read_only=True)
+        
+        if not row:
+            return None
+        
+        return Transcript.from_record(row)
+    
+    async def get_etag(self, video_id: str, language: str) -> Optional[str]:
+        """Get the hash of a stored transcript without reading its segments."""
+        row = await db.fetchone(
+            "SELECT etag FROM transcripts WHERE video_id = $1 AND language = $2",
+            video_id, language, raw=True, read_only=True,
+        )
+        return row["etag"] if row else None
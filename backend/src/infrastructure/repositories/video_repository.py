@@ -1,7 +1,7 @@
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
-from src.domain.entities.video import Video
+from src.domain.entities.video import Video, VideoFormats
 from src.infrastructure.db.connection import db
 
 
@@ -9,7 +9,7 @@ class VideoRepository:
     """Repository for video data."""
     
     async def save_video(self, video: Video) -> Video:
-        """Save a video to the database."""
+        """Save a video to the database; the videos_etag trigger hashes its metadata."""
         query = """
         INSERT INTO videos (video_id, platform, title, thumbnail, duration, upload_date, channel)
         VALUES ($1, $2, $3, $4, $5, $6, $7)
@@ -19,7 +19,7 @@ class VideoRepository:
             duration = $5,
             upload_date = $6,
             channel = $7
-        RETURNING id, video_id, platform, title, thumbnail, duration, upload_date, channel, created_at
+        RETURNING id, video_id, platform, title, thumbnail, duration, upload_date, channel, created_at, etag
         """
         
         row = await db.fetchone(
@@ -31,39 +31,67 @@ class VideoRepository:
             video.duration,
             video.upload_date,
             video.channel,
+            raw=True,
         )
         
-        return Video(
-            video_id=row["video_id"],
-            platform=row["platform"],
-            title=row["title"],
-            thumbnail=row["thumbnail"],
-            duration=row["duration"],
-            upload_date=row["upload_date"],
-            channel=row["channel"],
-            created_at=row["created_at"],
-        )
+        return Video.from_record(row)
     
     async def get_video_by_id(self, video_id: str) -> Optional[Video]:
         """Get a video by ID."""
         query = """
-        SELECT video_id, platform, title, thumbnail, duration, upload_date, channel, created_at
+        SELECT video_id, platform, title, thumbnail, duration, upload_date, channel, created_at, etag
         FROM videos
         WHERE video_id = $1
         """
         
-        row = await db.fetchone(query, video_id)
+        row = await db.fetchone(query, video_id, raw=True, read_only=True)
         
         if not row:
             return None
             
-        return Video(
-            video_id=row["video_id"],
-            platform=row["platform"],
-            title=row["title"],
-            thumbnail=row["thumbnail"],
-            duration=row["duration"],
-            upload_date=row["upload_date"],
-            channel=row["channel"],
-            created_at=row["created_at"],
+        return Video.from_record(row)
+    
+    async def get_etag(self, video_id: str) -> Optional[str]:
+        """Get the hash of a video's metadata."""
+        row = await db.fetchone(
+            "SELECT etag FROM videos WHERE video_id = $1", video_id, raw=True, read_only=True
+        )
+        return row["etag"] if row else None
+    
+    async def get_formats(self, video_id: str) -> Optional[VideoFormats]:
+        """Get the stored formats of a video, if they were fetched before."""
+        query = """
+        SELECT video_id, title, formats, formats_etag
+        FROM videos
+        WHERE video_id = $1 AND formats IS NOT NULL
+        """
+        
+        row = await db.fetchone(query, video_id, raw=True, read_only=True)
+        
+        if not row:
+            return None
+        
+        return VideoFormats.from_record(row)
+    
+    async def get_formats_etag(self, video_id: str) -> Optional[str]:
+        """Get the hash of a video's stored formats."""
+        row = await db.fetchone(
+            "SELECT formats_etag FROM videos WHERE video_id = $1", video_id, raw=True, read_only=True
         )
+        return row["formats_etag"] if row else None
+    
+    async def save_formats(self, video_id: str, formats: List[Dict[str, Any]]) -> Optional[VideoFormats]:
+        """Store the formats of a saved video."""
+        query = """
+        UPDATE videos
+        SET formats = $2::jsonb, formats_etag = md5($2::jsonb::text)
+        WHERE video_id = $1
+        RETURNING video_id, title, formats, formats_etag
+        """
+        
+        row = await db.fetchone(query, video_id, formats, raw=True)
+        
+        if not row:
+            return None
+        
+        return VideoFormats.from_record(row)
@@ -0,0 +1,55 @@
+import math
+import re
+import zlib
+import logging
+from collections import Counter
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+class EmbeddingService:
+    """Service computing note embeddings locally on the CPU."""
+
+    # Matches the notes.content_embedding vector(1536) column
+    DIMENSIONS = 1536
+
+    @classmethod
+    def embed(cls, text: str) -> List[float]:
+        """
+        Embed text with a signed feature-hashing vectorizer.
+
+        Unigrams and bigrams are hashed into DIMENSIONS buckets with a
+        process-independent hash, weighted by sublinear term frequency and
+        L2-normalized so cosine distance works directly on the result.
+
+        Args:
+            text: Plain text to embed
+
+        Returns:
+            Embedding vector (all zeros for text without tokens)
+        """
+        tokens = TOKEN_PATTERN.findall(text.lower()) if text else []
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+        vector = [0.0] * cls.DIMENSIONS
+        for feature, count in features.items():
+            digest = zlib.crc32(feature.encode("utf-8"))
+            # The top bit picks the sign so colliding features tend to cancel out
+            sign = -1.0 if digest & 0x80000000 else 1.0
+            vector[digest % cls.DIMENSIONS] += sign * (1.0 + math.log(count))
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            vector = [value / norm for value in vector]
+
+        return vector
+
+    @classmethod
+    def embed_batch(cls, texts: List[str]) -> List[List[float]]:
+        """Embed several texts."""
+        return [cls.embed(text) for text in texts]
+
@@ -1,19 +1,15 @@
 
 import os
 import logging
-from typing import Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from dotenv import load_dotenv
-from openai import AsyncGroq
 
-load_dotenv()
-logger = logging.getLogger(__name__)
+from src.infrastructure.monitoring.metrics import LLM_TOKENS, track_call
 
-# Initialize Groq client
-groq_api_key = os.getenv("GROQ_API_KEY")
-if not groq_api_key:
-    logger.warning("GROQ_API_KEY not found in environment variables")
+if TYPE_CHECKING:
+    from groq import AsyncGroq
 
-groq_client = AsyncGroq(api_key=groq_api_key)
+logger = logging.getLogger(__name__)
 
 
 class GroqService:
@@ -21,6 +17,33 @@ class GroqService:
     
     MODEL = "llama-3.3-70b-versatile"
     
+    _client: Optional["AsyncGroq"] = None
+    
+    @classmethod
+    def get_client(cls) -> "AsyncGroq":
+        """
+        Get the Groq client, creating it on first use.
+        
+        The SDK is imported only then, so importing the app stays fast; the
+        lifespan warm-up creates the client in the background after startup.
+        """
+        if cls._client is None:
+            from groq import AsyncGroq
+            
+            load_dotenv()
+            api_key = os.getenv("GROQ_API_KEY")
+            if not api_key:
+                logger.warning("GROQ_API_KEY not found in environment variables")
+            cls._client = AsyncGroq(api_key=api_key)
+        return cls._client
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Close the client's HTTP connections, if it was created."""
+        client, cls._client = cls._client, None
+        if client is not None:
+            await client.close()
+    
     @classmethod
     async def chat_completion(
         cls,
@@ -52,12 +75,15 @@ class GroqService:
             messages.append({"role": "user", "content": prompt})
             
             # Call Groq API
-            response = await groq_client.chat.completions.create(
-                model=cls.MODEL,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+            with track_call("groq", "chat_completion"):
+                response = await cls.get_client().chat.completions.create(
+                    model=cls.MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            LLM_TOKENS.labels(cls.MODEL, "prompt").inc(response.usage.prompt_tokens)
+            LLM_TOKENS.labels(cls.MODEL, "completion").inc(response.usage.completion_tokens)
             
             # Extract response content
             response_text = response.choices[0].message.content
@@ -1,18 +1,64 @@
 
 import os
+import glob
+import time
+import asyncio
 import logging
-import yt_dlp
 import subprocess
-from typing import Dict, Any, Optional, Tuple, List
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, Set, Tuple, List, Callable
+
+from src.infrastructure.monitoring.metrics import track_call
 
 logger = logging.getLogger(__name__)
 
+# Called with the bytes downloaded so far and the expected total, if known
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+def load_yt_dlp():
+    """
+    Import yt_dlp on first use.
+
+    Importing it takes longer than the rest of the app together, so it is
+    loaded by the first extraction or by the warm-up after startup.
+    """
+    import yt_dlp
+    return yt_dlp
+
+
+def parse_upload_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Convert yt_dlp's upload date, a "YYYYMMDD" string, to a datetime.
+
+    Returns None if the date is missing or not in that format.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y%m%d")
+    except (TypeError, ValueError):
+        logger.warning(f"Unexpected upload date from yt_dlp: {value!r}")
+        return None
+
+
+class DownloadCancelledError(Exception):
+    """Raised in the yt_dlp thread by the progress hook to stop a cancelled download."""
+
 
 class DownloadTool:
     """Tool for downloading YouTube videos."""
     
     DOWNLOAD_DIR = os.path.join(os.getcwd(), "downloads")
     
+    # Seconds a cancelled download may take to stop before its files are removed;
+    # yt_dlp checks between chunks, but an ffmpeg merge runs to the end
+    ABORT_WAIT_SECONDS = 5.0
+    
+    # Files yt_dlp writes while downloading, renamed or deleted when it is done
+    PARTIAL_FILE_PATTERNS = ("*.part", "*.part-Frag*", "*.ytdl", "*.temp.*")
+    
     @classmethod
     async def get_metadata(cls, video_url: str) -> Optional[Dict[str, Any]]:
         """
@@ -36,9 +82,10 @@ class DownloadTool:
             }
             
             # Extract info using yt-dlp
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with load_yt_dlp().YoutubeDL(ydl_opts) as ydl:
                 # yt_dlp is not async, but we wrap it in an async method
-                info = ydl.extract_info(video_url, download=False)
+                with track_call("yt_dlp", "metadata"):
+                    info = ydl.extract_info(video_url, download=False)
                 
                 # Extract relevant metadata
                 metadata = {
@@ -47,7 +94,7 @@ class DownloadTool:
                     "title": info.get("title"),
                     "thumbnail": info.get("thumbnail"),
                     "duration": info.get("duration"),
-                    "upload_date": info.get("upload_date"),
+                    "upload_date": parse_upload_date(info.get("upload_date")),
                     "channel": info.get("uploader"),
                 }
                 
@@ -78,9 +125,10 @@ class DownloadTool:
             }
             
             # Extract info using yt-dlp
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with load_yt_dlp().YoutubeDL(ydl_opts) as ydl:
                 # yt_dlp is not async, but we wrap it in an async method
-                info = ydl.extract_info(playlist_url, download=False)
+                with track_call("yt_dlp", "playlist"):
+                    info = ydl.extract_info(playlist_url, download=False)
                 
                 if not info:
                     logger.error(f"Failed to extract playlist info for {playlist_url}")
@@ -111,7 +159,7 @@ class DownloadTool:
                         "title": entry.get("title"),
                         "thumbnail": entry.get("thumbnail"),
                         "duration": entry.get("duration"),
-                        "upload_date": entry.get("upload_date"),
+                        "upload_date": parse_upload_date(entry.get("upload_date")),
                         "channel": entry.get("uploader"),
                     }
                     
@@ -144,8 +192,9 @@ class DownloadTool:
             }
             
             # Extract info using yt-dlp
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
+            with load_yt_dlp().YoutubeDL(ydl_opts) as ydl:
+                with track_call("yt_dlp", "formats"):
+                    info = ydl.extract_info(video_url, download=False)
                 
                 if not info:
                     logger.error(f"Failed to extract format info for {video_url}")
@@ -187,14 +236,21 @@ class DownloadTool:
             return None
     
     @classmethod
-    async def download_video(cls, video_url: str, format_type: str = "mp4", resolution: str = "720") -> Optional[Dict[str, Any]]:
+    async def download_video(cls, video_url: str, format_type: str = "mp4", resolution: str = "720",
+                             on_progress: Optional[ProgressCallback] = None) -> Optional[Dict[str, Any]]:
         """
         Download a YouTube video.
         
+        The download runs in a worker thread so the event loop keeps serving
+        requests; progress is reported back on the loop. If the download fails
+        or the calling task is cancelled, e.g. at the shutdown deadline, the
+        thread is stopped and the partial files it wrote are removed.
+        
         Args:
             video_url: YouTube video URL
             format_type: Format to download (mp4 or mp3)
             resolution: Video resolution for mp4 (240, 360, 480, 720, 1080)
+            on_progress: Called on the event loop as bytes arrive
             
         Returns:
             Download information or None if an error occurs
@@ -202,6 +258,8 @@ class DownloadTool:
         # Ensure the download directory exists
         os.makedirs(cls.DOWNLOAD_DIR, exist_ok=True)
         
+        cancelled = threading.Event()
+        partial_files: Set[str] = set()
         try:
             # Configure yt-dlp options based on format
             if format_type.lower() == "mp3":
@@ -228,27 +286,120 @@ class DownloadTool:
                 final_ext = "mp4"
                 final_resolution = f"{resolution}p"
             
-            # Download using yt-dlp
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # yt_dlp is not async, but we wrap it in an async method
-                info = ydl.extract_info(video_url, download=True)
-                
-                # Construct the file path
-                video_id = info.get("id")
-                file_path = os.path.join(cls.DOWNLOAD_DIR, f"{video_id}.{final_ext}")
-                
-                # Get file size
-                file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                
-                return {
-                    "video_id": video_id,
-                    "title": info.get("title"),
-                    "format": format_type.lower(),
-                    "resolution": final_resolution,
-                    "file_path": file_path,
-                    "file_size": file_size,
-                }
+            ydl_opts["progress_hooks"] = [cls._progress_hook(on_progress, cancelled, partial_files)]
+            
+            def download() -> Dict[str, Any]:
+                with load_yt_dlp().YoutubeDL(ydl_opts) as ydl:
+                    return ydl.extract_info(video_url, download=True)
+            
+            # Download using yt-dlp; shielded so a cancelled caller can stop the thread first
+            thread = asyncio.ensure_future(asyncio.to_thread(download))
+            try:
+                with track_call("yt_dlp", "download"):
+                    info = await asyncio.shield(thread)
+            except asyncio.CancelledError:
+                cancelled.set()
+                # The thread ends with DownloadCancelledError, expected from here on
+                thread.add_done_callback(lambda t: t.cancelled() or t.exception())
+                await asyncio.wait([thread], timeout=cls.ABORT_WAIT_SECONDS)
+                cls._remove_files(partial_files)
+                logger.warning(f"Download of {video_url} cancelled")
+                raise
+            if not info:
+                logger.error(f"Failed to download {video_url}")
+                return None
+            
+            # Construct the file path
+            video_id = info.get("id")
+            file_path = os.path.join(cls.DOWNLOAD_DIR, f"{video_id}.{final_ext}")
+            
+            # Get file size
+            file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            
+            return {
+                "video_id": video_id,
+                "title": info.get("title"),
+                "format": format_type.lower(),
+                "resolution": final_resolution,
+                "file_path": file_path,
+                "file_size": file_size,
+            }
                 
         except Exception as e:
             logger.error(f"Error downloading {video_url}: {e}")
+            cls._remove_files(partial_files)
             return None
+    
+    @staticmethod
+    def _progress_hook(on_progress: Optional[ProgressCallback], cancelled: threading.Event,
+                       partial_files: Set[str]) -> Callable[[Dict[str, Any]], None]:
+        """
+        Build a yt-dlp progress hook that forwards byte counts to the event loop.
+        
+        Video downloads fetch separate video and audio streams, so bytes of
+        finished streams are carried over into the running total. The hook
+        also records the files being written and aborts the download once
+        cancelled is set.
+        """
+        loop = asyncio.get_running_loop()
+        finished_bytes = 0
+        
+        def hook(status: Dict[str, Any]) -> None:
+            nonlocal finished_bytes
+            if status.get("status") == "downloading":
+                # Not for files reported finished without downloading, which exist already
+                partial_files.update(filter(None, (status.get("tmpfilename"), status.get("filename"))))
+            if cancelled.is_set():
+                raise DownloadCancelledError("Download cancelled")
+            if on_progress is None:
+                return
+            downloaded = status.get("downloaded_bytes") or 0
+            if status.get("status") == "finished":
+                finished_bytes += status.get("total_bytes") or downloaded
+                loop.call_soon_threadsafe(on_progress, finished_bytes, None)
+            elif status.get("status") == "downloading":
+                total = status.get("total_bytes") or status.get("total_bytes_estimate")
+                loop.call_soon_threadsafe(
+                    on_progress,
+                    finished_bytes + downloaded,
+                    finished_bytes + int(total) if total else None,
+                )
+        
+        return hook
+    
+    @staticmethod
+    def _remove_files(paths: Set[str]) -> None:
+        """Remove the files of an unfinished download, with yt_dlp's resume metadata."""
+        for path in paths:
+            for leftover in (path, f"{path}.part", f"{path}.ytdl"):
+                try:
+                    os.remove(leftover)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not remove partial download file {leftover}: {e}")
+    
+    @classmethod
+    def remove_orphaned_files(cls, max_age_seconds: float) -> int:
+        """
+        Remove partial files of downloads that a previous process left behind.
+        
+        Only files untouched for max_age_seconds are removed, as other workers
+        may be writing to the same directory.
+        
+        Returns:
+            Number of files removed
+        """
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for pattern in cls.PARTIAL_FILE_PATTERNS:
+            for path in glob.glob(os.path.join(cls.DOWNLOAD_DIR, pattern)):
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass  # Finished or removed meanwhile
+        if removed:
+            logger.warning(f"Removed {removed} orphaned partial download files")
+        return removed
@@ -0,0 +1,297 @@
+import logging
+from typing import Dict, Any, List, Union
+
+logger = logging.getLogger(__name__)
+
+JsonContainer = Union[Dict[str, Any], List[Any]]
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied."""
+
+
+class JsonPatchTool:
+    """Tool for RFC 6902 JSON Patch operations on Lexical documents."""
+
+    PATCH_OPS = frozenset({"add", "remove", "replace", "move", "copy", "test"})
+    LEXICAL_OPS = frozenset({"insert_block", "replace_block", "remove_block", "set_text"})
+
+    # Upper bound on operations per request, keeps generated SQL small
+    MAX_OPERATIONS = 200
+
+    @staticmethod
+    def parse_pointer(pointer: str) -> List[str]:
+        """
+        Split a JSON Pointer (RFC 6901) into its unescaped tokens.
+
+        Args:
+            pointer: JSON Pointer such as "/root/children/0"
+
+        Returns:
+            List of path tokens
+        """
+        if pointer == "":
+            return []
+        if not pointer.startswith("/"):
+            raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+        return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+    @staticmethod
+    def to_pointer(tokens: List[Union[str, int]]) -> str:
+        """Build a JSON Pointer from path tokens."""
+        return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens)
+
+    @classmethod
+    def normalize(cls, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validate operations and translate Lexical-level operations into JSON Patch.
+
+        Lexical operations address top-level blocks by index:
+        ``insert_block``/``replace_block`` take ``index`` and ``block``,
+        ``remove_block`` takes ``index`` and ``set_text`` takes ``path``
+        (child indexes starting at the block) and ``text``.
+
+        Args:
+            operations: JSON Patch and/or Lexical operations
+
+        Returns:
+            Equivalent list of JSON Patch operations
+        """
+        if not isinstance(operations, list) or not operations:
+            raise JsonPatchError("Patch must be a non-empty list of operations")
+        if len(operations) > cls.MAX_OPERATIONS:
+            raise JsonPatchError(f"Patch exceeds {cls.MAX_OPERATIONS} operations")
+
+        normalized = []
+        for operation in operations:
+            if not isinstance(operation, dict):
+                raise JsonPatchError("Each operation must be an object")
+            op = operation.get("op")
+
+            if op in cls.PATCH_OPS:
+                if not isinstance(operation.get("path"), str):
+                    raise JsonPatchError(f"Operation '{op}' requires a string path")
+                if op in ("add", "replace", "test") and "value" not in operation:
+                    raise JsonPatchError(f"Operation '{op}' requires a value")
+                if op in ("move", "copy") and not isinstance(operation.get("from"), str):
+                    raise JsonPatchError(f"Operation '{op}' requires a string from")
+                cls.parse_pointer(operation["path"])
+                if "from" in operation:
+                    cls.parse_pointer(operation["from"])
+                normalized.append(operation)
+
+            elif op in cls.LEXICAL_OPS:
+                normalized.append(cls._from_lexical_operation(operation))
+
+            else:
+                raise JsonPatchError(f"Unsupported operation: {op!r}")
+
+        return normalized
+
+    @classmethod
+    def _from_lexical_operation(cls, operation: Dict[str, Any]) -> Dict[str, Any]:
+        """Translate a single Lexical-level operation into JSON Patch."""
+        op = operation["op"]
+
+        if op == "set_text":
+            path = operation.get("path")
+            if not isinstance(path, list) or not path or not all(isinstance(i, int) for i in path):
+                raise JsonPatchError("set_text requires a non-empty list of child indexes")
+            if not isinstance(operation.get("text"), str):
+                raise JsonPatchError("set_text requires a string text")
+            tokens: List[Union[str, int]] = ["root"]
+            for index in path:
+                tokens.extend(["children", index])
+            tokens.append("text")
+            return {"op": "replace", "path": cls.to_pointer(tokens), "value": operation["text"]}
+
+        index = operation.get("index")
+        if not isinstance(index, int) or index < 0:
+            raise JsonPatchError(f"{op} requires a non-negative integer index")
+        path = cls.to_pointer(["root", "children", index])
+
+        if op == "remove_block":
+            return {"op": "remove", "path": path}
+
+        if not isinstance(operation.get("block"), dict):
+            raise JsonPatchError(f"{op} requires a block object")
+        patch_op = "add" if op == "insert_block" else "replace"
+        return {"op": patch_op, "path": path, "value": operation["block"]}
+
+    @classmethod
+    def apply(cls, document: Any, operations: List[Dict[str, Any]]) -> Any:
+        """
+        Apply JSON Patch operations to a document.
+
+        Containers are copied only along the modified paths, so the input
+        document is left untouched and unchanged subtrees are shared.
+
+        Args:
+            document: JSON document
+            operations: Normalized JSON Patch operations
+
+        Returns:
+            Patched document
+        """
+        for operation in operations:
+            op = operation["op"]
+            path = cls.parse_pointer(operation["path"])
+
+            if op == "test":
+                if cls._get(document, path) != operation["value"]:
+                    raise JsonPatchError(f"Test failed at {operation['path']}")
+            elif op == "add":
+                document = cls._update(document, path, "add", operation["value"])
+            elif op == "replace":
+                document = cls._update(document, path, "replace", operation["value"])
+            elif op == "remove":
+                document = cls._update(document, path, "remove")
+            elif op == "copy":
+                value = cls._get(document, cls.parse_pointer(operation["from"]))
+                document = cls._update(document, path, "add", value)
+            elif op == "move":
+                from_path = cls.parse_pointer(operation["from"])
+                if path[:len(from_path)] == from_path and path != from_path:
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                value = cls._get(document, from_path)
+                document = cls._update(document, from_path, "remove")
+                document = cls._update(document, path, "add", value)
+
+        return document
+
+    @classmethod
+    def diff(cls, old: Any, new: Any) -> List[Dict[str, Any]]:
+        """
+        Compute JSON Patch operations that turn one document into another.
+
+        Arrays are compared after trimming their common prefix and suffix,
+        so inserting or deleting a block produces a single operation.
+
+        Args:
+            old: Original document
+            new: Target document
+
+        Returns:
+            List of JSON Patch operations
+        """
+        operations: List[Dict[str, Any]] = []
+        cls._diff(old, new, [], operations)
+        return operations
+
+    @classmethod
+    def _diff(cls, old: Any, new: Any, path: List[str], operations: List[Dict[str, Any]]) -> None:
+        """Append the operations turning old into new at path."""
+        if old == new:
+            return
+
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key in old:
+                if key not in new:
+                    operations.append({"op": "remove", "path": cls.to_pointer(path + [key])})
+            for key, value in new.items():
+                if key not in old:
+                    operations.append({"op": "add", "path": cls.to_pointer(path + [key]), "value": value})
+                else:
+                    cls._diff(old[key], value, path + [key], operations)
+            return
+
+        if isinstance(old, list) and isinstance(new, list):
+            start = 0
+            while start < len(old) and start < len(new) and old[start] == new[start]:
+                start += 1
+            old_end, new_end = len(old), len(new)
+            while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+                old_end -= 1
+                new_end -= 1
+
+            # Changed items at the same position are diffed in place
+            common = min(old_end, new_end) - start
+            for offset in range(common):
+                index = start + offset
+                cls._diff(old[index], new[index], path + [str(index)], operations)
+            # Remove from the back so earlier indexes stay valid
+            for index in range(old_end - 1, start + common - 1, -1):
+                operations.append({"op": "remove", "path": cls.to_pointer(path + [str(index)])})
+            for index in range(start + common, new_end):
+                operations.append({"op": "add", "path": cls.to_pointer(path + [str(index)]), "value": new[index]})
+            return
+
+        operations.append({"op": "replace", "path": cls.to_pointer(path), "value": new})
+
+    @staticmethod
+    def _child_index(container: List[Any], token: str, allow_end: bool) -> int:
+        """Resolve an array index token."""
+        if token == "-" and allow_end:
+            return len(container)
+        if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+            raise JsonPatchError(f"Invalid array index: {token!r}")
+        index = int(token)
+        if index > len(container) or (index == len(container) and not allow_end):
+            raise JsonPatchError(f"Array index out of range: {index}")
+        return index
+
+    @classmethod
+    def _get(cls, document: Any, path: List[str]) -> Any:
+        """Resolve a path inside a document."""
+        node = document
+        for token in path:
+            if isinstance(node, dict):
+                if token not in node:
+                    raise JsonPatchError(f"Path not found: {cls.to_pointer(path)}")
+                node = node[token]
+            elif isinstance(node, list):
+                node = node[cls._child_index(node, token, allow_end=False)]
+            else:
+                raise JsonPatchError(f"Path not found: {cls.to_pointer(path)}")
+        return node
+
+    @classmethod
+    def _update(cls, document: Any, path: List[str], op: str, value: Any = None) -> Any:
+        """Return a copy of the document with a single add, replace or remove applied."""
+        if not path:
+            if op == "remove":
+                raise JsonPatchError("Cannot remove the document root")
+            return value
+
+        # Copy every container on the way down to the target's parent
+        root = cls._shallow_copy(document)
+        parent = root
+        for token in path[:-1]:
+            if isinstance(parent, dict):
+                if token not in parent:
+                    raise JsonPatchError(f"Path not found: {cls.to_pointer(path)}")
+                child = cls._shallow_copy(parent[token])
+                parent[token] = child
+            else:
+                index = cls._child_index(parent, token, allow_end=False)
+                child = cls._shallow_copy(parent[index])
+                parent[index] = child
+            parent = child
+
+        token = path[-1]
+        if isinstance(parent, dict):
+            if op != "add" and token not in parent:
+                raise JsonPatchError(f"Path not found: {cls.to_pointer(path)}")
+            if op == "remove":
+                del parent[token]
+            else:
+                parent[token] = value
+        else:
+            index = cls._child_index(parent, token, allow_end=(op == "add"))
+            if op == "add":
+                parent.insert(index, value)
+            elif op == "replace":
+                parent[index] = value
+            else:
+                del parent[index]
+
+        return root
+
+    @staticmethod
+    def _shallow_copy(node: Any) -> JsonContainer:
+        """Copy a container so it can be modified without touching the original."""
+        if isinstance(node, dict):
+            return dict(node)
+        if isinstance(node, list):
+            return list(node)
+        raise JsonPatchError("Path traverses a non-container value")
@@ -0,0 +1,180 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LexicalTool:
+    """Tool for extracting plain text from Lexical editor documents."""
+
+    # Element nodes whose text starts on a new line when nested inside a block
+    BLOCK_TYPES = frozenset({
+        "paragraph",
+        "heading",
+        "quote",
+        "list",
+        "listitem",
+        "code",
+        "table",
+        "tablerow",
+        "tablecell",
+        "collapsible-container",
+        "collapsible-title",
+        "collapsible-content",
+        "layout-container",
+        "layout-item",
+    })
+
+    # Maximum number of notes whose blocks are kept for incremental extraction
+    CACHE_SIZE = 512
+
+    _block_cache: "OrderedDict[Hashable, Tuple[Tuple[Any, ...], Tuple[str, ...]]]" = OrderedDict()
+
+    @classmethod
+    def extract_block_text(cls, block: Dict[str, Any]) -> str:
+        """
+        Extract the text of a single top-level Lexical block.
+
+        The node tree is walked iteratively so deeply nested lists or
+        tables cannot hit the recursion limit.
+
+        Args:
+            block: Lexical node (usually a direct child of root)
+
+        Returns:
+            Text contained in the block
+        """
+        parts: List[str] = []
+        stack: List[Any] = [block]
+
+        while stack:
+            node = stack.pop()
+
+            # Line separators are pushed onto the stack as plain strings
+            if isinstance(node, str):
+                parts.append(node)
+                continue
+
+            if not isinstance(node, dict):
+                continue
+
+            node_type = node.get("type")
+
+            if node_type == "linebreak":
+                parts.append("\n")
+                continue
+            if node_type == "tab":
+                parts.append("\t")
+                continue
+
+            text = node.get("text")
+            if isinstance(text, str):
+                parts.append(text)
+            elif node_type == "equation" and isinstance(node.get("equation"), str):
+                parts.append(node["equation"])
+
+            children = node.get("children")
+            if not children:
+                continue
+
+            # Push children in reverse so they are popped in document order
+            for child in reversed(children):
+                stack.append(child)
+                if isinstance(child, dict) and child.get("type") in cls.BLOCK_TYPES:
+                    stack.append("\n")
+
+        # Nested blocks can leave empty lines behind; drop them
+        lines = "".join(parts).split("\n")
+        return "\n".join(line for line in lines if line.strip()).strip()
+
+    @classmethod
+    def extract_text(cls, content: Dict[str, Any]) -> str:
+        """
+        Extract the plain text of a whole Lexical document.
+
+        Args:
+            content: Lexical JSON content
+
+        Returns:
+            Plain text with one line per block
+        """
+        if not content or not isinstance(content, dict):
+            return ""
+
+        blocks = content.get("root", {}).get("children", [])
+        texts = (cls.extract_block_text(block) for block in blocks)
+        return "\n".join(text for text in texts if text)
+
+    @classmethod
+    def extract_text_incremental(cls, key: Hashable, content: Dict[str, Any]) -> str:
+        """
+        Extract plain text, re-walking only blocks that changed since the last call.
+
+        Blocks are matched against the previous call's blocks by identity,
+        which JsonPatchTool.apply preserves for untouched blocks, then by
+        equality for the unchanged run at each end of the document, so a
+        document loaded afresh from the database with one edited paragraph
+        only walks that paragraph.
+
+        Args:
+            key: Identifier of the document (e.g. the note ID)
+            content: Lexical JSON content
+
+        Returns:
+            Plain text with one line per block
+        """
+        if not content or not isinstance(content, dict):
+            cls.forget(key)
+            return ""
+
+        blocks = content.get("root", {}).get("children", [])
+        if not isinstance(blocks, list):
+            cls.forget(key)
+            return cls.extract_text(content)
+
+        previous_blocks, previous_texts = cls._block_cache.pop(key, ((), ()))
+        size, previous_size = len(blocks), len(previous_blocks)
+
+        # Unchanged blocks at the start and at the end of the document
+        head = 0
+        limit = min(size, previous_size)
+        while head < limit and cls._same_block(blocks[head], previous_blocks[head]):
+            head += 1
+        tail = 0
+        limit -= head
+        while tail < limit and cls._same_block(blocks[size - 1 - tail], previous_blocks[previous_size - 1 - tail]):
+            tail += 1
+
+        # Blocks in between are reused if the patch left them in place
+        by_identity = {
+            id(block): text
+            for block, text in zip(previous_blocks[head:previous_size - tail], previous_texts[head:previous_size - tail])
+        }
+        middle: List[str] = []
+        walked = 0
+        for block in blocks[head:size - tail]:
+            text = by_identity.get(id(block))
+            if text is None:
+                text = cls.extract_block_text(block)
+                walked += 1
+            middle.append(text)
+        texts = [*previous_texts[:head], *middle, *previous_texts[previous_size - tail:]]
+
+        # The blocks are kept so their ids cannot be reused while cached
+        cls._block_cache[key] = (tuple(blocks), tuple(texts))
+        while len(cls._block_cache) > cls.CACHE_SIZE:
+            cls._block_cache.popitem(last=False)
+
+        logger.debug(f"Incremental extraction for {key}: reused {size - walked}/{size} blocks")
+        return "\n".join(text for text in texts if text)
+
+    @staticmethod
+    def _same_block(block: Any, previous: Any) -> bool:
+        """Whether a block is unchanged, by identity first and then by value."""
+        return block is previous or block == previous
+
+    @classmethod
+    def forget(cls, key: Hashable) -> None:
+        """Drop the cached blocks of a document."""
+        cls._block_cache.pop(key, None)
@@ -1,11 +1,18 @@
 
 import logging
 from typing import List, Dict, Any, Optional
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+
+from src.infrastructure.monitoring.metrics import track_call
 
 logger = logging.getLogger(__name__)
 
 
+def load_transcript_api():
+    """Import youtube_transcript_api on first use, as it pulls in requests."""
+    import youtube_transcript_api
+    return youtube_transcript_api
+
+
 class TranscriptTool:
     """Tool for fetching YouTube transcripts."""
     
@@ -21,31 +28,33 @@ class TranscriptTool:
         Returns:
             List of transcript segments or None if no transcript is available
         """
+        api = load_transcript_api()
         try:
-            # YouTubeTranscriptApi is not async, but we wrap it in an async method
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            
-            try:
-                # Try to get the transcript in the requested language
-                transcript = transcript_list.find_transcript([language])
-            except NoTranscriptFound:
-                # Fall back to any available transcript and translate it
+            with track_call("youtube_transcript", "transcript"):
+                # YouTubeTranscriptApi is not async, but we wrap it in an async method
+                transcript_list = api.YouTubeTranscriptApi.list_transcripts(video_id)
+                
                 try:
-                    transcript = transcript_list.find_transcript(['en'])
-                    transcript = transcript.translate(language)
-                except Exception as e:
-                    logger.warning(f"Couldn't translate transcript: {e}")
-                    # Use any available transcript
-                    transcript = transcript_list.find_generated_transcript()
-            
-            # Get the transcript data
-            transcript_data = transcript.fetch()
+                    # Try to get the transcript in the requested language
+                    transcript = transcript_list.find_transcript([language])
+                except api.NoTranscriptFound:
+                    # Fall back to any available transcript and translate it
+                    try:
+                        transcript = transcript_list.find_transcript(['en'])
+                        transcript = transcript.translate(language)
+                    except Exception as e:
+                        logger.warning(f"Couldn't translate transcript: {e}")
+                        # Use any available transcript
+                        transcript = transcript_list.find_generated_transcript()
+                
+                # Get the transcript data
+                transcript_data = transcript.fetch()
             return transcript_data
             
-        except TranscriptsDisabled:
+        except api.TranscriptsDisabled:
             logger.warning(f"Transcripts are disabled for video {video_id}")
             return None
-        except NoTranscriptFound:
+        except api.NoTranscriptFound:
             logger.warning(f"No transcript found for video {video_id}")
             return None
         except Exception as e:
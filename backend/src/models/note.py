@@ -1,7 +1,7 @@
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class NoteRequest(BaseModel):
@@ -13,14 +13,49 @@ class NoteRequest(BaseModel):
     tags: Optional[List[str]] = Field(None, description="List of tags")
 
 
+class NotePatchRequest(BaseModel):
+    """Request model for partial note updates."""
+    
+    version: int = Field(..., description="Version of the note the operations apply to")
+    operations: List[Dict[str, Any]] = Field(
+        ..., description="RFC 6902 JSON Patch or Lexical block operations"
+    )
+
+
 class NoteResponse(BaseModel):
     """Response model for notes."""
     
+    # Built straight from Note entities, without an intermediate dict
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int = Field(..., description="Note ID")
     video_url: str = Field(..., description="YouTube video URL")
     video_id: str = Field(..., description="YouTube video ID")
     content: Dict[str, Any] = Field(..., description="Lexical JSON content")
     timestamp: Optional[int] = Field(None, description="Timestamp in seconds")
     tags: Optional[List[str]] = Field(None, description="List of tags")
+    version: int = Field(1, description="Version number, incremented on every update")
     created_at: datetime = Field(..., description="Creation timestamp")
     updated_at: datetime = Field(..., description="Last update timestamp")
+
+
+class NoteSearchResult(NoteResponse):
+    """Response model for a semantic search hit."""
+    
+    score: float = Field(..., description="Cosine similarity to the query (higher is closer)")
+
+
+class NoteRevisionSummary(BaseModel):
+    """Response model for an entry in a note's revision history."""
+    
+    version: int = Field(..., description="Version number")
+    kind: str = Field(..., description="Storage kind ('snapshot' or 'delta')")
+    created_at: Optional[datetime] = Field(None, description="When the version was saved")
+
+
+class NoteRevisionResponse(BaseModel):
+    """Response model for a note reconstructed at a version."""
+    
+    note_id: int = Field(..., description="Note ID")
+    version: int = Field(..., description="Version number")
+    content: Dict[str, Any] = Field(..., description="Lexical JSON content at this version")
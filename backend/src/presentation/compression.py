@@ -0,0 +1,222 @@
+
+import asyncio
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content types worth compressing; media and archives are compressed already
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# A compressor's compress(chunk) and flush() functions
+Compressor = Tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+
+# Bodies larger than this are compressed in a worker thread to keep the loop responsive
+THREAD_THRESHOLD = 256 * 1024
+
+
+def _gzip_compressor(level: int) -> Compressor:
+    """Incremental gzip compressor."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, compressor.flush
+
+
+def _brotli_compressor(quality: int) -> Compressor:
+    """Incremental brotli compressor."""
+    compressor = brotli.Compressor(quality=quality)
+    return compressor.process, compressor.finish
+
+
+def negotiate_encoding(accept_encoding: str, available: Tuple[str, ...]) -> Optional[str]:
+    """
+    Pick the content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+        available: Supported codings, most preferred first
+
+    Returns:
+        The acceptable coding with the highest q-value, ties going to the
+        server's preference, or None to send the body as it is
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, wildcard)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class CompressedBodyCache:
+    """Compressed bodies of stored content, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+
+    def get(self, key: Tuple[bytes, str]) -> Optional[bytes]:
+        """Get a cached body, marking it as recently used."""
+        body = self.entries.get(key)
+        if body is not None:
+            self.entries.move_to_end(key)
+        return body
+
+    def put(self, key: Tuple[bytes, str], body: bytes) -> None:
+        """Cache a body, evicting the least recently used ones beyond the size limit."""
+        if len(body) > self.max_bytes or key in self.entries:
+            return
+        self.entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, as negotiated with the client.
+
+    Small bodies, already encoded responses, binary content types and the
+    excluded path prefixes (the file downloads) are passed through. Bodies of
+    responses with an ETag are stored content such as transcripts; their
+    compressed form is cached, so each one is compressed once per coding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024,
+                 excluded_paths: Tuple[str, ...] = ("/downloads",),
+                 gzip_level: int = 6, brotli_quality: int = 5,
+                 cache_bytes: int = 64 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = excluded_paths
+        self.compressors: Dict[str, Callable[[], Compressor]] = {
+            "gzip": lambda: _gzip_compressor(gzip_level),
+        }
+        if brotli is not None:
+            self.compressors = {"br": lambda: _brotli_compressor(brotli_quality), **self.compressors}
+        self.cache = CompressedBodyCache(cache_bytes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), tuple(self.compressors)
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(self, encoding, send))
+
+    async def compress(self, body: bytes, encoding: str, cacheable: bool) -> bytes:
+        """Compress a whole body, reusing the cached result for stored content."""
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding) if cacheable else None
+        if key:
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                return compressed
+
+        def run() -> bytes:
+            compress, flush = self.compressors[encoding]()
+            return compress(body) + flush()
+
+        compressed = await asyncio.to_thread(run) if len(body) > THREAD_THRESHOLD else run()
+        if key:
+            self.cache.put(key, compressed)
+        return compressed
+
+
+class _CompressingSend:
+    """ASGI send wrapper compressing one response."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.stream: Optional[Compressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows how to encode it
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.start is not None:
+            await self._first_body(message)
+        elif self.stream is not None:
+            compress, flush = self.stream
+            chunk = compress(message.get("body", b""))
+            if not message.get("more_body", False):
+                chunk += flush()
+            await self.send({**message, "body": chunk})
+        else:
+            await self.send(message)
+
+    async def _first_body(self, message: Message) -> None:
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough or (not more_body and len(body) < self.middleware.minimum_size):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # Encoded bytes differ from the hashed content, as with nginx
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        if more_body:
+            # Streamed response: compress chunk by chunk
+            del headers["Content-Length"]
+            self.stream = self.middleware.compressors[self.encoding]()
+            compress, _ = self.stream
+            await self.send(start)
+            await self.send({**message, "body": compress(body)})
+            return
+
+        body = await self.middleware.compress(body, self.encoding, cacheable=etag is not None)
+        headers["Content-Length"] = str(len(body))
+        await self.send(start)
+        await self.send({**message, "body": body})
@@ -0,0 +1,63 @@
+
+import asyncio
+import logging
+
+from ..application.use_cases.ai_chat import AiChatUseCase
+from ..application.use_cases.download_tracking import DownloadTrackingUseCase
+from ..application.use_cases.note_autosave import NoteAutosaveUseCase
+from ..application.use_cases.note_history import NoteHistoryUseCase
+from ..application.use_cases.note_management import NoteManagementUseCase
+from ..application.use_cases.youtube_analysis import YoutubeAnalysisUseCase
+from ..infrastructure.repositories.download_repository import DownloadRepository
+from ..infrastructure.repositories.note_repository import NoteRepository
+from ..infrastructure.repositories.note_revision_repository import NoteRevisionRepository
+from ..infrastructure.repositories.transcript_repository import TranscriptRepository
+from ..infrastructure.repositories.video_repository import VideoRepository
+from ..infrastructure.services.groq_service import GroqService
+from ..infrastructure.tools.download_tool import DownloadTool
+
+logger = logging.getLogger(__name__)
+
+
+class Container:
+    """
+    Repositories and use cases of the app, built once per worker.
+
+    Routes get them through their dependencies instead of constructing them
+    per request, so state kept by a use case, such as buffered download
+    progress or open autosave sessions, is shared by all requests.
+    """
+
+    def __init__(self):
+        # Repositories
+        self.video_repository = VideoRepository()
+        self.transcript_repository = TranscriptRepository()
+        self.download_repository = DownloadRepository()
+        self.note_repository = NoteRepository()
+        self.note_revision_repository = NoteRevisionRepository()
+
+        # Use cases
+        self.download_tracking = DownloadTrackingUseCase(self.download_repository)
+        self.youtube_analysis = YoutubeAnalysisUseCase(
+            self.video_repository, self.download_tracking, self.transcript_repository
+        )
+        self.note_history = NoteHistoryUseCase(self.note_revision_repository)
+        self.note_management = NoteManagementUseCase(self.note_repository, self.note_history)
+        self.note_autosave = NoteAutosaveUseCase(self.note_repository, self.note_history)
+        self.ai_chat = AiChatUseCase()
+
+    async def start(self) -> None:
+        """Recover the state a previous process left behind; run once the database is connected."""
+        await self.download_tracking.recover()
+        # Partial files of downloads cut off by a crash, old enough that no worker still writes them
+        await asyncio.to_thread(DownloadTool.remove_orphaned_files, DownloadTrackingUseCase.STALE_SECONDS)
+
+    async def close(self) -> None:
+        """Write buffered changes and close clients; run before the database is disconnected."""
+        await self.note_autosave.flush_all()
+        await self.download_tracking.close()
+        await GroqService.close()
+
+
+# Shared by the route dependencies and the app's lifespan
+container = Container()
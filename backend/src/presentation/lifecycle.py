@@ -0,0 +1,70 @@
+
+import asyncio
+import logging
+from typing import Coroutine, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ShuttingDownError(RuntimeError):
+    """Raised when background work is submitted after shutdown has started."""
+
+
+class Lifecycle:
+    """
+    Background tasks of the app, drained on shutdown.
+
+    Tasks started with spawn() are kept until they finish, so shutdown can
+    wait for them instead of losing them with the event loop. Once shutdown
+    starts, no new task is accepted.
+    """
+
+    def __init__(self):
+        self.accepting = True
+        self.tasks: Set[asyncio.Task] = set()
+
+    def spawn(self, coro: Coroutine, name: Optional[str] = None) -> asyncio.Task:
+        """
+        Run a coroutine in the background until it finishes or shutdown cancels it.
+
+        Raises:
+            ShuttingDownError: If shutdown has started
+        """
+        if not self.accepting:
+            coro.close()
+            raise ShuttingDownError("Server is shutting down, try again shortly")
+
+        task = asyncio.create_task(coro, name=name)
+        self.tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    async def shutdown(self, timeout: float) -> None:
+        """
+        Stop accepting tasks and wait up to timeout seconds for the running ones.
+
+        Tasks still running after that are cancelled. A cancelled download
+        stops its yt_dlp thread, removes its partial files and is recorded as
+        interrupted, so the deadline never leaves half-written work behind.
+        """
+        self.accepting = False
+        if not self.tasks:
+            return
+
+        logger.info(f"Waiting up to {timeout}s for {len(self.tasks)} background tasks")
+        _, pending = await asyncio.wait(self.tasks, timeout=timeout)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} background tasks still running after {timeout}s")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        """Forget a finished task, logging the error it failed with."""
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background task {task.get_name()} failed: {task.exception()!r}")
+
+
+# Shared by the routes that start background work and the app's lifespan
+lifecycle = Lifecycle()
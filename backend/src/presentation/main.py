@@ -1,15 +1,90 @@
 
-from fastapi import FastAPI, HTTPException
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import youtube, ai, note, history, downloads
+from fastapi.responses import ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+from .compression import CompressionMiddleware
+from .container import container
+from .lifecycle import lifecycle
+from .rate_limit import RateLimitMiddleware, create_token_buckets
+from .read_your_writes import ReadYourWritesMiddleware
+from .routes import youtube, ai, note, history, downloads, stats
+from .websocket import websocket_manager
+from ..infrastructure.db.connection import db
+from ..infrastructure.monitoring.metrics import mark_process_dead, render_metrics
+from ..infrastructure.services.groq_service import GroqService
+from ..infrastructure.tools.download_tool import DownloadTool, load_yt_dlp
+from ..infrastructure.tools.transcript_tool import load_transcript_api
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> None:
+    """Import the libraries loaded on first use and create the Groq client, off the event loop."""
+    for load in (load_yt_dlp, load_transcript_api, GroqService.get_client):
+        try:
+            load()
+        except Exception as e:
+            logger.warning(f"Startup warm-up step {load.__qualname__} failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open and warm up the database pool and start the WebSocket broker before serving, close them on shutdown.
+    
+    yt_dlp, the transcript API and the Groq client are loaded in the background
+    once serving starts, unless STARTUP_WARMUP=0, in which case the first
+    request needing them loads them.
+    
+    On SIGTERM uvicorn stops accepting connections and finishes the requests
+    in flight (bounded by --timeout-graceful-shutdown) before this shuts
+    down. Background tasks such as batch downloads then get
+    SHUTDOWN_TIMEOUT_SECONDS to finish and are cancelled after that, which
+    removes their partial files. Write-behind buffers are flushed before the
+    pools are closed.
+    """
+    await db.connect()
+    await container.start()
+    await websocket_manager.start()
+    warm_up_task = None
+    if os.getenv("STARTUP_WARMUP", "1").lower() not in ("0", "false"):
+        warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    yield
+    await lifecycle.shutdown(float(os.getenv("SHUTDOWN_TIMEOUT_SECONDS", "25")))
+    if warm_up_task:
+        await warm_up_task
+    await container.close()
+    await websocket_manager.close()
+    await db.disconnect()
+    mark_process_dead()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="YouGen API",
     description="API for YouGen Note Savant application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # Responses that still go through a response_model are rendered by orjson
+    default_response_class=ORJSONResponse,
+)
+
+# Per-client rate limits and concurrency caps for the yt_dlp and LLM endpoints.
+# Added first so it runs inside CORS and browsers can read its 429 and 503 responses.
+app.add_middleware(
+    RateLimitMiddleware,
+    buckets=create_token_buckets(),
+    trust_forwarded=os.getenv("RATE_LIMIT_TRUST_FORWARDED", "").lower() in ("1", "true"),
 )
 
+# Reads shortly after a client's own writes go to the primary, not a lagging replica
+app.add_middleware(ReadYourWritesMiddleware, database=db)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -17,14 +92,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paginated lists return their next cursor in a header the browser must let scripts read
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Brotli or gzip for JSON bodies over 1 KB; downloaded media is sent as it is
+app.add_middleware(CompressionMiddleware, minimum_size=1024, excluded_paths=("/downloads",))
+
+# Files of completed downloads, linked by their file_url
+app.mount("/downloads", StaticFiles(directory=DownloadTool.DOWNLOAD_DIR, check_dir=False), name="downloads")
+
 # Include routers
 app.include_router(youtube.router, prefix="/api")
 app.include_router(ai.router, prefix="/api")
 app.include_router(note.router, prefix="/api")
 app.include_router(history.router, prefix="/api")
 app.include_router(downloads.router, prefix="/api")
+app.include_router(stats.router, prefix="/api")
 
 @app.get("/")
 async def root():
@@ -36,6 +120,18 @@ async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
 
+@app.get("/health/db")
+async def health_db():
+    """Database pool gauges: size, in-use and idle connections, acquire wait times."""
+    return db.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: external call and query latencies, LLM tokens, WebSocket queues."""
+    body, content_type = render_metrics()
+    # As a header, since media_type would get a second charset appended
+    return Response(body, headers={"Content-Type": content_type})
+
 # Error handling
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
@@ -0,0 +1,226 @@
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..infrastructure.repositories.rate_limit_repository import RateLimitRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EndpointLimit:
+    """Admission limits of one class of expensive endpoints."""
+
+    rate: float  # Requests per second a client may sustain
+    burst: int  # Requests a client may send at once
+    max_concurrent: int  # Requests a worker serves at once, over all clients
+    max_queue: int  # Requests waiting for one of those slots before turning clients away
+    queue_timeout: float  # Longest wait for a slot, in seconds
+
+
+# Each class is limited on its own: yt_dlp downloads, yt_dlp extractions and LLM calls
+DEFAULT_LIMITS: Dict[str, EndpointLimit] = {
+    "download": EndpointLimit(rate=0.2, burst=5, max_concurrent=4, max_queue=16, queue_timeout=30.0),
+    "extraction": EndpointLimit(rate=1.0, burst=20, max_concurrent=8, max_queue=32, queue_timeout=10.0),
+    "ai": EndpointLimit(rate=0.5, burst=10, max_concurrent=4, max_queue=16, queue_timeout=30.0),
+}
+
+# (method, path) of each rate limited endpoint and its class
+ENDPOINT_CLASSES: Dict[Tuple[str, str], str] = {
+    ("POST", "/api/youtube/download"): "download",
+    ("POST", "/api/youtube/download/batch"): "download",
+    ("GET", "/api/youtube/metadata"): "extraction",
+    ("GET", "/api/youtube/formats"): "extraction",
+    ("GET", "/api/youtube/playlist"): "extraction",
+    ("GET", "/api/youtube/transcript"): "extraction",
+    ("POST", "/api/chat"): "ai",
+}
+
+
+class TokenBuckets:
+    """Per-client token buckets of this worker, keeping the most recently used max_keys."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> (tokens, monotonic time they were counted)
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Take a token from a client's bucket.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is available
+        """
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.max_keys:
+            # A forgotten client starts again with a full bucket
+            self.buckets.popitem(last=False)
+        return wait
+
+
+class SharedTokenBuckets(TokenBuckets):
+    """
+    Token buckets kept in Postgres, so a client's rate is enforced across workers.
+
+    Falls back to this worker's own buckets while the database cannot be reached.
+    """
+
+    def __init__(self, repository: RateLimitRepository, prune_interval: float = 300.0,
+                 max_keys: int = 100_000):
+        super().__init__(max_keys)
+        self.repository = repository
+        self.prune_interval = prune_interval
+        self._next_prune = time.monotonic() + prune_interval
+        self._prune_task: Optional[asyncio.Task] = None
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        try:
+            taken = await self.repository.take_token(key, rate, burst)
+        except Exception as e:
+            logger.warning(f"Shared rate limit unavailable, limiting per worker: {e}")
+            return await super().take(key, rate, burst)
+
+        if time.monotonic() >= self._next_prune and self._prune_task is None:
+            self._next_prune = time.monotonic() + self.prune_interval
+            self._prune_task = asyncio.create_task(self._prune())
+        # At most one token short, refilled within 1 / rate
+        return 0.0 if taken else 1.0 / rate
+
+    async def _prune(self) -> None:
+        """Delete the buckets of clients gone long enough for theirs to be full again."""
+        try:
+            await self.repository.prune(self.prune_interval)
+        except Exception as e:
+            logger.warning(f"Failed to prune rate limit buckets: {e}")
+        finally:
+            self._prune_task = None
+
+
+def create_token_buckets() -> TokenBuckets:
+    """
+    Create the token buckets selected by RATE_LIMIT_BACKEND.
+
+    "memory" (the default) limits each client per worker; "postgres" shares
+    the buckets between workers.
+    """
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend == "memory":
+        return TokenBuckets()
+    if backend == "postgres":
+        return SharedTokenBuckets(RateLimitRepository())
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND {backend!r}, expected 'memory' or 'postgres'")
+
+
+class ConcurrencyGate:
+    """Slots for the requests of one endpoint class, with a bounded queue for them."""
+
+    def __init__(self, limit: EndpointLimit):
+        self.limit = limit
+        self.slots = asyncio.Semaphore(limit.max_concurrent)
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if there is room; False if the request should be turned away."""
+        if not self.slots.locked():
+            await self.slots.acquire()
+            return True
+        if self.waiting >= self.limit.max_queue:
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.limit.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        self.slots.release()
+
+
+class RateLimitMiddleware:
+    """
+    Admission control for the endpoints that run yt_dlp or an LLM.
+
+    Each client gets a token bucket per endpoint class; a client out of
+    tokens gets 429 with the seconds until its next token in Retry-After.
+    Each class also has a fixed number of concurrent requests per worker;
+    further requests queue for a slot, and once the queue is full or the
+    wait times out they get 503 instead of piling up. Other endpoints pass
+    straight through.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Mapping[str, EndpointLimit] = DEFAULT_LIMITS,
+                 endpoints: Mapping[Tuple[str, str], str] = ENDPOINT_CLASSES,
+                 buckets: Optional[TokenBuckets] = None, trust_forwarded: bool = False):
+        self.app = app
+        self.limits = limits
+        self.endpoints = endpoints
+        self.buckets = buckets or TokenBuckets()
+        # Behind a proxy every request comes from the proxy's address
+        self.trust_forwarded = trust_forwarded
+        self.gates = {name: ConcurrencyGate(limit) for name, limit in limits.items()}
+        self.throttled: Counter = Counter()
+        self.shed: Counter = Counter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        endpoint_class = self.endpoints.get((scope.get("method"), scope["path"])) if scope["type"] == "http" else None
+        if endpoint_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits[endpoint_class]
+        wait = await self.buckets.take(f"{endpoint_class}:{self._client(scope)}", limit.rate, limit.burst)
+        if wait > 0:
+            self.throttled[endpoint_class] += 1
+            await self._reject(scope, receive, send, 429, "Too many requests, slow down", wait)
+            return
+
+        gate = self.gates[endpoint_class]
+        if not await gate.acquire():
+            self.shed[endpoint_class] += 1
+            await self._reject(scope, receive, send, 503, "Server busy, try again later", limit.queue_timeout)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    def _client(self, scope: Scope) -> str:
+        """Address of the client a request counts against."""
+        if self.trust_forwarded:
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int,
+                      detail: str, retry_after: float) -> None:
+        response = ORJSONResponse(
+            {"detail": detail}, status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,57 @@
+import math
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..infrastructure.db.connection import Database
+
+# Wall-clock time of the client's last write, in seconds since the epoch
+LAST_WRITE_COOKIE = "yougen_last_write"
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keep a client's reads on the primary shortly after its writes, across requests.
+
+    Requests that write set a cookie with the time of their last write, valid
+    for the read-your-writes window. Every request or WebSocket connection
+    carrying it has its reads sent to the primary until the window has
+    passed, whichever worker serves it, so a page reloaded right after a save
+    does not read a replica that has not replayed the save yet.
+    """
+
+    def __init__(self, app: ASGIApp, database: Database):
+        self.app = app
+        self.database = database
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        cookies = cookie_parser(Headers(scope=scope).get("cookie", ""))
+        try:
+            last_write = float(cookies.get(LAST_WRITE_COOKIE, 0))
+        except ValueError:
+            last_write = 0.0
+        writes = self.database.track_client_writes(last_write)
+        reported = writes.last_write
+
+        # A WebSocket handshake has no writes to report yet; later ones are tracked in its context
+        if scope["type"] == "websocket":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes.last_write > reported:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{LAST_WRITE_COOKIE}={writes.last_write:.3f}; "
+                    f"Max-Age={math.ceil(self.database.read_your_writes_window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,50 @@
+
+from typing import Any, Dict, Mapping, Optional
+
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+
+def json_response(content: Any, headers: Optional[Mapping[str, str]] = None) -> ORJSONResponse:
+    """
+    Serialize data built by the API itself with orjson in a single pass.
+
+    A route returning a Response skips FastAPI's response_model validation, so
+    the content must already have the documented shape, e.g. rows formatted
+    by a repository or segments from the transcript tool.
+    """
+    return ORJSONResponse(content, headers=headers)
+
+
+def model_response(adapter: TypeAdapter, content: Any,
+                   headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    Validate content against a response model once and serialize it with pydantic-core.
+
+    Used for entities, which need the model to pick and derive fields (such as
+    a note's video_url) but should not be validated again by FastAPI.
+    """
+    return Response(
+        adapter.dump_json(adapter.validate_python(content)),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def cache_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    """Headers of a response whose body is identified by a stored content hash."""
+    return {"ETag": f'"{etag}"', "Cache-Control": cache_control}
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Whether an If-None-Match header lists the entity tag of a stored content hash."""
+    if not if_none_match or not etag:
+        return False
+    # Weak comparison, as required for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or f'"{etag}"' in tags
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Empty 304 response telling the client its cached copy is still current."""
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
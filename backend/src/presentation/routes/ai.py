@@ -3,13 +3,14 @@ from fastapi import APIRouter, HTTPException, Depends
 
 from src.models.chat import ChatRequest, ChatResponse
 from src.application.use_cases.ai_chat import AiChatUseCase
+from src.presentation.container import container
 
 router = APIRouter()
 
 # Dependencies
 async def get_ai_chat_use_case() -> AiChatUseCase:
     """Dependency for AiChatUseCase."""
-    return AiChatUseCase()
+    return container.ai_chat
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -1,10 +1,12 @@
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 from ...infrastructure.repositories.history_repository import HistoryRepository
+from ...infrastructure.repositories.pagination import InvalidCursorError
+from ..responses import json_response
 
 router = APIRouter(tags=["downloads"])
 
@@ -14,56 +16,46 @@ class DownloadHistoryResponse(BaseModel):
     title: str
     thumbnail: Optional[str] = None
     format: str
+    resolution: Optional[str] = None
     file_size: Optional[int] = None
     file_path: Optional[str] = None
     status: str
     download_date: str
 
-@router.get("/downloads")
-async def get_downloads() -> List[DownloadHistoryResponse]:
+class DownloadDetailResponse(DownloadHistoryResponse):
+    bytes_downloaded: Optional[int] = None
+    total_bytes: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    duration_seconds: Optional[float] = None
+
+@router.get("/downloads", response_model=List[DownloadHistoryResponse])
+async def get_downloads(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+) -> Response:
     """Get user's download history."""
     try:
-        download_items = HistoryRepository.get_download_history()
-        
-        # Convert to response model
-        response = []
-        for item in download_items:
-            response.append(DownloadHistoryResponse(
-                id=str(item["id"]),
-                video_id=item["video_id"],
-                title=item["title"],
-                thumbnail=item["thumbnail"],
-                format=item["format"],
-                file_size=item["file_size"],
-                file_path=item["file_path"],
-                status=item["status"],
-                download_date=item["download_date"]
-            ))
+        download_items, next_cursor = await HistoryRepository.get_download_history(limit, cursor)
         
-        return response
+        # Rows already have the response model's fields
+        return json_response(download_items, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving download history: {str(e)}")
 
 @router.get("/downloads/{download_id}")
-async def get_download_detail(download_id: int) -> DownloadHistoryResponse:
+async def get_download_detail(download_id: int) -> DownloadDetailResponse:
     """Get details for a specific download."""
     try:
-        download_item = HistoryRepository.get_download_detail(download_id)
+        download_item = await HistoryRepository.get_download_detail(download_id)
         
         if not download_item:
             raise HTTPException(status_code=404, detail=f"Download with ID {download_id} not found")
         
-        return DownloadHistoryResponse(
-            id=download_item["id"],
-            video_id=download_item["video_id"],
-            title=download_item["title"],
-            thumbnail=download_item["thumbnail"],
-            format=download_item["format"],
-            file_size=download_item["file_size"],
-            file_path=download_item["file_path"],
-            status=download_item["status"],
-            download_date=download_item["download_date"]
-        )
+        return DownloadDetailResponse(**download_item)
     except HTTPException:
         raise
     except Exception as e:
@@ -1,10 +1,12 @@
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
 from ...infrastructure.repositories.history_repository import HistoryRepository
+from ...infrastructure.repositories.pagination import InvalidCursorError
+from ..responses import json_response
 
 router = APIRouter(tags=["history"])
 
@@ -16,25 +18,19 @@ class NoteHistoryResponse(BaseModel):
     created_at: str
     updated_at: str
 
-@router.get("/history")
-async def get_history() -> List[NoteHistoryResponse]:
+@router.get("/history", response_model=List[NoteHistoryResponse])
+async def get_history(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+) -> Response:
     """Get user's history of note activities."""
     try:
-        history_items = HistoryRepository.get_user_history()
+        history_items, next_cursor = await HistoryRepository.get_user_history(limit, cursor)
         
-        # Convert to response model
-        response = []
-        for item in history_items:
-            response.append(NoteHistoryResponse(
-                id=item["id"],
-                title=item["title"],
-                content_text=item["content_text"],
-                video_id=item["video_id"],
-                created_at=item["created_at"],
-                updated_at=item["updated_at"]
-            ))
-        
-        return response
+        # Rows already have the response model's fields
+        return json_response(history_items, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving history: {str(e)}")
 
@@ -42,7 +38,7 @@ async def get_history() -> List[NoteHistoryResponse]:
 async def get_history_detail(history_id: int) -> NoteHistoryResponse:
     """Get details for a specific history item."""
     try:
-        history_item = HistoryRepository.get_history_detail(history_id)
+        history_item = await HistoryRepository.get_history_detail(history_id)
         
         if not history_item:
             raise HTTPException(status_code=404, detail=f"History item with ID {history_id} not found")
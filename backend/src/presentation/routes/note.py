@@ -1,18 +1,54 @@
 
-from fastapi import APIRouter, HTTPException, Depends, Path, Query
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, WebSocket, WebSocketDisconnect
+from pydantic import TypeAdapter
 from typing import List, Optional
+import uuid
 
-from src.models.note import NoteRequest, NoteResponse
+from src.models.note import (
+    NoteRequest,
+    NotePatchRequest,
+    NoteResponse,
+    NoteSearchResult,
+    NoteRevisionResponse,
+    NoteRevisionSummary,
+)
 from src.application.use_cases.note_management import NoteManagementUseCase
-from src.infrastructure.repositories.note_repository import NoteRepository
+from src.application.use_cases.note_autosave import NoteAutosaveUseCase
+from src.application.use_cases.note_history import NoteHistoryUseCase
+from src.domain.entities.note import NoteVersionConflictError
+from src.infrastructure.repositories.pagination import InvalidCursorError
+from src.infrastructure.tools.json_patch_tool import JsonPatchError
+from src.presentation.container import container
+from src.presentation.responses import model_response
+from src.presentation.websocket import websocket_manager
 
 router = APIRouter()
 
+# Validate and serialize whole pages of entities in pydantic-core
+NOTE_LIST = TypeAdapter(List[NoteResponse])
+NOTE_SEARCH_RESULTS = TypeAdapter(List[NoteSearchResult])
+
+async def publish_note_event(event: str, note: NoteResponse) -> None:
+    """Tell the subscribers of a note and of its video that the note changed."""
+    message = {"type": event, "data": note.model_dump(mode="json")}
+    await websocket_manager.publish(f"note:{note.id}", message)
+    await websocket_manager.publish(f"video:{note.video_id}", message)
+
+
 # Dependencies
+async def get_note_history_use_case() -> NoteHistoryUseCase:
+    """Dependency for NoteHistoryUseCase."""
+    return container.note_history
+
+
 async def get_note_use_case() -> NoteManagementUseCase:
     """Dependency for NoteManagementUseCase."""
-    note_repository = NoteRepository()
-    return NoteManagementUseCase(note_repository)
+    return container.note_management
+
+
+async def get_autosave_use_case() -> NoteAutosaveUseCase:
+    """Dependency for NoteAutosaveUseCase; one instance so edits to a note are coalesced in one place."""
+    return container.note_autosave
 
 
 @router.post("/save", response_model=NoteResponse)
@@ -36,19 +72,44 @@ async def save_note(
             detail="Failed to save note. Please check the video URL and try again.",
         )
     
-    return NoteResponse(**saved_note)
+    response = NoteResponse.model_validate(saved_note)
+    await publish_note_event("note_created", response)
+    return response
 
 
 @router.get("/list", response_model=List[NoteResponse])
 async def list_notes_for_video(
     video_url: str = Query(..., description="YouTube video URL"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum number of notes"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+    use_case: NoteManagementUseCase = Depends(get_note_use_case),
+):
+    """
+    Get a page of notes for a video.
+    
+    When more notes exist, the cursor of the next page is returned in the
+    X-Next-Cursor header.
+    """
+    try:
+        notes, next_cursor = await use_case.get_notes_for_video(video_url, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return model_response(NOTE_LIST, notes, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
+@router.get("/notes/search", response_model=List[NoteSearchResult])
+async def search_notes(
+    q: str = Query(..., min_length=1, description="Search query"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    video_url: Optional[str] = Query(None, description="Restrict results to a YouTube video"),
     use_case: NoteManagementUseCase = Depends(get_note_use_case),
 ):
     """
-    Get all notes for a video.
+    Semantic search across notes.
     """
-    notes = await use_case.get_notes_for_video(video_url)
-    return [NoteResponse(**note) for note in notes]
+    results = await use_case.search_notes(q, limit, video_url)
+    return model_response(NOTE_SEARCH_RESULTS, results)
 
 
 @router.put("/{note_id}", response_model=NoteResponse)
@@ -79,4 +140,137 @@ async def update_note(
             detail=f"Note with ID {note_id} not found.",
         )
     
-    return NoteResponse(**updated_note)
+    response = NoteResponse.model_validate(updated_note)
+    await publish_note_event("note_updated", response)
+    return response
+
+
+@router.patch("/{note_id}", response_model=NoteResponse)
+async def patch_note(
+    request: NotePatchRequest,
+    note_id: int = Path(..., description="Note ID"),
+    use_case: NoteManagementUseCase = Depends(get_note_use_case),
+):
+    """
+    Partially update a note's content with JSON Patch or Lexical operations.
+    """
+    try:
+        patched_note = await use_case.patch_note(
+            note_id=note_id,
+            operations=request.operations,
+            version=request.version,
+        )
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except NoteVersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if not patched_note:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Note with ID {note_id} not found.",
+        )
+    
+    response = NoteResponse.model_validate(patched_note)
+    await publish_note_event("note_updated", response)
+    return response
+
+
+@router.get("/{note_id}/revisions", response_model=List[NoteRevisionSummary])
+async def list_note_revisions(
+    note_id: int = Path(..., description="Note ID"),
+    note_history: NoteHistoryUseCase = Depends(get_note_history_use_case),
+):
+    """
+    List the recorded versions of a note.
+    """
+    revisions = await note_history.list_revisions(note_id)
+    return [NoteRevisionSummary(**revision) for revision in revisions]
+
+
+@router.get("/{note_id}/revisions/{version}", response_model=NoteRevisionResponse)
+async def get_note_revision(
+    note_id: int = Path(..., description="Note ID"),
+    version: int = Path(..., description="Version to reconstruct"),
+    note_history: NoteHistoryUseCase = Depends(get_note_history_use_case),
+):
+    """
+    Get a note's content as it was at a recorded version.
+    """
+    content = await note_history.get_note_at_version(note_id, version)
+    
+    if content is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Version {version} of note {note_id} not found.",
+        )
+    
+    return NoteRevisionResponse(note_id=note_id, version=version, content=content)
+
+
+@router.websocket("/notes/{note_id}/autosave")
+async def autosave_note(
+    websocket: WebSocket,
+    note_id: int,
+    autosave: NoteAutosaveUseCase = Depends(get_autosave_use_case),
+):
+    """
+    Stream edits for a note; they are merged in memory and written on a debounce.
+    
+    Clients send ``{"type": "edit", "data": {"version": n, "operations": [...]}}``
+    and ``{"type": "flush"}``. The server replies with ``snapshot``, ``ack``,
+    ``saved``, ``conflict``, ``edit`` (from other clients) and ``error`` messages.
+    A ``conflict`` raised by a write carries the stored version and content,
+    and under ``unsaved`` the edits that were not written, as JSON Patch
+    operations against ``unsaved.base_version``.
+    """
+    await websocket.accept()
+    client_id = str(uuid.uuid4())
+    
+    snapshot = await autosave.join(note_id, client_id, websocket.send_json)
+    if not snapshot:
+        await websocket.send_json({"type": "error", "data": {"message": f"Note with ID {note_id} not found."}})
+        await websocket.close()
+        return
+    
+    await websocket.send_json({"type": "snapshot", "data": snapshot})
+    
+    try:
+        while True:
+            message = await websocket.receive_json()
+            message_type = message.get("type")
+            data = message.get("data") or {}
+            
+            if message_type == "edit":
+                try:
+                    version = await autosave.apply_edit(
+                        note_id, client_id, data.get("operations"), data.get("version")
+                    )
+                    await websocket.send_json({"type": "ack", "data": {"version": version}})
+                except JsonPatchError as e:
+                    await websocket.send_json({"type": "error", "data": {"message": str(e)}})
+                except NoteVersionConflictError:
+                    # Also raised once the client dropped out of the session: joining again resyncs it
+                    snapshot = await autosave.join(note_id, client_id, websocket.send_json)
+                    if not snapshot:
+                        await websocket.send_json({
+                            "type": "error",
+                            "data": {"message": f"Note with ID {note_id} not found."},
+                        })
+                        await websocket.close()
+                        break
+                    await websocket.send_json({"type": "conflict", "data": snapshot})
+            
+            elif message_type == "flush":
+                version = await autosave.flush(note_id)
+                await websocket.send_json({"type": "saved", "data": {"version": version}})
+            
+            else:
+                await websocket.send_json({
+                    "type": "error",
+                    "data": {"message": f"Unknown message type: {message_type}"},
+                })
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await autosave.leave(note_id, client_id)
@@ -0,0 +1,79 @@
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from ...infrastructure.repositories.stats_repository import StatsRepository, SERIES_METRICS
+
+router = APIRouter(tags=["stats"])
+
+# Longest series served, in buckets
+MAX_BUCKETS = {"hour": 24 * 14, "day": 366}
+
+class DownloadFormatStats(BaseModel):
+    completed: int
+    failed: int
+    bytes: int
+
+class DownloadStats(BaseModel):
+    completed: int
+    failed: int
+    bytes: int
+    by_format: Dict[str, DownloadFormatStats]
+
+class NoteStats(BaseModel):
+    total: int
+
+class ChatStats(BaseModel):
+    total: int
+    by_language: Dict[str, int]
+
+class StatsResponse(BaseModel):
+    downloads: DownloadStats
+    notes: NoteStats
+    chats: ChatStats
+
+class StatsPoint(BaseModel):
+    bucket: str
+    count: int
+    bytes: int
+    by_format: Optional[Dict[str, int]] = None
+    by_language: Optional[Dict[str, int]] = None
+
+class VideoStatsResponse(BaseModel):
+    video_id: str
+    notes: int
+    chats: int
+
+@router.get("/stats")
+async def get_stats() -> StatsResponse:
+    """Get all-time usage totals."""
+    try:
+        return StatsResponse(**await StatsRepository.get_summary())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving statistics: {str(e)}")
+
+@router.get("/stats/series")
+async def get_stats_series(
+    metric: str = Query(..., description=f"One of: {', '.join(SERIES_METRICS)}"),
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+    buckets: int = Query(30, ge=1, description="Number of buckets up to the current one"),
+) -> List[StatsPoint]:
+    """Get hourly or daily values of a usage metric."""
+    if metric not in SERIES_METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric: {metric}")
+    if buckets > MAX_BUCKETS[bucket]:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BUCKETS[bucket]} {bucket} buckets")
+
+    try:
+        return [StatsPoint(**point) for point in await StatsRepository.get_series(metric, bucket, buckets)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving statistics: {str(e)}")
+
+@router.get("/stats/videos/{video_id}")
+async def get_video_stats(video_id: str) -> VideoStatsResponse:
+    """Get the number of notes and chat messages of a video."""
+    try:
+        return VideoStatsResponse(**await StatsRepository.get_video_stats(video_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving statistics: {str(e)}")
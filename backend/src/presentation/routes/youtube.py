@@ -1,27 +1,44 @@
 
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, Query
-from pydantic import BaseModel, HttpUrl
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, Header, Query, Response
+from pydantic import BaseModel, ConfigDict, HttpUrl
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 import asyncio
+import json
 
 from ...application.use_cases.youtube_analysis import YoutubeAnalysisUseCase
-from ...domain.entities.video import VideoMetadata, VideoFormat, VideoDownloadRequest
-from ...domain.entities.download import DownloadHistory
+from ...models.youtube import DownloadRequest
+from ...infrastructure.repositories.history_repository import HistoryRepository
+from ...infrastructure.repositories.pagination import InvalidCursorError
 from ...infrastructure.tools.download_tool import DownloadTool
-from ..websocket import WebSocketManager
+from ..container import container
+from ..lifecycle import ShuttingDownError, lifecycle
+from ..responses import cache_headers, etag_matches, json_response, not_modified
+from ..websocket import InvalidTopicError, websocket_manager
 
 router = APIRouter(prefix="/youtube", tags=["youtube"])
-websocket_manager = WebSocketManager()
+
+# Cache lifetimes per endpoint; clients and CDNs revalidate with the ETag afterwards.
+# Titles and thumbnails can still be edited, formats and transcripts hardly change.
+METADATA_CACHE_CONTROL = "public, max-age=3600"
+FORMATS_CACHE_CONTROL = "public, max-age=86400"
+TRANSCRIPT_CACHE_CONTROL = "public, max-age=604800"
+
+# Dependencies
+async def get_analysis_use_case() -> YoutubeAnalysisUseCase:
+    """Dependency for YoutubeAnalysisUseCase."""
+    return container.youtube_analysis
 
 # Models for responses
 class VideoResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     platform: str
     video_id: str
     title: str
     thumbnail: Optional[str] = None
     duration: Optional[int] = None
-    upload_date: Optional[str] = None
+    upload_date: Optional[datetime] = None
     channel: Optional[str] = None
 
 class FormatResponse(BaseModel):
@@ -37,6 +54,7 @@ class FormatsResponse(BaseModel):
     title: str
 
 class DownloadResponse(BaseModel):
+    download_id: Optional[int] = None
     file_url: str
     title: str
     size: Optional[int] = None
@@ -76,38 +94,53 @@ class DownloadHistoryResponse(BaseModel):
 
 # Routes
 @router.get("/metadata")
-async def get_metadata(url: HttpUrl, analysis_use_case: YoutubeAnalysisUseCase = Depends()) -> VideoResponse:
+async def get_metadata(
+    url: HttpUrl,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    analysis_use_case: YoutubeAnalysisUseCase = Depends(get_analysis_use_case),
+) -> VideoResponse:
     """Get metadata for a YouTube video."""
-    metadata = await analysis_use_case.extract_video_metadata(url)
-    if not metadata:
+    if if_none_match:
+        etag = await analysis_use_case.get_video_etag(str(url))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, METADATA_CACHE_CONTROL)
+    
+    video = await analysis_use_case.get_video_metadata(str(url))
+    if not video:
         raise HTTPException(status_code=404, detail="Could not extract video metadata")
-    return metadata
+    if video.etag:
+        response.headers.update(cache_headers(video.etag, METADATA_CACHE_CONTROL))
+    return VideoResponse.model_validate(video)
 
-@router.post("/formats")
-async def get_formats(request: dict) -> FormatsResponse:
+@router.get("/formats", response_model=FormatsResponse)
+async def get_formats(
+    url: HttpUrl,
+    if_none_match: Optional[str] = Header(None),
+    analysis_use_case: YoutubeAnalysisUseCase = Depends(get_analysis_use_case),
+) -> Response:
     """Get available formats for a YouTube video."""
-    video_url = request.get("video_url")
-    if not video_url:
-        raise HTTPException(status_code=400, detail="Missing video_url parameter")
+    if if_none_match:
+        etag = await analysis_use_case.get_formats_etag(str(url))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, FORMATS_CACHE_CONTROL)
     
-    formats_info = await DownloadTool.get_available_formats(video_url)
-    if not formats_info:
+    video_formats = await analysis_use_case.get_video_formats(str(url))
+    if not video_formats:
         raise HTTPException(status_code=404, detail="Could not extract format information")
     
-    return FormatsResponse(**formats_info)
+    return json_response(
+        {"formats": video_formats.formats, "video_id": video_formats.video_id, "title": video_formats.title},
+        cache_headers(video_formats.etag, FORMATS_CACHE_CONTROL),
+    )
 
 @router.post("/download")
-async def download_video(request: VideoDownloadRequest) -> DownloadResponse:
-    """Download a YouTube video."""
-    # This would actually download the video and store a history record
-    # For now, we'll simulate the response
-    
-    # In a real implementation, you would:
-    # 1. Download the video using DownloadTool
-    # 2. Store download history in database
-    # 3. Return download information
-    
-    download_info = await DownloadTool.download_video(
+async def download_video(
+    request: DownloadRequest,
+    analysis_use_case: YoutubeAnalysisUseCase = Depends(get_analysis_use_case),
+) -> DownloadResponse:
+    """Download a YouTube video, recording its progress in the download history."""
+    download_info = await analysis_use_case.download_video(
         request.video_url,
         request.format,
         request.resolution,
@@ -116,22 +149,10 @@ async def download_video(request: VideoDownloadRequest) -> DownloadResponse:
     if not download_info:
         raise HTTPException(status_code=500, detail="Download failed")
     
-    # Create simulated response
-    response = DownloadResponse(
-        file_url=f"/downloads/{download_info['video_id']}.{download_info['format']}",
-        title=download_info['title'],
-        size=download_info.get('file_size'),
-        format=download_info['format'],
-        resolution=download_info.get('resolution')
-    )
-    
-    # In a real implementation, you would save this to your database
-    # downloads_repository.save_download_history(...)
-    
-    return response
+    return DownloadResponse(**download_info)
 
 @router.get("/playlist")
-async def get_playlist(url: HttpUrl, analysis_use_case: YoutubeAnalysisUseCase = Depends()) -> PlaylistResponse:
+async def get_playlist(url: HttpUrl, analysis_use_case: YoutubeAnalysisUseCase = Depends(get_analysis_use_case)) -> PlaylistResponse:
     """Get metadata for a YouTube playlist."""
     playlist_info = await DownloadTool.get_playlist_info(str(url))
     if not playlist_info:
@@ -162,122 +183,115 @@ async def download_playlist(request: dict) -> BatchDownloadResponse:
     task_id = "task_" + datetime.now().strftime("%Y%m%d%H%M%S")
     total_videos = len(playlist_info["videos"])
     
-    # Just for simulation, we'll create a task that sends WebSocket updates
-    asyncio.create_task(
-        simulate_batch_download(task_id, playlist_info, format_type, resolution)
-    )
+    # Just for simulation, we'll create a task that sends WebSocket updates;
+    # tracked so shutdown waits for it instead of dropping it
+    try:
+        lifecycle.spawn(
+            simulate_batch_download(task_id, playlist_info, format_type, resolution),
+            name=task_id,
+        )
+    except ShuttingDownError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     
     return BatchDownloadResponse(task_id=task_id, total_videos=total_videos)
 
-@router.get("/transcript")
+@router.get("/transcript", response_model=TranscriptResponse)
 async def get_transcript(
     video_id: str,
     language: str = "en",
-    analysis_use_case: YoutubeAnalysisUseCase = Depends()
-) -> TranscriptResponse:
+    if_none_match: Optional[str] = Header(None),
+    analysis_use_case: YoutubeAnalysisUseCase = Depends(get_analysis_use_case)
+) -> Response:
     """Get transcript for a YouTube video."""
+    if if_none_match:
+        etag = await analysis_use_case.get_transcript_etag(video_id, language)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, TRANSCRIPT_CACHE_CONTROL)
+    
     transcript = await analysis_use_case.get_transcript(video_id, language)
     if not transcript:
         raise HTTPException(status_code=404, detail="Transcript not found")
-        
-    return TranscriptResponse(
-        video_id=video_id,
-        language=language,
-        segments=transcript["segments"]
+    
+    # Thousands of plain segment dicts from the transcript tool, serialized as they are
+    return json_response(
+        {"video_id": video_id, "language": language, "segments": transcript.segments},
+        cache_headers(transcript.etag, TRANSCRIPT_CACHE_CONTROL),
     )
 
 @router.get("/downloads/history")
-async def get_download_history() -> List[DownloadHistoryResponse]:
+async def get_download_history(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header"),
+) -> List[DownloadHistoryResponse]:
     """Get download history."""
-    # In a real implementation, you would fetch this from a database
-    # Here, we'll return simulated data
+    try:
+        download_items, next_cursor = await HistoryRepository.get_download_history(limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Simulate download history
-    now = datetime.now()
-    history = [
-        DownloadHistoryResponse(
-            id="dl_001",
-            video_id="dQw4w9WgXcQ",
-            title="Never Gonna Give You Up",
-            thumbnail="https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg",
-            format="mp4",
-            resolution="720",
-            size=15728640,  # 15MB
-            status="completed",
-            download_date=(now - timedelta(days=1)).isoformat(),
-            file_path="/downloads/dQw4w9WgXcQ.mp4"
-        ),
-        DownloadHistoryResponse(
-            id="dl_002",
-            video_id="9bZkp7q19f0",
-            title="PSY - GANGNAM STYLE",
-            thumbnail="https://i.ytimg.com/vi/9bZkp7q19f0/hqdefault.jpg",
-            format="mp3",
-            size=5242880,  # 5MB
-            status="completed",
-            download_date=(now - timedelta(days=2)).isoformat(),
-            file_path="/downloads/9bZkp7q19f0.mp3"
-        ),
-        DownloadHistoryResponse(
-            id="dl_003",
-            playlist_id="PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI",
-            title="Top Music Videos Playlist",
-            format="mp4",
-            resolution="480",
-            status="in_progress",
-            download_date=now.isoformat()
-        ),
-        DownloadHistoryResponse(
-            id="dl_004",
-            video_id="kJQP7kiw5Fk",
-            title="Luis Fonsi - Despacito ft. Daddy Yankee",
-            thumbnail="https://i.ytimg.com/vi/kJQP7kiw5Fk/hqdefault.jpg",
-            format="mp4",
-            resolution="1080",
-            size=52428800,  # 50MB
-            status="failed",
-            download_date=(now - timedelta(hours=5)).isoformat()
-        ),
-    ]
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    return history
+    return [to_download_history_response(item) for item in download_items]
 
 @router.get("/downloads/{download_id}")
-async def get_download_details(download_id: str) -> DownloadHistoryResponse:
+async def get_download_details(download_id: int) -> DownloadHistoryResponse:
     """Get details for a specific download."""
-    # In a real implementation, you would fetch this from a database
-    # For now, we'll simulate the response
-    
-    now = datetime.now()
+    download_item = await HistoryRepository.get_download_detail(download_id)
+    if not download_item:
+        raise HTTPException(status_code=404, detail=f"Download with ID {download_id} not found")
     
-    # Just return a simulated record
-    if download_id == "dl_001":
-        return DownloadHistoryResponse(
-            id="dl_001",
-            video_id="dQw4w9WgXcQ",
-            title="Never Gonna Give You Up",
-            thumbnail="https://i.ytimg.com/vi/dQw4w9WgXcQ/hqdefault.jpg",
-            format="mp4",
-            resolution="720",
-            size=15728640,  # 15MB
-            status="completed",
-            download_date=(now - timedelta(days=1)).isoformat(),
-            file_path="/downloads/dQw4w9WgXcQ.mp4"
-        )
-    
-    # If the download_id is not found
-    raise HTTPException(status_code=404, detail=f"Download with ID {download_id} not found")
+    return to_download_history_response(download_item)
+
+def to_download_history_response(item: Dict[str, Any]) -> DownloadHistoryResponse:
+    """Convert a download history row to the response model."""
+    return DownloadHistoryResponse(
+        id=str(item["id"]),
+        video_id=item["video_id"],
+        title=item["title"],
+        thumbnail=item["thumbnail"],
+        format=item["format"],
+        resolution=item["resolution"],
+        size=item["file_size"],
+        status=item["status"],
+        download_date=item["download_date"],
+        file_path=item["file_path"],
+    )
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket connection for real-time download updates."""
+    """
+    WebSocket connection for real-time updates.
+
+    Clients receive system messages and the messages of the topics they
+    subscribe to, e.g. {"type": "subscribe", "topic": "task:<task_id>"} for
+    the progress of a batch download, "note:<id>" for changes to a note or
+    "video:<id>" for notes added to a video.
+    """
     connection_id = await websocket_manager.connect(websocket)
     
     try:
         while True:
             data = await websocket.receive_text()
-            # In a real implementation, you would process WebSocket messages here
-            await websocket_manager.send_personal_message({"type": "ack", "data": {"message": "Message received"}}, connection_id)
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            action = message.get("type") if isinstance(message, dict) else None
+            if action in ("subscribe", "unsubscribe"):
+                topic = message.get("topic")
+                try:
+                    if action == "subscribe":
+                        websocket_manager.subscribe(connection_id, topic)
+                    else:
+                        websocket_manager.unsubscribe(connection_id, topic)
+                except InvalidTopicError as e:
+                    await websocket_manager.send_personal_message({"type": "error", "data": {"message": str(e)}}, connection_id)
+                    continue
+                await websocket_manager.send_personal_message({"type": f"{action}d", "data": {"topic": topic}}, connection_id)
+            else:
+                await websocket_manager.send_personal_message({"type": "ack", "data": {"message": "Message received"}}, connection_id)
     except Exception as e:
         websocket_manager.disconnect(websocket)
 
@@ -287,25 +301,33 @@ async def simulate_batch_download(task_id: str, playlist_info: dict, format_type
     videos = playlist_info["videos"]
     total = len(videos)
     
-    for i, video in enumerate(videos):
-        # Simulate download progress
-        await websocket_manager.broadcast({
-            "type": "download_progress",
-            "data": {
-                "task_id": task_id,
-                "completed": i,
-                "failed": 0,
-                "total": total,
-                "percentage": int((i / total) * 100),
-                "current_video": video["title"]
-            }
+    try:
+        for i, video in enumerate(videos):
+            # Simulate download progress
+            await websocket_manager.publish(f"task:{task_id}", {
+                "type": "download_progress",
+                "data": {
+                    "task_id": task_id,
+                    "completed": i,
+                    "failed": 0,
+                    "total": total,
+                    "percentage": int((i / total) * 100),
+                    "current_video": video["title"]
+                }
+            })
+            
+            # Simulate download time
+            await asyncio.sleep(1)
+    except asyncio.CancelledError:
+        # Cut off by the shutdown deadline; let subscribers know rather than leave them waiting
+        await websocket_manager.publish(f"task:{task_id}", {
+            "type": "download_error",
+            "data": {"task_id": task_id, "message": "Interrupted by server shutdown"},
         })
-        
-        # Simulate download time
-        await asyncio.sleep(1)
+        raise
     
     # Final update - all complete
-    await websocket_manager.broadcast({
+    await websocket_manager.publish(f"task:{task_id}", {
         "type": "download_complete",
         "data": {
             "task_id": task_id,
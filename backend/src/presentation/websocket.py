@@ -1,58 +1,318 @@
 
+import asyncio
 import logging
-from typing import Dict, List, Any
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import orjson
 from fastapi import WebSocket
 
+from ..infrastructure.messaging.pubsub import LocalPubSub, PubSub, create_pubsub
+from ..infrastructure.monitoring.metrics import (
+    WEBSOCKET_CONNECTIONS,
+    WEBSOCKET_EVICTIONS,
+    WEBSOCKET_MESSAGES_DROPPED,
+    WEBSOCKET_MESSAGES_SENT,
+    WEBSOCKET_QUEUED_MESSAGES,
+)
+
 logger = logging.getLogger(__name__)
 
+# Only the latest of these matters, so a queued one is replaced by a newer one
+# for the same task and may be dropped when a client falls behind
+COALESCED_TYPES = {"download_progress"}
+
+# Close code for clients evicted for not keeping up ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Channels a client can subscribe to, as "<kind>:<id>", e.g. "task:task_20240101120000"
+TOPIC_KINDS = {"task", "note", "video"}
+
+
+class InvalidTopicError(ValueError):
+    """Raised when a client subscribes to a topic that is not a known channel."""
+
+
+def parse_topic(topic: Any) -> str:
+    """Check that a topic names a task, note or video channel and return it."""
+    if isinstance(topic, str):
+        kind, _, key = topic.partition(":")
+        if kind in TOPIC_KINDS and key:
+            return topic
+    raise InvalidTopicError(
+        f"Invalid topic {topic!r}, expected one of "
+        + ", ".join(f"'{kind}:<id>'" for kind in sorted(TOPIC_KINDS))
+    )
+
+
+class ClientConnection:
+    """Outbound side of one WebSocket client: a bounded queue drained by its own writer task."""
+
+    def __init__(self, connection_id: str, websocket: WebSocket, max_queue: int):
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.max_queue = max_queue
+        # Entries are [coalesce key, serialized message], mutable so a newer
+        # message for the same key can take the queued one's place
+        self.queue: Deque[List[Optional[str]]] = deque()
+        self.coalesced: Dict[str, List[Optional[str]]] = {}
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.topics: Set[str] = set()
+
+    def enqueue(self, text: str, key: Optional[str] = None) -> bool:
+        """Queue a serialized message; False if the client is too far behind to keep up."""
+        entry = self.coalesced.get(key) if key else None
+        if entry is not None:
+            entry[1] = text
+            return True
+
+        if len(self.queue) >= self.max_queue and not self._drop_oldest_coalesced():
+            return False
+
+        entry = [key, text]
+        self.queue.append(entry)
+        WEBSOCKET_QUEUED_MESSAGES.inc()
+        if key:
+            self.coalesced[key] = entry
+        self.ready.set()
+        return True
+
+    def _drop_oldest_coalesced(self) -> bool:
+        """Make room by dropping the oldest message that a newer one supersedes anyway."""
+        for entry in self.queue:
+            if entry[0]:
+                self.queue.remove(entry)
+                del self.coalesced[entry[0]]
+                self.dropped += 1
+                WEBSOCKET_QUEUED_MESSAGES.dec()
+                WEBSOCKET_MESSAGES_DROPPED.inc()
+                return True
+        return False
+
+    async def next_message(self) -> str:
+        """Wait for and take the oldest queued message."""
+        while not self.queue:
+            self.ready.clear()
+            await self.ready.wait()
+        key, text = self.queue.popleft()
+        WEBSOCKET_QUEUED_MESSAGES.dec()
+        if key:
+            del self.coalesced[key]
+        return text
+
+    def clear(self) -> None:
+        """Discard the messages still queued for a client that is gone."""
+        WEBSOCKET_QUEUED_MESSAGES.dec(len(self.queue))
+        self.queue.clear()
+        self.coalesced.clear()
+
+
 class WebSocketManager:
-    """Manager for WebSocket connections."""
-    
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+    """
+    Manager for WebSocket connections.
+
+    Topic messages are delivered to this worker's subscribers directly and
+    forwarded through the pub/sub broker to the subscribers of other workers.
+    """
+
+    def __init__(self, max_queue: int = 100, send_timeout: float = 10.0,
+                 pubsub: Optional[PubSub] = None):
+        self.pubsub = pubsub or LocalPubSub()
+        self.active_connections: Dict[str, ClientConnection] = {}
+        # Subscribers of each topic, so a message only reaches the clients that asked for it
+        self.topics: Dict[str, Set[str]] = {}
         self.connection_count = 0
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.evicted = 0
+        self._closing: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Start receiving the topic messages published by other workers."""
+        await self.pubsub.start(self._deliver)
 
     async def connect(self, websocket: WebSocket):
         """Connect a new WebSocket client."""
         await websocket.accept()
-        connection_id = str(self.connection_count)
-        self.active_connections[connection_id] = websocket
+        # Unique across workers and restarts, unlike a per-process counter
+        connection_id = uuid.uuid4().hex
+        client = ClientConnection(connection_id, websocket, self.max_queue)
+        client.writer = asyncio.create_task(self._write(client))
+        self.active_connections[connection_id] = client
         self.connection_count += 1
+        WEBSOCKET_CONNECTIONS.inc()
         logger.info(f"WebSocket client connected: {connection_id}")
-        
+
         # Send welcome message
-        await websocket.send_json({
+        client.enqueue(self._serialize({
             "type": "system",
             "data": {
                 "message": "Connected to VideoNotes API",
                 "connection_id": connection_id
             }
-        })
-        
+        }))
+
         return connection_id
 
     def disconnect(self, websocket: WebSocket):
         """Disconnect a WebSocket client."""
-        for connection_id, conn in list(self.active_connections.items()):
-            if conn == websocket:
-                self.active_connections.pop(connection_id)
+        for connection_id, client in list(self.active_connections.items()):
+            if client.websocket == websocket:
+                self._remove(client)
                 logger.info(f"WebSocket client disconnected: {connection_id}")
                 break
 
     async def send_personal_message(self, message: Dict[str, Any], connection_id: str):
         """Send a message to a specific client."""
-        if connection_id in self.active_connections:
-            await self.active_connections[connection_id].send_json(message)
+        client = self.active_connections.get(connection_id)
+        if client:
+            self._enqueue(client, self._serialize(message), self._coalesce_key(message))
         else:
             logger.warning(f"Client {connection_id} not found")
 
     async def broadcast(self, message: Dict[str, Any], exclude: List[str] = None):
-        """Broadcast a message to all clients, optionally excluding some."""
+        """
+        Broadcast a message to all clients of this worker, optionally excluding some.
+
+        The message is serialized once and queued for each client's writer,
+        so a slow client never holds up the caller or the other clients.
+        """
         exclude = exclude or []
-        for connection_id, connection in list(self.active_connections.items()):
+        text = self._serialize(message)
+        key = self._coalesce_key(message)
+        for connection_id, client in list(self.active_connections.items()):
             if connection_id not in exclude:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending message to {connection_id}: {e}")
-                    self.disconnect(connection)
+                self._enqueue(client, text, key)
+
+    def subscribe(self, connection_id: str, topic: str) -> None:
+        """Subscribe a client to a task, note or video topic."""
+        topic = parse_topic(topic)
+        client = self.active_connections.get(connection_id)
+        if client is None:
+            logger.warning(f"Client {connection_id} not found")
+            return
+        client.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(connection_id)
+
+    def unsubscribe(self, connection_id: str, topic: str) -> None:
+        """Unsubscribe a client from a topic."""
+        client = self.active_connections.get(connection_id)
+        if client is not None:
+            client.topics.discard(topic)
+        self._drop_subscriber(topic, connection_id)
+
+    async def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        """
+        Send a message to the subscribers of a topic.
+
+        Only the topic's subscribers are looked up, so the cost of a message
+        grows with its audience rather than with the number of connections.
+
+        Returns:
+            Number of clients of this worker the message was queued for
+        """
+        text = self._serialize({**message, "topic": topic})
+        key = self._coalesce_key(message)
+        recipients = self._deliver(topic, key, text)
+        await self.pubsub.publish(topic, key, text)
+        return recipients
+
+    async def close(self) -> None:
+        """Stop every client's writer and the broker."""
+        await self.pubsub.close()
+        clients = list(self.active_connections.values())
+        for client in clients:
+            self._remove(client)
+        await asyncio.gather(
+            *(client.writer for client in clients if client.writer), *self._closing,
+            return_exceptions=True,
+        )
+
+    def _deliver(self, topic: str, key: Optional[str], text: str) -> int:
+        """Queue a serialized topic message for this worker's subscribers."""
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return 0
+        recipients = 0
+        for connection_id in list(subscribers):
+            client = self.active_connections.get(connection_id)
+            if client is not None:
+                self._enqueue(client, text, key)
+                recipients += 1
+        return recipients
+
+    def _enqueue(self, client: ClientConnection, text: str, key: Optional[str]) -> None:
+        """Queue a message for a client, evicting it if its queue is full of messages it must get."""
+        if not client.enqueue(text, key):
+            self._evict(client, "send queue full")
+
+    async def _write(self, client: ClientConnection) -> None:
+        """Send a client's queued messages in order until it disconnects."""
+        while True:
+            text = await client.next_message()
+            try:
+                await asyncio.wait_for(client.websocket.send_text(text), self.send_timeout)
+                WEBSOCKET_MESSAGES_SENT.inc()
+            except asyncio.TimeoutError:
+                self._evict(client, f"send blocked for {self.send_timeout}s")
+                return
+            except Exception as e:
+                logger.error(f"Error sending message to {client.connection_id}: {e}")
+                self._remove(client)
+                return
+
+    def _evict(self, client: ClientConnection, reason: str) -> None:
+        """Drop a client that does not keep up, closing its socket in the background."""
+        logger.warning(f"Evicting slow WebSocket client {client.connection_id}: {reason}")
+        self.evicted += 1
+        WEBSOCKET_EVICTIONS.inc()
+        self._remove(client)
+        task = asyncio.create_task(self._close(client.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _remove(self, client: ClientConnection) -> None:
+        """Forget a client and stop its writer."""
+        if self.active_connections.get(client.connection_id) is client:
+            del self.active_connections[client.connection_id]
+            WEBSOCKET_CONNECTIONS.dec()
+        client.clear()
+        for topic in client.topics:
+            self._drop_subscriber(topic, client.connection_id)
+        client.topics.clear()
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    def _drop_subscriber(self, topic: str, connection_id: str) -> None:
+        """Remove a client from a topic's subscribers, forgetting topics nobody follows."""
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(connection_id)
+            if not subscribers:
+                del self.topics[topic]
+
+    async def _close(self, websocket: WebSocket) -> None:
+        """Close an evicted client's socket, giving up if even that blocks."""
+        try:
+            await asyncio.wait_for(websocket.close(code=SLOW_CONSUMER_CLOSE_CODE), self.send_timeout)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _serialize(message: Dict[str, Any]) -> str:
+        """Serialize a message to the text frame sent to every recipient."""
+        return orjson.dumps(message).decode()
+
+    @staticmethod
+    def _coalesce_key(message: Dict[str, Any]) -> Optional[str]:
+        """Key under which newer messages replace queued ones, for progress updates."""
+        if message.get("type") not in COALESCED_TYPES:
+            return None
+        return f"{message['type']}:{message.get('data', {}).get('task_id')}"
+
+
+# Shared by the routes that publish to topics, across workers as set by WS_PUBSUB_BACKEND
+websocket_manager = WebSocketManager(pubsub=create_pubsub())
@@ -0,0 +1,82 @@
+import brotli
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response
+from src.presentation.compression import CompressionMiddleware, negotiate_encoding
+from src.presentation.responses import cache_headers, json_response
+
+SEGMENTS = [{"text": f"Segment {i}", "start": i * 2.5, "duration": 2.5} for i in range(500)]
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/transcript")
+    async def transcript():
+        return json_response({"segments": SEGMENTS}, cache_headers("abc", "public, max-age=60"))
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/downloads/video.mp4")
+    async def media():
+        return Response(b"\0" * 4096, media_type="video/mp4")
+
+    return app
+
+
+async def get(app, path, accept_encoding):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+
+class TestCompressionMiddleware:
+    """Tests for the CompressionMiddleware class."""
+
+    def test_negotiate_encoding(self):
+        """Test that q-values decide and ties go to brotli."""
+        assert negotiate_encoding("gzip, deflate, br", ("br", "gzip")) == "br"
+        assert negotiate_encoding("br;q=0.5, gzip", ("br", "gzip")) == "gzip"
+        assert negotiate_encoding("br;q=0, *", ("br", "gzip")) == "gzip"
+        assert negotiate_encoding("identity", ("br", "gzip")) is None
+        assert negotiate_encoding("", ("br", "gzip")) is None
+
+    @pytest.mark.asyncio
+    async def test_compresses_large_json(self, app):
+        """Test that a large body is encoded as negotiated and keeps a weak ETag."""
+        br = await get(app, "/transcript", "gzip, br")
+        gz = await get(app, "/transcript", "gzip")
+
+        assert br.headers["content-encoding"] == "br"
+        assert gz.headers["content-encoding"] == "gzip"
+        assert br.headers["vary"] == "Accept-Encoding"
+        assert br.headers["etag"] == 'W/"abc"'
+        # httpx decodes both codings
+        assert int(br.headers["content-length"]) < len(br.content) / 4
+        assert br.json() == gz.json() == {"segments": SEGMENTS}
+
+    @pytest.mark.asyncio
+    async def test_compressed_once_for_stored_content(self, app, mocker):
+        """Test that a body with an ETag is compressed once per coding."""
+        run = mocker.spy(brotli, "Compressor")
+
+        first = await get(app, "/transcript", "br")
+        second = await get(app, "/transcript", "br")
+
+        assert first.content == second.content
+        assert run.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_passthrough(self, app):
+        """Test that small bodies and downloaded media are sent as they are."""
+        small = await get(app, "/small", "br")
+        media = await get(app, "/downloads/video.mp4", "br")
+
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in media.headers
+        assert media.content == b"\0" * 4096
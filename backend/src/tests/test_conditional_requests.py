@@ -0,0 +1,65 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from src.domain.entities.transcript import Transcript
+from src.presentation.responses import etag_matches
+from src.presentation.routes import youtube
+
+USE_CASE = "src.application.use_cases.youtube_analysis.YoutubeAnalysisUseCase"
+ETAG = "0cc175b9c0f1b6a831c399e269772661"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(youtube.router, prefix="/api")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class TestConditionalRequests:
+    """Tests for ETag revalidation of cacheable YouTube endpoints."""
+
+    def test_etag_matches(self):
+        """Test If-None-Match lists, weak tags and the wildcard."""
+        assert etag_matches(f'"other", W/"{ETAG}"', ETAG)
+        assert etag_matches("*", ETAG)
+        assert not etag_matches('"other"', ETAG)
+        assert not etag_matches("*", None)
+        assert not etag_matches(None, ETAG)
+
+    @pytest.mark.asyncio
+    async def test_transcript_is_tagged(self, client, mocker):
+        """Test that a transcript is served with its stored hash and a cache policy."""
+        mocker.patch(
+            f"{USE_CASE}.get_transcript",
+            return_value=Transcript("vid1", "en", [{"text": "hi", "start": 0.0, "duration": 1.0}], ETAG),
+        )
+        etag_lookup = mocker.patch(f"{USE_CASE}.get_transcript_etag")
+
+        async with client:
+            response = await client.get("/api/youtube/transcript", params={"video_id": "vid1"})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == f'"{ETAG}"'
+        assert response.headers["cache-control"] == youtube.TRANSCRIPT_CACHE_CONTROL
+        assert response.json()["segments"][0]["text"] == "hi"
+        etag_lookup.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_not_modified_skips_fetch(self, client, mocker):
+        """Test that a matching If-None-Match returns 304 without loading the content."""
+        mocker.patch(f"{USE_CASE}.get_formats_etag", return_value=ETAG)
+        get_formats = mocker.patch(f"{USE_CASE}.get_video_formats")
+
+        async with client:
+            response = await client.get(
+                "/api/youtube/formats",
+                params={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"},
+                headers={"If-None-Match": f'"{ETAG}"'},
+            )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == f'"{ETAG}"'
+        assert response.headers["cache-control"] == youtube.FORMATS_CACHE_CONTROL
+        get_formats.assert_not_called()
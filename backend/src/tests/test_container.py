@@ -0,0 +1,40 @@
+import pytest
+from src.presentation.container import Container, container
+from src.presentation.routes import ai, note, youtube
+
+
+class TestContainer:
+    """Tests for building use cases once and sharing them between requests."""
+
+    def test_use_cases_share_state(self):
+        """Test that use cases are wired to the same collaborators."""
+        built = Container()
+
+        assert built.note_management.note_history is built.note_history
+        assert built.note_autosave.note_history is built.note_history
+        assert built.note_autosave.note_repository is built.note_management.note_repository
+        assert built.youtube_analysis.download_tracking is built.download_tracking
+        assert built.youtube_analysis.transcript_repository is built.transcript_repository
+
+    @pytest.mark.asyncio
+    async def test_dependencies_return_the_same_instances(self):
+        """Test that every request gets the container's use cases instead of new ones."""
+        for _ in range(2):
+            assert await note.get_note_use_case() is container.note_management
+            assert await note.get_note_history_use_case() is container.note_history
+            assert await note.get_autosave_use_case() is container.note_autosave
+            assert await youtube.get_analysis_use_case() is container.youtube_analysis
+            assert await ai.get_ai_chat_use_case() is container.ai_chat
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_buffers(self, mocker):
+        """Test that closing writes buffered autosaves and download progress."""
+        built = Container()
+        flush_all = mocker.patch.object(built.note_autosave, "flush_all", mocker.AsyncMock())
+        close = mocker.patch.object(built.download_tracking, "close", mocker.AsyncMock())
+        mocker.patch("src.presentation.container.GroqService.close", mocker.AsyncMock())
+
+        await built.close()
+
+        flush_all.assert_awaited_once()
+        close.assert_awaited_once()
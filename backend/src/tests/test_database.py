@@ -0,0 +1,231 @@
+import asyncio
+import contextvars
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from src.infrastructure.db.connection import Database, Replica
+from src.presentation.read_your_writes import LAST_WRITE_COOKIE, ReadYourWritesMiddleware
+
+
+class FakeConnection:
+    """Connection returning canned rows and recording the queries it ran or prepared."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.warmed = []
+
+    async def fetch(self, query, *args):
+        self.queries.append((query, args))
+        return self.rows
+
+    async def fetchrow(self, query, *args):
+        rows = await self.fetch(query, *args)
+        return rows[0] if rows else None
+
+    async def prepare(self, query):
+        self.warmed.append(query)
+
+
+class FakePool:
+    """Pool handing out a single connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.in_use = 0
+        self.lag = 0.0
+
+    async def acquire(self):
+        self.in_use += 1
+        return self.conn
+
+    async def release(self, conn):
+        self.in_use -= 1
+
+    async def close(self):
+        pass
+
+    def get_min_size(self):
+        return 1
+
+    def get_max_size(self):
+        return 1
+
+    def get_size(self):
+        return 1
+
+    def get_idle_size(self):
+        return 1 - self.in_use
+
+    async def fetchval(self, query, timeout=None):
+        if isinstance(self.lag, Exception):
+            raise self.lag
+        return self.lag
+
+
+class TestDatabase:
+    """Tests for the statement registry of the Database class."""
+
+    @pytest.fixture
+    def database(self):
+        return Database()
+
+    def test_statement_registry(self, database):
+        """Test that names are registered once and cannot be reused for another query."""
+        statement = database.statement("notes.get", "SELECT 1")
+
+        assert database.statement("notes.get", "SELECT 1") is statement
+        with pytest.raises(ValueError):
+            database.statement("notes.get", "SELECT 2")
+
+    @pytest.mark.asyncio
+    async def test_fetch_rows(self, database):
+        """Test that statements run by their SQL text and rows are only converted unless raw."""
+        record = {"id": 1}
+        conn = FakeConnection([record])
+        database.pool = FakePool(conn)
+        statement = database.statement("notes.get", "SELECT $1::int AS id")
+
+        assert await database.fetch(statement, 1) == [{"id": 1}]
+        assert (await database.fetch(statement, 1, raw=True))[0] is record
+        assert await database.fetchone("SELECT 1") == {"id": 1}
+        assert conn.queries[0] == ("SELECT $1::int AS id", (1,))
+
+    @pytest.mark.asyncio
+    async def test_connect_creates_one_pool(self, database, mocker):
+        """Test that concurrent first queries share a single, warmed up pool."""
+        conn = FakeConnection([{"id": 1}])
+        create_pool = mocker.patch(
+            "src.infrastructure.db.connection.asyncpg.create_pool",
+            side_effect=lambda *args, **kwargs: asyncio.sleep(0.01, result=FakePool(conn)),
+        )
+        statement = database.statement("notes.get", "SELECT 1")
+
+        await asyncio.gather(*(database.fetch(statement) for _ in range(5)))
+
+        assert create_pool.call_count == 1
+        assert create_pool.call_args.kwargs["statement_cache_size"] == 101
+        assert conn.warmed == ["SELECT 1"]
+
+    @pytest.mark.asyncio
+    async def test_stats(self, database):
+        """Test that acquires are counted and in-use connections reported."""
+        database.pool = FakePool(FakeConnection([]))
+
+        async with database._acquire():
+            assert database.stats()["in_use"] == 1
+
+        stats = database.stats()
+        assert stats["in_use"] == 0 and stats["idle"] == 1
+        assert stats["acquire_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_release_after_disconnect(self, database):
+        """Test that a connection is returned to its own pool when disconnect runs meanwhile."""
+        pool = FakePool(FakeConnection([]))
+        database.pool = pool
+
+        async with database._acquire():
+            await database.disconnect()
+
+        assert pool.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_query_metrics(self, database):
+        """Test that queries are timed under their statement name, text queries under one label."""
+        database.pool = FakePool(FakeConnection([{"id": 1}]))
+        statement = database.statement("metrics.get", "SELECT 1")
+        count = lambda name, operation: REGISTRY.get_sample_value(
+            "yougen_db_query_seconds_count", {"statement": name, "operation": operation}
+        ) or 0
+        before = count("metrics.get", "fetch"), count("unregistered", "fetchone")
+
+        await database.fetch(statement)
+        await database.fetch(statement)
+        await database.fetchone("SELECT 2")
+
+        assert count("metrics.get", "fetch") == before[0] + 2
+        assert count("unregistered", "fetchone") == before[1] + 1
+
+    @pytest.mark.asyncio
+    async def test_read_replica_routing(self, database):
+        """Test that reads use a replica except shortly after a write in the same context."""
+        primary, replica = FakeConnection([]), FakeConnection([])
+        database.pool = FakePool(primary)
+        database.replicas = [Replica("replica:5432", FakePool(replica))]
+
+        async with database._acquire(read_only=True) as conn:
+            assert conn is replica
+
+        async with database._acquire() as conn:
+            assert conn is primary
+        async with database._acquire(read_only=True) as conn:
+            assert conn is primary
+
+        database.read_your_writes_window = 0
+        async with database._acquire() as conn:
+            pass
+        async with database._acquire(read_only=True) as conn:
+            assert conn is replica
+
+    @pytest.mark.asyncio
+    async def test_read_your_writes_across_requests(self, database):
+        """Test that a client's reads after its write stay on the primary in its next requests."""
+        primary, replica = FakeConnection([]), FakeConnection([])
+        database.pool = FakePool(primary)
+        database.replicas = [Replica("replica:5432", FakePool(replica))]
+
+        async def write(request):
+            async with database._acquire():
+                return PlainTextResponse("written")
+
+        async def read(request):
+            async with database._acquire(read_only=True) as conn:
+                return PlainTextResponse("primary" if conn is primary else "replica")
+
+        app = Starlette(routes=[Route("/write", write, methods=["POST"]), Route("/read", read)])
+        app.add_middleware(ReadYourWritesMiddleware, database=database)
+
+        # Each request runs in a fresh context, as it does under a server
+        async def request(client, method, url, **kwargs):
+            return await asyncio.create_task(client.request(method, url, **kwargs), context=contextvars.Context())
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client, \
+                httpx.AsyncClient(transport=transport, base_url="http://test") as other:
+            assert (await request(client, "GET", "/read")).text == "replica"
+            assert LAST_WRITE_COOKIE not in client.cookies
+
+            assert LAST_WRITE_COOKIE in (await request(client, "POST", "/write")).headers["set-cookie"]
+            assert (await request(client, "GET", "/read")).text == "primary"
+            # Another client did not write
+            assert (await request(other, "GET", "/read")).text == "replica"
+
+            database.read_your_writes_window = 0
+            assert (await request(client, "GET", "/read")).text == "replica"
+
+    @pytest.mark.asyncio
+    async def test_check_replicas(self, database):
+        """Test that lagging or unreachable replicas are ejected and readmitted once caught up."""
+        database.pool = FakePool(FakeConnection([]))
+        replica = Replica("replica:5432", FakePool(FakeConnection([])))
+        database.replicas = [replica]
+        database.replica_max_lag = 5.0
+
+        replica.pool.lag = 30.0
+        await database.check_replicas()
+        assert not replica.healthy
+        async with database._acquire(read_only=True) as conn:
+            assert conn is database.pool.conn
+
+        replica.pool.lag = OSError("connection refused")
+        await database.check_replicas()
+        assert not replica.healthy and replica.lag_seconds is None
+
+        replica.pool.lag = 0.5
+        await database.check_replicas()
+        assert replica.healthy and replica.lag_seconds == 0.5
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from src.application.use_cases.download_tracking import DownloadTrackingUseCase
+
+
+class InMemoryDownloadRepository:
+    """Download repository recording each batch of updates."""
+
+    def __init__(self):
+        self.next_id = 0
+        self.batches = []
+        self.fail_next = False
+        self.delay = 0.0
+
+    async def create_download(self, video_id, format_type, resolution=None):
+        self.next_id += 1
+        return self.next_id
+
+    async def apply_updates(self, updates):
+        await asyncio.sleep(self.delay)
+        if self.fail_next:
+            self.fail_next = False
+            raise ConnectionError("database unavailable")
+        self.batches.append({u.download_id: u for u in updates})
+
+    async def fail_stale_downloads(self, stale_seconds, error):
+        return 0
+
+
+class TestDownloadTrackingUseCase:
+    """Tests for the DownloadTrackingUseCase class."""
+
+    @pytest.fixture
+    def repository(self):
+        return InMemoryDownloadRepository()
+
+    @pytest.fixture
+    def tracking(self, repository):
+        tracking = DownloadTrackingUseCase(repository)
+        tracking.FLUSH_SECONDS = 60
+        return tracking
+
+    @pytest.mark.asyncio
+    async def test_progress_is_coalesced(self, tracking, repository):
+        """Test that progress events of several downloads become one batched write."""
+        first = await tracking.start("vid1", "mp4", "720")
+        second = await tracking.start("vid2", "mp3")
+        for downloaded in range(0, 1000, 10):
+            tracking.progress(first, downloaded, 1000)
+            tracking.progress(second, downloaded // 2)
+        assert repository.batches == []
+
+        await tracking.flush()
+
+        assert len(repository.batches) == 1
+        batch = repository.batches[0]
+        assert batch[first].status == "in_progress"
+        assert batch[first].started_at is not None
+        assert (batch[first].bytes_downloaded, batch[first].total_bytes) == (990, 1000)
+        assert batch[second].bytes_downloaded == 495
+
+    @pytest.mark.asyncio
+    async def test_finish_writes_immediately(self, tracking, repository):
+        """Test that completion and failure are written right away and end tracking."""
+        done = await tracking.start("vid1", "mp4", "720")
+        broken = await tracking.start("vid2", "mp4", "720")
+        tracking.progress(done, 10, 20)
+
+        await tracking.complete(done, "/downloads/vid1.mp4", 20)
+        await tracking.fail(broken, "unavailable")
+        tracking.progress(done, 5, 20)
+
+        assert [batch[done].status for batch in repository.batches[:1]] == ["completed"]
+        assert repository.batches[0][done].bytes_downloaded == 10
+        assert repository.batches[1][broken].error == "unavailable"
+        assert tracking.pending == {}
+        assert tracking.active == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried(self, tracking, repository):
+        """Test that a failed batch is kept and merged with newer progress."""
+        download_id = await tracking.start("vid1", "mp4", "720")
+        tracking.progress(download_id, 10, 100)
+        repository.fail_next = True
+
+        await tracking.flush()
+        tracking.progress(download_id, 50, 100)
+        await tracking.flush()
+
+        update = repository.batches[0][download_id]
+        assert update.status == "in_progress"
+        assert update.bytes_downloaded == 50
+
+    @pytest.mark.asyncio
+    async def test_close_waits_for_background_flush(self, tracking, repository):
+        """Test that a flush started by a full buffer is kept and awaited on close."""
+        tracking.MAX_PENDING = 2
+        repository.delay = 0.05
+        first = await tracking.start("vid1", "mp4", "720")
+        second = await tracking.start("vid2", "mp4", "720")
+        tracking.progress(first, 10, 100)
+        tracking.progress(second, 20, 100)
+
+        assert len(tracking._flushes) == 1
+
+        await tracking.close()
+
+        assert not tracking._flushes
+        assert list(repository.batches[0]) == [first, second]
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_keeps_quiet_downloads_alive(self, tracking, repository):
+        """Test that running downloads without progress are still written, until they finish."""
+        tracking.HEARTBEAT_SECONDS = 0.01
+        tracking.FLUSH_SECONDS = 0.01
+        download_id = await tracking.start("vid1", "mp4", "720")
+
+        await asyncio.sleep(0.05)
+
+        assert repository.batches
+        assert repository.batches[0][download_id].status is None
+
+        await tracking.complete(download_id, "/downloads/vid1.mp4", 20)
+        await asyncio.sleep(0.05)
+
+        assert tracking.heartbeat_handle is None
+        assert repository.batches[-1][download_id].status == "completed"
@@ -0,0 +1,35 @@
+import math
+from src.infrastructure.services.embedding_service import EmbeddingService
+from src.infrastructure.repositories.note_repository import NoteRepository
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class TestEmbeddingService:
+    """Tests for the EmbeddingService class."""
+
+    def test_embed_normalized_and_stable(self):
+        """Test that embeddings are unit length and deterministic."""
+        vector = EmbeddingService.embed("Gradient descent minimizes the loss function")
+
+        assert len(vector) == EmbeddingService.DIMENSIONS
+        assert math.isclose(math.sqrt(cosine(vector, vector)), 1.0)
+        assert vector == EmbeddingService.embed("gradient DESCENT minimizes the loss function!")
+
+    def test_embed_similarity(self):
+        """Test that related texts are closer than unrelated ones."""
+        query = EmbeddingService.embed("loss function gradient")
+        related = EmbeddingService.embed("The gradient of the loss function tells us the direction")
+        unrelated = EmbeddingService.embed("Bake the bread at two hundred degrees for an hour")
+
+        assert cosine(query, related) > cosine(query, unrelated)
+
+    def test_empty_text_stored_as_null(self):
+        """Test that text without tokens produces no stored embedding."""
+        vector = EmbeddingService.embed("  ...  ")
+
+        assert not any(vector)
+        assert NoteRepository._vector_literal(vector) is None
+        assert NoteRepository._vector_literal([0.5, 0.0, -0.25]) == "[0.5,0,-0.25]"
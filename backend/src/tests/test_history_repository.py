@@ -0,0 +1,37 @@
+import pytest
+from datetime import datetime
+from src.infrastructure.repositories.history_repository import HistoryRepository
+from src.infrastructure.repositories.pagination import decode_cursor
+
+
+class TestHistoryRepository:
+    """Tests for the HistoryRepository class."""
+
+    @pytest.mark.asyncio
+    async def test_get_user_history_page(self, mocker):
+        """Test that history is read from the async pool one page at a time."""
+        rows = [
+            {
+                "id": note_id,
+                "content_text": f"note {note_id}",
+                "created_at": datetime(2026, 1, note_id),
+                "updated_at": datetime(2026, 2, note_id),
+                "video_id": "dQw4w9WgXcQ",
+                "title": "Video",
+            }
+            for note_id in (3, 2, 1)
+        ]
+        fetch = mocker.patch(
+            "src.infrastructure.repositories.history_repository.db.fetch",
+            return_value=rows,
+        )
+
+        items, cursor = await HistoryRepository.get_user_history(limit=2)
+
+        assert fetch.call_args.args[1:] == (3,)
+        assert [item["id"] for item in items] == [3, 2]
+        assert items[0]["updated_at"] == "2026-02-03T00:00:00"
+        assert decode_cursor(cursor, (datetime, int)) == [datetime(2026, 2, 2), 2]
+
+        await HistoryRepository.get_user_history(limit=2, cursor=cursor)
+        assert fetch.call_args.args[1:] == (datetime(2026, 2, 2), 2, 3)
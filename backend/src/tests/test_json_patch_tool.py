@@ -0,0 +1,199 @@
+from dataclasses import replace
+
+import pytest
+from src.application.use_cases.note_management import NoteManagementUseCase
+from src.domain.entities.note import Note, NoteVersionConflictError
+from src.infrastructure.repositories.note_repository import NoteRepository
+from src.infrastructure.tools.json_patch_tool import JsonPatchTool, JsonPatchError
+
+
+class TestJsonPatchTool:
+    """Tests for the JsonPatchTool class."""
+
+    @pytest.mark.parametrize(
+        "pointer,tokens",
+        [
+            ("", []),
+            ("/root/children/0", ["root", "children", "0"]),
+            ("/a~1b/c~0d", ["a/b", "c~d"]),
+        ],
+    )
+    def test_parse_pointer(self, pointer, tokens):
+        """Test splitting JSON pointers into tokens."""
+        assert JsonPatchTool.parse_pointer(pointer) == tokens
+        assert JsonPatchTool.to_pointer(tokens) == pointer
+
+    def test_normalize_lexical_operations(self):
+        """Test translating Lexical-level operations into JSON Patch."""
+        block = {"type": "paragraph", "children": []}
+        operations = [
+            {"op": "insert_block", "index": 2, "block": block},
+            {"op": "remove_block", "index": 0},
+            {"op": "set_text", "path": [1, 0], "text": "hello"},
+        ]
+
+        assert JsonPatchTool.normalize(operations) == [
+            {"op": "add", "path": "/root/children/2", "value": block},
+            {"op": "remove", "path": "/root/children/0"},
+            {"op": "replace", "path": "/root/children/1/children/0/text", "value": "hello"},
+        ]
+
+    @pytest.mark.parametrize(
+        "operations",
+        [
+            [],
+            [{"op": "delete", "path": "/root"}],
+            [{"op": "add", "path": "/root"}],
+            [{"op": "move", "path": "/root/a"}],
+            [{"op": "replace", "path": "root", "value": 1}],
+            [{"op": "remove_block", "index": -1}],
+        ],
+    )
+    def test_normalize_invalid(self, operations):
+        """Test rejecting malformed operations."""
+        with pytest.raises(JsonPatchError):
+            JsonPatchTool.normalize(operations)
+
+    def test_compile_patch(self):
+        """Test compiling a patch into parameterized steps that only match when it applies."""
+        params = [7, 3]
+        steps = NoteRepository._compile_patch(
+            [
+                {"op": "test", "path": "/root/children/0/type", "value": "paragraph"},
+                {"op": "replace", "path": "/root/children/0/children/0/text", "value": "hi"},
+                {"op": "add", "path": "/root/children/-", "value": {"type": "paragraph"}},
+                {"op": "remove", "path": "/root/children/1"},
+            ],
+            params,
+        )
+
+        assert steps == [
+            "SELECT doc AS doc FROM patch_0 WHERE (doc #> $3::text[]) = $4::text::jsonb",
+            "SELECT jsonb_set(doc, $6::text[], $7::text::jsonb, false) AS doc FROM patch_1 "
+            "WHERE (doc #> $5::text[]) IS NOT NULL",
+            "SELECT jsonb_insert(doc, $10::text[], $8::text::jsonb, true) AS doc FROM patch_2 "
+            "WHERE jsonb_typeof((doc #> $9::text[])) = 'array'",
+            "SELECT (doc #- $12::text[]) AS doc FROM patch_3 WHERE (doc #> $11::text[]) IS NOT NULL",
+        ]
+        assert params[3] == '"paragraph"'
+        assert params[9] == ["root", "children", "-1"]
+        assert params[11] == ["root", "children", "1"]
+
+    @pytest.mark.parametrize("op", ["add", "replace", "test"])
+    def test_compile_patch_null_value(self, op):
+        """Test that a JSON null value is bound as JSON text rather than SQL NULL."""
+        params = [7, 3]
+        NoteRepository._compile_patch([{"op": op, "path": "/root/direction", "value": None}], params)
+
+        assert None not in params
+        assert "null" in params
+
+    def test_compile_patch_canonical_indexes(self):
+        """Test that tokens Postgres would read as non-canonical array indexes must name object members."""
+        params = [7, 3]
+        steps = NoteRepository._compile_patch(
+            [{"op": "remove", "path": "/root/children/-1"}, {"op": "replace", "path": "/root/children/01", "value": 1}],
+            params,
+        )
+
+        assert steps[0].startswith("SELECT (doc #- $5::text[]) AS doc FROM patch_0 WHERE jsonb_typeof(doc #> $3::text[]) = 'object'")
+        assert params[2] == ["root", "children"]
+        assert "jsonb_typeof(doc #> $6::text[]) = 'object'" in steps[1]
+
+    def test_compile_patch_size_is_linear(self):
+        """Test that copies and moves refer to the previous step instead of repeating it."""
+        operations = [
+            {"op": "copy", "from": "/root/children/0", "path": "/root/meta/copy"},
+            {"op": "move", "from": "/root/meta/copy", "path": "/root/meta/moved"},
+        ] * (JsonPatchTool.MAX_OPERATIONS // 2)
+
+        steps = NoteRepository._compile_patch(operations, [7, 3])
+
+        assert len(steps) == JsonPatchTool.MAX_OPERATIONS
+        assert max(len(step) for step in steps) < 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stored_version,error", [(3, JsonPatchError), (4, NoteVersionConflictError)])
+    async def test_patch_note_rejected(self, mocker, stored_version, error):
+        """Test that a patch matching no row is a conflict only when the version moved."""
+        mocker.patch(
+            "src.infrastructure.repositories.note_repository.db.fetchone",
+            side_effect=[None, {"version": stored_version}],
+        )
+
+        with pytest.raises(error):
+            await NoteRepository().patch_note(
+                7, [{"op": "replace", "path": "/root/missing", "value": 1}], 3, {"root": {}}
+            )
+
+    @pytest.mark.asyncio
+    async def test_patch_note_single_write(self, mocker):
+        """Test that a patch is checked locally and written with its text in one statement."""
+        note = Note(video_id="vid1", content={"root": {"children": [{"type": "text", "text": "a"}]}},
+                    content_text="a", version=3, id=7)
+        repository = mocker.Mock()
+        repository.get_note_by_id = mocker.AsyncMock(return_value=note)
+        repository.patch_note = mocker.AsyncMock(side_effect=lambda *args: replace(note, content=args[3], version=4))
+        use_case = NoteManagementUseCase(repository)
+        use_case.embedding_service = mocker.Mock(embed=mocker.Mock(return_value=[0.5]))
+
+        with pytest.raises(JsonPatchError):
+            await use_case.patch_note(7, [{"op": "replace", "path": "/root/children/01/text", "value": "b"}], 3)
+        repository.patch_note.assert_not_called()
+
+        patched = await use_case.patch_note(7, [{"op": "set_text", "path": [0], "text": "b"}], 3)
+
+        assert patched.content == {"root": {"children": [{"type": "text", "text": "b"}]}}
+        repository.patch_note.assert_awaited_once()
+        assert repository.patch_note.await_args.args[4:] == ("b", [0.5])
+
+    def test_apply(self):
+        """Test applying a patch without modifying the original document."""
+        document = {"root": {"children": [{"text": "a"}, {"text": "b"}], "format": ""}}
+        patched = JsonPatchTool.apply(document, [
+            {"op": "replace", "path": "/root/children/0/text", "value": "A"},
+            {"op": "add", "path": "/root/children/-", "value": {"text": "c"}},
+            {"op": "move", "from": "/root/children/1", "path": "/root/children/0"},
+            {"op": "remove", "path": "/root/format"},
+            {"op": "test", "path": "/root/children/0/text", "value": "b"},
+        ])
+
+        assert patched == {"root": {"children": [{"text": "b"}, {"text": "A"}, {"text": "c"}]}}
+        assert document == {"root": {"children": [{"text": "a"}, {"text": "b"}], "format": ""}}
+
+    @pytest.mark.parametrize(
+        "operation",
+        [
+            {"op": "test", "path": "/root/children/0/text", "value": "z"},
+            {"op": "replace", "path": "/root/missing", "value": 1},
+            {"op": "remove", "path": "/root/children/5"},
+            {"op": "add", "path": "/root/children/01", "value": 1},
+        ],
+    )
+    def test_apply_invalid(self, operation):
+        """Test that operations on missing targets or failing tests raise."""
+        with pytest.raises(JsonPatchError):
+            JsonPatchTool.apply({"root": {"children": [{"text": "a"}]}}, [operation])
+
+    @pytest.mark.parametrize(
+        "old,new",
+        [
+            ({"a": 1, "b": [1, 2, 3]}, {"a": 2, "b": [1, 3], "c": None}),
+            ([1, 2, 3], [0, 1, 2, 3, 4]),
+            ([{"t": "a"}, {"t": "b"}, {"t": "c"}], [{"t": "a"}, {"t": "B"}, {"t": "x"}, {"t": "c"}]),
+            ([1, 2, 3, 4], [9]),
+            ({"a": 1}, [1]),
+        ],
+    )
+    def test_diff_roundtrip(self, old, new):
+        """Test that applying a diff reproduces the target document."""
+        assert JsonPatchTool.apply(old, JsonPatchTool.diff(old, new)) == new
+
+    def test_diff_single_block_insert(self):
+        """Test that inserting a block produces a single operation."""
+        old = {"root": {"children": [{"t": "a"}, {"t": "b"}]}}
+        new = {"root": {"children": [{"t": "a"}, {"t": "new"}, {"t": "b"}]}}
+
+        assert JsonPatchTool.diff(old, new) == [
+            {"op": "add", "path": "/root/children/1", "value": {"t": "new"}},
+        ]
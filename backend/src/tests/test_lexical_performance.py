@@ -0,0 +1,79 @@
+import copy
+import os
+import time
+from typing import Any, Callable, Dict
+
+import pytest
+from src.infrastructure.tools.json_patch_tool import JsonPatchTool
+from src.infrastructure.tools.lexical_tool import LexicalTool
+
+# Incremental against full text extraction of a long note after a one
+# paragraph edit, the work done on every autosave flush:
+#
+#   PERF_BENCHMARK=1 pytest -s src/tests/test_lexical_performance.py
+pytestmark = pytest.mark.skipif(
+    not os.getenv("PERF_BENCHMARK"), reason="PERF_BENCHMARK is not set"
+)
+
+ITERATIONS = int(os.getenv("PERF_ITERATIONS", "50"))
+# Required ratio of full to incremental extraction time
+MIN_SPEEDUP = float(os.getenv("PERF_MIN_SPEEDUP", "1.5"))
+
+BLOCKS = 2000
+
+
+def make_document() -> Dict[str, Any]:
+    blocks = []
+    for i in range(BLOCKS):
+        if i % 10 == 0:
+            blocks.append({"type": "heading", "tag": "h2", "children": [{"type": "text", "text": f"Section {i}"}]})
+        elif i % 10 == 5:
+            blocks.append({"type": "list", "children": [
+                {"type": "listitem", "children": [{"type": "text", "text": f"Point {i}.{j}", "format": 0}]}
+                for j in range(3)
+            ]})
+        else:
+            blocks.append({"type": "paragraph", "children": [
+                {"type": "text", "text": "Lorem ipsum dolor sit amet ", "format": 0},
+                {"type": "text", "text": f"paragraph {i}", "format": 1},
+            ]})
+    return {"root": {"type": "root", "children": blocks}}
+
+
+def seconds_per_call(extract: Callable[[], Any], prepare: Callable[[], Any] = lambda: None) -> float:
+    total = 0.0
+    for _ in range(ITERATIONS):
+        prepare()
+        started = time.perf_counter()
+        extract()
+        total += time.perf_counter() - started
+    return total / ITERATIONS
+
+
+class TestLexicalPerformance:
+    """Timing of incremental text extraction against a full walk."""
+
+    @pytest.mark.parametrize("source", ["patched", "reloaded"])
+    def test_incremental_extraction(self, source):
+        """Test that re-extracting an edited note is clearly faster than a full walk."""
+        original = make_document()
+        edited = JsonPatchTool.apply(original, JsonPatchTool.normalize([
+            {"op": "set_text", "path": [BLOCKS // 2, 0], "text": "edited"},
+        ]))
+        if source == "reloaded":
+            # As read back from the database, no block shared with the previous version
+            edited = copy.deepcopy(edited)
+
+        LexicalTool.extract_text_incremental("bench", original)
+        assert LexicalTool.extract_text_incremental("bench", edited) == LexicalTool.extract_text(edited)
+
+        full = seconds_per_call(lambda: LexicalTool.extract_text(edited))
+        incremental = seconds_per_call(
+            lambda: LexicalTool.extract_text_incremental("bench", edited),
+            # The cache holds the note as it was before the edit
+            prepare=lambda: LexicalTool.extract_text_incremental("bench", original),
+        )
+        LexicalTool.forget("bench")
+
+        print(f"\n{source}: {full * 1000:.2f} -> {incremental * 1000:.2f} ms ({full / incremental:.1f}x)")
+        assert incremental * MIN_SPEEDUP <= full
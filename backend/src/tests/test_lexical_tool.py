@@ -0,0 +1,84 @@
+import pytest
+from src.infrastructure.tools.json_patch_tool import JsonPatchTool
+from src.infrastructure.tools.lexical_tool import LexicalTool
+
+
+def text(value):
+    return {"type": "text", "text": value}
+
+
+def paragraph(*children):
+    return {"type": "paragraph", "children": list(children)}
+
+
+def document(*blocks):
+    return {"root": {"type": "root", "children": list(blocks)}}
+
+
+class TestLexicalTool:
+    """Tests for the LexicalTool class."""
+
+    def test_extract_text_all_node_types(self):
+        """Test that headings, lists, quotes and nested nodes are extracted."""
+        content = document(
+            {"type": "heading", "tag": "h1", "children": [text("Title")]},
+            paragraph(text("Hello "), text("world"), {"type": "linebreak"}, text("again")),
+            {"type": "quote", "children": [text("A quote")]},
+            {
+                "type": "list",
+                "children": [
+                    {"type": "listitem", "children": [text("first")]},
+                    {
+                        "type": "listitem",
+                        "children": [
+                            {"type": "link", "url": "https://example.com", "children": [text("linked")]},
+                        ],
+                    },
+                ],
+            },
+        )
+
+        assert LexicalTool.extract_text(content) == "Title\nHello world\nagain\nA quote\nfirst\nlinked"
+
+    @pytest.mark.parametrize("content", [None, {}, {"root": {}}, "not a document"])
+    def test_extract_text_empty(self, content):
+        """Test extracting text from empty or invalid content."""
+        assert LexicalTool.extract_text(content) == ""
+
+    def test_extract_text_deeply_nested(self):
+        """Test that deep nesting does not hit the recursion limit."""
+        node = text("deep")
+        for _ in range(5000):
+            node = {"type": "listitem", "children": [node]}
+
+        assert LexicalTool.extract_text(document(node)) == "deep"
+
+    def test_extract_text_incremental_matches_full(self, mocker):
+        """Test that incremental extraction only re-walks changed blocks."""
+        original = document(paragraph(text("one")), paragraph(text("two")), paragraph(text("three")))
+        edited = document(paragraph(text("one")), paragraph(text("TWO")), paragraph(text("three")))
+
+        LexicalTool.extract_text_incremental("note-1", original)
+        spy = mocker.spy(LexicalTool, "extract_block_text")
+        result = LexicalTool.extract_text_incremental("note-1", edited)
+
+        assert spy.call_count == 1
+        assert result == LexicalTool.extract_text(edited)
+        LexicalTool.forget("note-1")
+
+    def test_extract_text_incremental_reuses_patched_blocks(self, mocker):
+        """Test that blocks a patch left in place are reused wherever the edits are."""
+        original = document(*(paragraph(text(f"line {i}")) for i in range(10)))
+        edited = JsonPatchTool.apply(original, JsonPatchTool.normalize([
+            {"op": "set_text", "path": [1, 0], "text": "changed"},
+            {"op": "insert_block", "index": 5, "block": paragraph(text("inserted"))},
+            {"op": "remove_block", "index": 9},
+        ]))
+
+        LexicalTool.extract_text_incremental("note-2", original)
+        spy = mocker.spy(LexicalTool, "extract_block_text")
+        result = LexicalTool.extract_text_incremental("note-2", edited)
+
+        assert spy.call_count == 2
+        assert result == LexicalTool.extract_text(edited)
+        LexicalTool.forget("note-2")
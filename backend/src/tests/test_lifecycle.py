@@ -0,0 +1,59 @@
+import asyncio
+import os
+import time
+
+import pytest
+from src.infrastructure.tools.download_tool import DownloadTool
+from src.presentation.lifecycle import Lifecycle, ShuttingDownError
+
+
+class TestLifecycle:
+    """Tests for draining background work on shutdown."""
+
+    @pytest.mark.asyncio
+    async def test_shutdown_waits_then_cancels(self):
+        """Test that quick tasks finish and slow ones are cancelled at the deadline."""
+        lifecycle = Lifecycle()
+        finished, interrupted = [], []
+
+        async def work(name, seconds):
+            try:
+                await asyncio.sleep(seconds)
+                finished.append(name)
+            except asyncio.CancelledError:
+                interrupted.append(name)
+                raise
+
+        lifecycle.spawn(work("quick", 0.01))
+        lifecycle.spawn(work("slow", 10))
+        await lifecycle.shutdown(timeout=0.2)
+
+        assert finished == ["quick"]
+        assert interrupted == ["slow"]
+        assert not lifecycle.tasks
+
+    @pytest.mark.asyncio
+    async def test_spawn_refused_after_shutdown(self):
+        """Test that no background work starts once shutdown has begun."""
+        lifecycle = Lifecycle()
+        await lifecycle.shutdown(timeout=1.0)
+
+        async def work():
+            pass
+
+        coro = work()
+        with pytest.raises(ShuttingDownError):
+            lifecycle.spawn(coro)
+        assert coro.cr_frame is None  # Closed, not left unawaited
+
+    def test_remove_orphaned_files(self, tmp_path, monkeypatch):
+        """Test that only stale partial downloads are removed."""
+        monkeypatch.setattr(DownloadTool, "DOWNLOAD_DIR", str(tmp_path))
+        stale = time.time() - 3600
+        for name in ("old.mp4.part", "old.mp4.ytdl", "old.mp4", "new.mp4.part"):
+            (tmp_path / name).write_bytes(b"x")
+        for name in ("old.mp4.part", "old.mp4.ytdl", "old.mp4"):
+            os.utime(tmp_path / name, (stale, stale))
+
+        assert DownloadTool.remove_orphaned_files(max_age_seconds=600) == 2
+        assert sorted(os.listdir(tmp_path)) == ["new.mp4.part", "old.mp4"]
@@ -0,0 +1,88 @@
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+from src.infrastructure.monitoring.metrics import track_call
+from src.infrastructure.services.groq_service import GroqService
+from src.presentation.main import app
+from src.presentation.websocket import ClientConnection
+
+
+def sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+class TestMetrics:
+    """Tests for the Prometheus metrics of external calls and WebSocket queues."""
+
+    @pytest.mark.asyncio
+    async def test_track_call_outcomes(self):
+        """Test that calls are counted as ok, error or cancelled and exceptions pass through."""
+        labels = lambda outcome: {"service": "test", "operation": "call", "outcome": outcome}
+        before = [sample("yougen_external_call_seconds_count", labels(o)) for o in ("ok", "error", "cancelled")]
+
+        with track_call("test", "call"):
+            pass
+        with pytest.raises(ValueError):
+            with track_call("test", "call"):
+                raise ValueError("failed")
+
+        async def slow():
+            with track_call("test", "call"):
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        after = [sample("yougen_external_call_seconds_count", labels(o)) for o in ("ok", "error", "cancelled")]
+        assert [a - b for a, b in zip(after, before)] == [1, 1, 1]
+
+    @pytest.mark.asyncio
+    async def test_groq_token_usage(self, mocker):
+        """Test that the token usage returned by Groq is counted per model."""
+        usage = mocker.Mock(prompt_tokens=120, completion_tokens=30, total_tokens=150)
+        message = mocker.Mock(content="Answer")
+        client = mocker.Mock()
+        client.chat.completions.create = mocker.AsyncMock(
+            return_value=mocker.Mock(choices=[mocker.Mock(message=message)], usage=usage)
+        )
+        mocker.patch.object(GroqService, "get_client", return_value=client)
+        labels = lambda kind: {"model": GroqService.MODEL, "kind": kind}
+        before = sample("yougen_llm_tokens_total", labels("prompt")), sample("yougen_llm_tokens_total", labels("completion"))
+
+        response = await GroqService.chat_completion("Question")
+
+        assert response["usage"]["total_tokens"] == 150
+        assert sample("yougen_llm_tokens_total", labels("prompt")) == before[0] + 120
+        assert sample("yougen_llm_tokens_total", labels("completion")) == before[1] + 30
+
+    @pytest.mark.asyncio
+    async def test_websocket_queue_depth(self):
+        """Test that the queued messages gauge follows enqueues, sends, drops and disconnects."""
+        before = sample("yougen_websocket_queued_messages")
+        client = ClientConnection("a", websocket=None, max_queue=2)
+
+        client.enqueue("progress 1", key="download_progress:t")
+        client.enqueue("done")
+        client.enqueue("progress 2", key="download_progress:u")  # Drops the superseded progress
+        assert sample("yougen_websocket_queued_messages") == before + 2
+
+        await client.next_message()
+        assert sample("yougen_websocket_queued_messages") == before + 1
+
+        client.clear()
+        assert sample("yougen_websocket_queued_messages") == before
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self):
+        """Test that /metrics serves the text exposition format."""
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE yougen_external_call_seconds histogram" in response.text
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from src.application.use_cases.note_autosave import NoteAutosaveUseCase
+from src.domain.entities.note import Note, NoteVersionConflictError
+from src.infrastructure.tools.json_patch_tool import JsonPatchTool
+
+
+class InMemoryNoteRepository:
+    """Note repository keeping a single note, with writes that can be made to fail."""
+
+    def __init__(self, note):
+        self.note = note
+        self.failures = 0
+        self.writes = []
+
+    async def get_note_by_id(self, note_id):
+        return self.note
+
+    async def save_content(self, note_id, content, content_text, expected_version, new_version, embedding):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        if expected_version != self.note.version:
+            raise NoteVersionConflictError(note_id, expected_version)
+        self.note = Note(video_id=self.note.video_id, content=content, content_text=content_text,
+                         id=note_id, version=new_version)
+        self.writes.append(new_version)
+
+
+def document(text):
+    return {"root": {"children": [{"type": "paragraph", "children": [{"type": "text", "text": text}]}]}}
+
+
+def set_text(text):
+    return [{"op": "set_text", "path": [0, 0], "text": text}]
+
+
+class TestNoteAutosaveUseCase:
+    """Tests for the NoteAutosaveUseCase class."""
+
+    @pytest.fixture
+    def repository(self):
+        return InMemoryNoteRepository(Note(video_id="vid1", content=document("a"), content_text="a", id=1, version=1))
+
+    @pytest.fixture
+    def autosave(self, repository, mocker):
+        use_case = NoteAutosaveUseCase(repository)
+        use_case.DEBOUNCE_SECONDS = 0.01
+        use_case.embedding_service = mocker.Mock(embed=mocker.Mock(return_value=None))
+        return use_case
+
+    @staticmethod
+    def client():
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        return send, messages
+
+    @pytest.mark.asyncio
+    async def test_leave_keeps_session_until_flushed(self, autosave, repository):
+        """Test that edits survive a failed final write and are written by the retry."""
+        send, _ = self.client()
+        await autosave.join(1, "c1", send)
+        await autosave.apply_edit(1, "c1", set_text("b"), 1)
+
+        repository.failures = 1
+        await autosave.leave(1, "c1")
+
+        assert 1 in autosave.sessions
+        assert repository.writes == []
+
+        await asyncio.sleep(0.05)
+
+        assert repository.writes == [2]
+        assert repository.note.content == document("b")
+        assert 1 not in autosave.sessions
+
+    @pytest.mark.asyncio
+    async def test_edit_after_session_gone(self, autosave):
+        """Test that an edit from a client outside the session is a conflict, not a crash."""
+        send, _ = self.client()
+        await autosave.join(1, "c1", send)
+        await autosave.leave(1, "c1")
+
+        with pytest.raises(NoteVersionConflictError):
+            await autosave.apply_edit(1, "c1", set_text("b"), 1)
+
+    @pytest.mark.asyncio
+    async def test_failing_subscriber_leaves(self, autosave, repository):
+        """Test that a client whose send fails leaves like a disconnected one."""
+        send, messages = self.client()
+
+        async def broken(message):
+            raise ConnectionError("client went away")
+
+        await autosave.join(1, "c1", send)
+        await autosave.join(1, "c2", broken)
+        await autosave.apply_edit(1, "c2", set_text("b"), 1)
+        await autosave.leave(1, "c1")
+
+        assert messages[-1]["type"] == "edit"
+        assert 1 in autosave.sessions
+
+        # The debounced write tells c2 it was saved, which fails and evicts the last client
+        await asyncio.sleep(0.05)
+
+        assert repository.writes == [2]
+        assert 1 not in autosave.sessions
+
+    @pytest.mark.asyncio
+    async def test_conflict_returns_unsaved_edits(self, autosave, repository):
+        """Test that edits beaten by a write from another worker are sent back, not dropped."""
+        send, messages = self.client()
+        await autosave.join(1, "c1", send)
+        await autosave.apply_edit(1, "c1", set_text("mine"), 1)
+
+        # Another worker saved the note meanwhile
+        repository.note = Note(video_id="vid1", content=document("theirs"), content_text="theirs", id=1, version=2)
+        await autosave.flush(1)
+
+        conflict = messages[-1]
+        assert conflict["type"] == "conflict"
+        assert conflict["data"]["version"] == 2
+        assert conflict["data"]["content"] == document("theirs")
+        unsaved = conflict["data"]["unsaved"]
+        assert unsaved["base_version"] == 1
+        assert JsonPatchTool.apply(document("a"), unsaved["operations"]) == document("mine")
+        assert autosave.snapshot(1) == {"version": 2, "content": document("theirs")}
@@ -0,0 +1,42 @@
+import dataclasses
+import pytest
+from datetime import datetime
+from src.domain.entities.note import Note, ScoredNote
+from src.models.note import NoteResponse, NoteSearchResult
+
+
+ROW = {
+    "id": 7,
+    "video_id": "dQw4w9WgXcQ",
+    "content": {"root": {"children": []}},
+    "content_text": "",
+    "timestamp": 42,
+    "tags": ["music"],
+    "version": 3,
+    "created_at": datetime(2026, 3, 1, 12),
+    "updated_at": datetime(2026, 3, 2, 12),
+}
+
+
+class TestNoteEntities:
+    """Tests for building notes from rows and responses from notes."""
+
+    def test_from_record(self):
+        """Test that a note is built from a row and cannot be changed afterwards."""
+        note = Note.from_record(ROW)
+
+        assert (note.id, note.video_id, note.version, note.tags) == (7, "dQw4w9WgXcQ", 3, ["music"])
+        assert note.video_url == "https://youtube.com/watch?v=dQw4w9WgXcQ"
+        assert not hasattr(note, "__dict__")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            note.version = 4
+
+    def test_responses_from_attributes(self):
+        """Test that response models validate entities directly."""
+        response = NoteResponse.model_validate(Note.from_record(ROW))
+        hit = NoteSearchResult.model_validate(ScoredNote.from_record({**ROW, "score": 0.5}))
+
+        assert response.video_url == "https://youtube.com/watch?v=dQw4w9WgXcQ"
+        assert response.timestamp == 42
+        assert hit.id == 7
+        assert hit.score == 0.5
@@ -0,0 +1,88 @@
+import pytest
+from src.application.use_cases.note_history import NoteHistoryUseCase
+
+
+class InMemoryRevisionRepository:
+    """Revision repository keeping revisions in a dict."""
+
+    def __init__(self):
+        self.revisions = {}
+
+    async def add_revision(self, revision):
+        self.revisions.setdefault(revision.version, revision)
+
+    async def get_latest_revision_info(self, note_id):
+        if not self.revisions:
+            return None
+        snapshot = max(v for v, r in self.revisions.items() if r.kind == "snapshot")
+        return max(self.revisions), sum(1 for v in self.revisions if v > snapshot)
+
+    async def get_revision_chain(self, note_id, version):
+        snapshot = max(v for v, r in self.revisions.items() if r.kind == "snapshot" and v <= version)
+        return [self.revisions[v] for v in sorted(self.revisions) if snapshot <= v <= version]
+
+    async def get_revisions(self, note_id, include_payload=False):
+        return [self.revisions[v] for v in sorted(self.revisions)]
+
+    async def replace_deltas(self, note_id, versions, merged):
+        for version in versions:
+            del self.revisions[version]
+        self.revisions[merged.version] = merged
+
+
+def content(*texts):
+    return {"root": {"children": [{"type": "paragraph", "text": text} for text in texts]}}
+
+
+class TestNoteHistoryUseCase:
+    """Tests for the NoteHistoryUseCase class."""
+
+    @pytest.fixture
+    def history(self):
+        return NoteHistoryUseCase(InMemoryRevisionRepository())
+
+    async def record_versions(self, history, count):
+        documents = {1: content("v1")}
+        await history.record_revision(1, 1, documents[1])
+        for version in range(2, count + 1):
+            documents[version] = content(*[f"v{i}" for i in range(1, version + 1)])
+            await history.record_revision(
+                1, version, documents[version],
+                base_version=version - 1, base_content=documents[version - 1],
+            )
+        return documents
+
+    @pytest.mark.asyncio
+    async def test_snapshots_and_deltas(self, history):
+        """Test that deltas are stored between periodic snapshots."""
+        history.SNAPSHOT_INTERVAL = 5
+        documents = await self.record_versions(history, 12)
+
+        kinds = [r.kind for r in await history.revision_repository.get_revisions(1)]
+        assert kinds == ["snapshot"] + ["delta"] * 5 + ["snapshot"] + ["delta"] * 5
+
+        for version, document in documents.items():
+            assert await history.get_note_at_version(1, version) == document
+
+    @pytest.mark.asyncio
+    async def test_snapshot_when_base_unknown(self, history):
+        """Test that a save against an unrecorded version stores a snapshot."""
+        await history.record_revision(1, 1, content("a"))
+        await history.record_revision(1, 3, content("b"), base_version=2, base_content=content("x"))
+
+        revisions = await history.revision_repository.get_revisions(1)
+        assert [r.kind for r in revisions] == ["snapshot", "snapshot"]
+
+    @pytest.mark.asyncio
+    async def test_compact_revisions(self, history):
+        """Test that compaction merges old deltas and keeps recent versions intact."""
+        documents = await self.record_versions(history, 15)
+
+        removed = await history.compact_revisions(1, keep_recent=4, merge_every=5)
+
+        versions = sorted(history.revision_repository.revisions)
+        assert removed == 8
+        assert versions == [1, 6, 11, 12, 13, 14, 15]
+        for version in versions:
+            assert await history.get_note_at_version(1, version) == documents[version]
+        assert await history.get_note_at_version(1, 3) is None
@@ -0,0 +1,50 @@
+import httpx
+import pytest
+from datetime import datetime
+from src.infrastructure.repositories.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    next_cursor,
+)
+from src.presentation.main import app
+
+
+class TestPagination:
+    """Tests for the keyset pagination cursor helpers."""
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes back to the sort key it was built from."""
+        updated_at = datetime(2026, 10, 19, 12, 30, 5, 123456)
+
+        cursor = encode_cursor(updated_at, 42)
+
+        assert decode_cursor(cursor, (datetime, int)) == [updated_at, 42]
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1), encode_cursor("x", "y")])
+    def test_invalid_cursor(self, cursor):
+        """Test that malformed or mistyped cursors are rejected."""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor, (datetime, int))
+
+    def test_next_cursor(self):
+        """Test that a cursor is only returned when the look-ahead row exists."""
+        rows = [{"created_at": datetime(2026, 1, day), "id": day} for day in (3, 2, 1)]
+
+        assert next_cursor(rows, 3, "created_at", "id") is None
+        cursor = next_cursor(rows, 2, "created_at", "id")
+        assert decode_cursor(cursor, (datetime, int)) == [datetime(2026, 1, 2), 2]
+
+    @pytest.mark.asyncio
+    async def test_cursor_header_exposed_to_browsers(self, mocker):
+        """Test that cross-origin scripts may read the X-Next-Cursor header."""
+        mocker.patch(
+            "src.infrastructure.repositories.history_repository.HistoryRepository.get_user_history",
+            return_value=([], "next"),
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/history", headers={"Origin": "http://localhost:5173"})
+
+        assert response.headers["X-Next-Cursor"] == "next"
+        assert "X-Next-Cursor" in response.headers["Access-Control-Expose-Headers"]
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from src.presentation.rate_limit import (
+    EndpointLimit,
+    RateLimitMiddleware,
+    SharedTokenBuckets,
+    TokenBuckets,
+)
+
+ENDPOINTS = {("GET", "/slow"): "slow", ("GET", "/cheap"): "cheap"}
+
+
+def create_client(limits, release=None):
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        if release is not None:
+            await release.wait()
+        return {"ok": True}
+
+    @app.get("/cheap")
+    async def cheap():
+        return {"ok": True}
+
+    @app.get("/free")
+    async def free():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limits=limits, endpoints=ENDPOINTS)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+class TestRateLimit:
+    """Tests for per-client token buckets and concurrency caps."""
+
+    @pytest.mark.asyncio
+    async def test_client_over_its_rate_gets_429(self):
+        """Test that a burst beyond the bucket is throttled per endpoint class only."""
+        limits = {
+            "slow": EndpointLimit(rate=0.5, burst=2, max_concurrent=10, max_queue=0, queue_timeout=1.0),
+            "cheap": EndpointLimit(rate=0.5, burst=2, max_concurrent=10, max_queue=0, queue_timeout=1.0),
+        }
+        async with create_client(limits) as client:
+            statuses = [(await client.get("/slow")).status_code for _ in range(3)]
+            throttled = await client.get("/slow")
+            cheap = await client.get("/cheap")
+            free = [(await client.get("/free")).status_code for _ in range(5)]
+
+        assert statuses == [200, 200, 429]
+        assert throttled.status_code == 429
+        assert throttled.headers["retry-after"] == "2"
+        assert cheap.status_code == 200
+        assert free == [200] * 5
+
+    @pytest.mark.asyncio
+    async def test_saturated_queue_sheds_load_with_503(self):
+        """Test that requests beyond the slots and the queue are turned away at once."""
+        limits = {
+            "slow": EndpointLimit(rate=100, burst=100, max_concurrent=1, max_queue=1, queue_timeout=5.0),
+            "cheap": EndpointLimit(rate=100, burst=100, max_concurrent=1, max_queue=1, queue_timeout=5.0),
+        }
+        release = asyncio.Event()
+        async with create_client(limits, release) as client:
+            running = asyncio.create_task(client.get("/slow"))
+            queued = asyncio.create_task(client.get("/slow"))
+            await asyncio.sleep(0.05)
+            shed = await asyncio.wait_for(client.get("/slow"), 1.0)
+            release.set()
+            responses = await asyncio.gather(running, queued)
+
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "5"
+        assert [response.status_code for response in responses] == [200, 200]
+
+    def test_token_bucket_refills(self, mocker):
+        """Test that tokens come back at the configured rate, up to the burst."""
+        clock = mocker.patch("src.presentation.rate_limit.time.monotonic", return_value=100.0)
+        buckets = TokenBuckets()
+        take = lambda: asyncio.run(buckets.take("a", 2.0, 2))
+
+        assert [take(), take()] == [0.0, 0.0]
+        assert take() == pytest.approx(0.5)
+        clock.return_value = 100.5
+        assert take() == 0.0
+        clock.return_value = 200.0
+        assert [take(), take(), take()] == [0.0, 0.0, pytest.approx(0.5)]
+
+    @pytest.mark.asyncio
+    async def test_shared_buckets_fall_back_to_worker(self, mocker):
+        """Test that clients are still limited per worker while the database is down."""
+        repository = mocker.Mock()
+        repository.take_token = mocker.AsyncMock(side_effect=ConnectionError("down"))
+        buckets = SharedTokenBuckets(repository)
+
+        waits = [await buckets.take("a", 1.0, 2) for _ in range(3)]
+
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] > 0
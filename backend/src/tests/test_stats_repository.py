@@ -0,0 +1,54 @@
+import pytest
+from datetime import datetime
+from src.infrastructure.repositories.stats_repository import StatsRepository
+
+
+class TestStatsRepository:
+    """Tests for the StatsRepository class."""
+
+    @pytest.mark.asyncio
+    async def test_get_summary(self, mocker):
+        """Test that all-time rollups are folded into per-format and per-language totals."""
+        rows = [
+            {"metric": "downloads.completed", "dimension": "mp4", "count": 3, "bytes": 300},
+            {"metric": "downloads.completed", "dimension": "mp3", "count": 2, "bytes": 20},
+            {"metric": "downloads.failed", "dimension": "mp4", "count": 1, "bytes": 0},
+            {"metric": "notes", "dimension": "", "count": 7, "bytes": 0},
+            {"metric": "chats", "dimension": "en", "count": 4, "bytes": 0},
+            {"metric": "chats", "dimension": "fr", "count": 1, "bytes": 0},
+        ]
+        mocker.patch(
+            "src.infrastructure.repositories.stats_repository.db.fetch",
+            return_value=rows,
+        )
+
+        summary = await StatsRepository.get_summary()
+
+        assert summary["downloads"]["completed"] == 5
+        assert summary["downloads"]["failed"] == 1
+        assert summary["downloads"]["bytes"] == 320
+        assert summary["downloads"]["by_format"]["mp4"] == {"completed": 3, "failed": 1, "bytes": 300}
+        assert summary["notes"] == {"total": 7}
+        assert summary["chats"] == {"total": 5, "by_language": {"en": 4, "fr": 1}}
+
+    @pytest.mark.asyncio
+    async def test_get_series_fills_empty_buckets(self, mocker):
+        """Test that a series has one point per bucket, including buckets without rollups."""
+        rows = [
+            {"bucket": datetime(2026, 3, 10, 9), "dimension": "mp4", "count": 2, "bytes": 200},
+            {"bucket": datetime(2026, 3, 10, 10), "dimension": None, "count": None, "bytes": None},
+            {"bucket": datetime(2026, 3, 10, 11), "dimension": "mp3", "count": 1, "bytes": 10},
+            {"bucket": datetime(2026, 3, 10, 11), "dimension": "mp4", "count": 1, "bytes": 100},
+        ]
+        fetch = mocker.patch(
+            "src.infrastructure.repositories.stats_repository.db.fetch",
+            return_value=rows,
+        )
+
+        series = await StatsRepository.get_series("downloads.completed", "hour", 3)
+
+        assert fetch.call_args.args[1:] == ("downloads.completed", "hour", 3)
+        assert [point["count"] for point in series] == [2, 0, 2]
+        assert series[2]["bytes"] == 110
+        assert series[2]["by_format"] == {"mp3": 1, "mp4": 1}
+        assert series[1] == {"bucket": "2026-03-10T10:00:00", "count": 0, "bytes": 0}
@@ -0,0 +1,244 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from src.infrastructure.db.connection import db
+from src.infrastructure.messaging.pubsub import MAX_PAYLOAD_BYTES, PostgresPubSub
+from src.presentation.websocket import SLOW_CONSUMER_CLOSE_CODE, InvalidTopicError, WebSocketManager
+
+
+class FakeWebSocket:
+    """WebSocket recording sent frames; a stalled one blocks every send."""
+
+    def __init__(self, stalled=False):
+        self.sent = []
+        self.closed_with = None
+        self.unblocked = asyncio.Event()
+        if not stalled:
+            self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.unblocked.wait()
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+    def messages(self):
+        return [json.loads(text) for text in self.sent]
+
+
+def progress(task_id, completed):
+    return {"type": "download_progress", "data": {"task_id": task_id, "completed": completed}}
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class FakeListenConnection:
+    """Dedicated connection of one worker, receiving what FakePostgres notifies."""
+
+    def __init__(self, server):
+        self.server = server
+        self.listeners = {}
+
+    def add_termination_listener(self, callback):
+        pass
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+        self.server.connections.append(self)
+
+    def is_closed(self):
+        return self not in self.server.connections
+
+    async def close(self):
+        self.server.connections.remove(self)
+
+
+class FakePostgres:
+    """Delivers pg_notify payloads to every listening connection, recording their sizes."""
+
+    def __init__(self):
+        self.connections = []
+        self.round_trips = 0
+        self.payload_sizes = []
+
+    async def connect_dedicated(self):
+        return FakeListenConnection(self)
+
+    async def execute(self, query, channel, payloads):
+        self.round_trips += 1
+        for payload in payloads:
+            self.payload_sizes.append(len(payload.encode()))
+            for connection in list(self.connections):
+                connection.listeners[channel](connection, 1, channel, payload)
+
+
+@pytest.fixture
+def postgres(mocker):
+    server = FakePostgres()
+    mocker.patch.object(db, "connect_dedicated", server.connect_dedicated)
+    mocker.patch.object(db, "execute", server.execute)
+    return server
+
+
+@pytest_asyncio.fixture
+async def managers():
+    created = []
+
+    def create(**kwargs):
+        created.append(WebSocketManager(**kwargs))
+        return created[-1]
+
+    yield create
+    for manager in created:
+        await manager.close()
+
+
+class TestWebSocketManager:
+    """Tests for the WebSocketManager class."""
+
+    @pytest.mark.asyncio
+    async def test_stalled_client_does_not_delay_others(self, managers):
+        """Test that broadcast returns at once and other clients get every message."""
+        manager = managers(max_queue=10)
+        fast, stalled = FakeWebSocket(), FakeWebSocket(stalled=True)
+        await manager.connect(fast)
+        await manager.connect(stalled)
+
+        await asyncio.wait_for(manager.broadcast({"type": "download_complete", "data": {}}), 0.1)
+        await settle()
+
+        assert [m["type"] for m in fast.messages()] == ["system", "download_complete"]
+        assert stalled.sent == []
+
+    @pytest.mark.asyncio
+    async def test_progress_is_coalesced(self, managers):
+        """Test that a queued progress update is replaced by newer ones for the same task."""
+        manager = managers(max_queue=10)
+        websocket = FakeWebSocket(stalled=True)
+        await manager.connect(websocket)
+
+        for completed in range(5):
+            await manager.broadcast(progress("a", completed))
+            await manager.broadcast(progress("b", completed))
+        websocket.unblocked.set()
+        await settle()
+
+        assert [(m["data"].get("task_id"), m["data"].get("completed")) for m in websocket.messages()[1:]] == [
+            ("a", 4), ("b", 4)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_progress_then_evicts(self, managers):
+        """Test that progress makes room first and a client still behind is evicted."""
+        manager = managers(max_queue=3)
+        websocket = FakeWebSocket(stalled=True)
+        connection_id = await manager.connect(websocket)
+        await settle()  # The welcome message is being sent
+
+        await manager.broadcast(progress("a", 1))
+        for i in range(3):
+            await manager.broadcast({"type": "download_complete", "data": {"task_id": str(i)}})
+        client = manager.active_connections[connection_id]
+        assert client.dropped == 1
+
+        await manager.broadcast({"type": "download_complete", "data": {"task_id": "3"}})
+        await settle()
+
+        assert connection_id not in manager.active_connections
+        assert manager.evicted == 1
+        assert websocket.closed_with == SLOW_CONSUMER_CLOSE_CODE
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_only_subscribers(self, managers):
+        """Test that a topic's messages go to its subscribers and nobody else."""
+        manager = managers()
+        subscriber, other = FakeWebSocket(), FakeWebSocket()
+        subscriber_id = await manager.connect(subscriber)
+        other_id = await manager.connect(other)
+        manager.subscribe(subscriber_id, "task:a")
+        manager.subscribe(other_id, "task:b")
+
+        recipients = await manager.publish("task:a", progress("a", 1))
+        await settle()
+
+        assert recipients == 1
+        assert subscriber_id != other_id and len(subscriber_id) == 32
+        assert [(m["type"], m.get("topic")) for m in subscriber.messages()] == [
+            ("system", None), ("download_progress", "task:a")
+        ]
+        assert [m["type"] for m in other.messages()] == ["system"]
+
+    @pytest.mark.asyncio
+    async def test_subscriptions_are_cleaned_up(self, managers):
+        """Test that unsubscribing and disconnecting empty the topic index."""
+        manager = managers()
+        websocket = FakeWebSocket()
+        connection_id = await manager.connect(websocket)
+        manager.subscribe(connection_id, "note:1")
+        manager.subscribe(connection_id, "video:abc")
+
+        manager.unsubscribe(connection_id, "note:1")
+        assert set(manager.topics) == {"video:abc"}
+
+        manager.disconnect(websocket)
+        assert manager.topics == {}
+        assert await manager.publish("video:abc", {"type": "note_created", "data": {}}) == 0
+
+    def test_invalid_topic_is_rejected(self):
+        """Test that only task, note and video channels can be subscribed to."""
+        manager = WebSocketManager()
+        for topic in ("download:1", "task:", "task", None):
+            with pytest.raises(InvalidTopicError):
+                manager.subscribe("any", topic)
+
+
+class TestPostgresPubSub:
+    """Tests for forwarding WebSocket messages between workers with LISTEN/NOTIFY."""
+
+    @pytest.mark.asyncio
+    async def test_subscribers_on_other_workers_receive_messages(self, postgres):
+        """Test that a topic message reaches subscribers of every worker exactly once."""
+        workers = [WebSocketManager(pubsub=PostgresPubSub(flush_interval=0)) for _ in range(2)]
+        sockets = [FakeWebSocket() for _ in workers]
+        for manager, websocket in zip(workers, sockets):
+            await manager.start()
+            manager.subscribe(await manager.connect(websocket), "task:a")
+
+        await workers[0].publish("task:a", {"type": "download_complete", "data": {"task_id": "a"}})
+        await asyncio.sleep(0.01)
+        await settle()
+        for manager in workers:
+            await manager.close()
+
+        for websocket in sockets:
+            assert [m["type"] for m in websocket.messages()] == ["system", "download_complete"]
+
+    @pytest.mark.asyncio
+    async def test_messages_are_batched_below_payload_limit(self, postgres):
+        """Test that a burst is sent in one round trip of payloads Postgres accepts."""
+        sender, receiver = PostgresPubSub(), PostgresPubSub()
+        received = []
+        await sender.start(lambda *message: None)
+        await receiver.start(lambda *message: received.append(message))
+
+        for i in range(100):
+            await sender.publish("task:a", "download_progress:a", json.dumps({"i": i, "pad": "x" * 200}))
+        await sender.publish("note:1", None, json.dumps({"content": "lorem ipsum " * 2000}))
+        await sender.close()
+        await receiver.close()
+
+        assert postgres.round_trips == 1
+        assert len(postgres.payload_sizes) > 1
+        assert max(postgres.payload_sizes) < MAX_PAYLOAD_BYTES + 100
+        assert [json.loads(text).get("i") for _, _, text in received[:100]] == list(range(100))
+        assert received[-1][0] == "note:1"
+        assert json.loads(received[-1][2])["content"].startswith("lorem ipsum")
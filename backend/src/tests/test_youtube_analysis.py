@@ -0,0 +1,149 @@
+from dataclasses import replace
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from src.application.use_cases.download_tracking import DownloadTrackingUseCase
+from src.application.use_cases.youtube_analysis import YoutubeAnalysisUseCase
+from src.domain.entities.video import VideoFormats
+from src.infrastructure.agents.video_agent import VideoAgent
+from src.presentation.routes import youtube
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+# What yt_dlp's extract_info returns for a video, upload date included
+YT_DLP_INFO = {
+    "id": "dQw4w9WgXcQ",
+    "title": "Test Video",
+    "thumbnail": "https://example.com/thumbnail.jpg",
+    "duration": 212,
+    "upload_date": "20200101",
+    "uploader": "Test Channel",
+}
+
+
+class InMemoryVideoRepository:
+    """Video repository that rejects values the TIMESTAMP column would reject."""
+
+    def __init__(self):
+        self.videos = {}
+        self.formats = {}
+
+    async def get_video_by_id(self, video_id):
+        return self.videos.get(video_id)
+
+    async def save_video(self, video):
+        if video.upload_date is not None and not isinstance(video.upload_date, datetime):
+            raise TypeError(f"upload_date must be a datetime, not {type(video.upload_date).__name__}")
+        self.videos[video.video_id] = replace(video, etag="etag")
+        return self.videos[video.video_id]
+
+    async def get_formats(self, video_id):
+        return self.formats.get(video_id)
+
+    async def save_formats(self, video_id, formats):
+        # Formats are stored on the video's row, so the video must exist
+        video = self.videos.get(video_id)
+        if video is None:
+            return None
+        self.formats[video_id] = VideoFormats(video_id, video.title, formats, "etag")
+        return self.formats[video_id]
+
+
+class InMemoryDownloadRepository:
+    """Download repository that hands out IDs and drops updates."""
+
+    async def create_download(self, video_id, format_type, resolution=None):
+        return 1
+
+    async def apply_updates(self, updates):
+        pass
+
+
+def fake_yt_dlp(mocker, info):
+    """Patch yt_dlp so that every extraction returns info."""
+    ydl = mocker.MagicMock()
+    ydl.__enter__.return_value.extract_info.return_value = info
+    module = mocker.Mock(YoutubeDL=mocker.Mock(return_value=ydl))
+    mocker.patch("src.infrastructure.tools.download_tool.load_yt_dlp", return_value=module)
+
+
+class TestYoutubeAnalysisUseCase:
+    """Tests for the YoutubeAnalysisUseCase class."""
+
+    @pytest.fixture
+    def videos(self):
+        return InMemoryVideoRepository()
+
+    @pytest.fixture
+    def use_case(self, videos, mocker):
+        tracking = DownloadTrackingUseCase(InMemoryDownloadRepository())
+        return YoutubeAnalysisUseCase(videos, tracking, transcript_repository=mocker.Mock())
+
+    @pytest.mark.asyncio
+    async def test_download_new_video(self, use_case, videos, mocker):
+        """Test that a video not stored yet is saved with its upload date and downloaded."""
+        fake_yt_dlp(mocker, YT_DLP_INFO)
+        mocker.patch.object(VideoAgent, "download_video", return_value={
+            "video_id": "dQw4w9WgXcQ",
+            "title": "Test Video",
+            "file_path": "/downloads/dQw4w9WgXcQ.mp4",
+            "file_size": 1024,
+            "format": "mp4",
+            "resolution": "720",
+        })
+
+        result = await use_case.download_video(VIDEO_URL, "mp4", "720")
+
+        assert result["download_id"] == 1
+        assert result["file_url"] == "/downloads/dQw4w9WgXcQ.mp4"
+        assert videos.videos["dQw4w9WgXcQ"].upload_date == datetime(2020, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_formats_of_new_video(self, use_case, videos, mocker):
+        """Test that formats of a video not stored yet are fetched, with the video saved first."""
+        fake_yt_dlp(mocker, {**YT_DLP_INFO, "formats": [
+            {"format_id": "22", "ext": "mp4", "height": 720, "vcodec": "avc1", "acodec": "mp4a"},
+        ]})
+
+        formats = await use_case.get_video_formats(VIDEO_URL)
+
+        assert formats.title == "Test Video"
+        assert [fmt["format_id"] for fmt in formats.formats] == ["22", "audio"]
+        assert videos.videos["dQw4w9WgXcQ"].upload_date == datetime(2020, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_invalid_upload_date_is_dropped(self, use_case, videos, mocker):
+        """Test that an upload date in an unexpected format is stored as unknown."""
+        fake_yt_dlp(mocker, {**YT_DLP_INFO, "upload_date": "2020-01-01"})
+
+        video = await use_case.get_video_metadata(VIDEO_URL)
+
+        assert video.upload_date is None
+
+
+class TestPlaylistRoute:
+    """Tests for the playlist metadata endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_upload_dates(self, mocker):
+        """Test that the entries' upload dates are read as calendar dates, not Unix timestamps."""
+        fake_yt_dlp(mocker, {
+            "id": "PL1",
+            "title": "Test Playlist",
+            "playlist_count": 2,
+            "uploader": "Test Channel",
+            "entries": [YT_DLP_INFO, {**YT_DLP_INFO, "id": "vid2", "upload_date": None}],
+        })
+        app = FastAPI()
+        app.include_router(youtube.router, prefix="/api")
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get(
+                "/api/youtube/playlist", params={"url": "https://www.youtube.com/playlist?list=PL1"}
+            )
+
+        assert response.status_code == 200
+        videos = response.json()["videos"]
+        assert [video["upload_date"] for video in videos] == ["2020-01-01T00:00:00", None]
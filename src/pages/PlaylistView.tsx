@@ -59,6 +59,7 @@ export default function PlaylistView() {
     
     // Listen for download completion
     websocketService.on("download_complete", (data: any) => {
+      websocketService.unsubscribe(`task:${data.task_id}`);
       setIsDownloading(false);
       toast({
         title: "Download Complete",
@@ -68,6 +69,7 @@ export default function PlaylistView() {
     
     // Listen for download errors
     websocketService.on("download_error", (data: any) => {
+      websocketService.unsubscribe(`task:${data.task_id}`);
       setIsDownloading(false);
       toast({
         title: "Download Error",
@@ -168,6 +170,9 @@ export default function PlaylistView() {
         resolution: resolution as '240' | '360' | '480' | '720' | '1080' | undefined,
       });
       
+      // Progress is only sent to clients following the task
+      websocketService.subscribe(`task:${response.task_id}`);
+      
       setDownloadProgress({
         taskId: response.task_id,
         completed: 0,
@@ -43,7 +43,7 @@ export const youtubeApi = {
   
   // Get available formats for a video
   getVideoFormats: async (videoUrl: string): Promise<IFormatListResponse> => {
-    const response = await api.post("/youtube/formats", { video_url: videoUrl });
+    const response = await api.get("/youtube/formats", { params: { url: videoUrl } });
     return response.data;
   },
   
@@ -12,6 +12,8 @@ class WebSocketService {
   private maxReconnectAttempts = 5;
   private reconnectTimeout = 2000;
   private messageHandlers: Record<string, MessageHandler[]> = {};
+  // Topics such as "task:<id>", "note:<id>" or "video:<id>", renewed after a reconnect
+  private topics = new Set<string>();
   
   connect(url: string = "ws://localhost:8000/ws") {
     if (this.socket?.readyState === WebSocket.OPEN) {
@@ -23,6 +25,7 @@ class WebSocketService {
     this.socket.onopen = () => {
       console.log("WebSocket connection established");
       this.reconnectAttempts = 0;
+      this.topics.forEach((topic) => this.sendTopic("subscribe", topic));
     };
     
     this.socket.onmessage = (event) => {
@@ -55,6 +58,7 @@ class WebSocketService {
   }
   
   disconnect() {
+    this.topics.clear();
     if (this.socket) {
       this.socket.close();
       this.socket = null;
@@ -69,6 +73,23 @@ class WebSocketService {
     }
   }
   
+  subscribe(topic: string) {
+    this.topics.add(topic);
+    this.sendTopic("subscribe", topic);
+  }
+  
+  unsubscribe(topic: string) {
+    this.topics.delete(topic);
+    this.sendTopic("unsubscribe", topic);
+  }
+  
+  private sendTopic(type: "subscribe" | "unsubscribe", topic: string) {
+    // Sent again on (re)connect when the socket is not open yet
+    if (this.socket?.readyState === WebSocket.OPEN) {
+      this.socket.send(JSON.stringify({ type, topic }));
+    }
+  }
+  
   on(messageType: string, handler: MessageHandler) {
     if (!this.messageHandlers[messageType]) {
       this.messageHandlers[messageType] = [];